@@ -0,0 +1,196 @@
+"""
+Offline fixture server which serves synthetic Google Maps-like result feeds.
+
+The pages use the same class names as the scraper defaults (Nv2PK, qBF1Pd, W4Efsd, UsdlK, HlvSq)
+and load more cards when the feed is scrolled, so the scraping hot path can be exercised
+and benchmarked without network access.
+"""
+
+from dataclasses import asdict, dataclass
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+from threading import Thread
+import time
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+@dataclass
+class FixtureConfig:
+    # Number of cards in every feed
+    cards: int = 120
+    # Cards delivered per scroll batch (the first batch is shown after the page load)
+    batch: int = 20
+    # Probability of a card missing its phone / website / address
+    missing_phone: float = 0.3
+    missing_website: float = 0.5
+    missing_address: float = 0.1
+    # Artificial latencies in seconds
+    latency_page: float = 0.0
+    latency_first_card: float = 0.2
+    latency_scroll: float = 0.3
+    # Show the "end of list" marker once every card is delivered
+    end_marker: bool = True
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>{title} - Google Maps</title></head>
+<body>
+<div role="main">
+  <div role="feed" id="feed" style="height: 600px; overflow-y: scroll;"></div>
+</div>
+<script>
+const feed = document.getElementById("feed");
+const path = {path};
+let offset = 0;
+let isLoading = false;
+let isEnd = false;
+function load() {{
+    if (isLoading || isEnd) {{
+        return;
+    }}
+    isLoading = true;
+    fetch("/feed?path=" + encodeURIComponent(path) + "&offset=" + offset)
+        .then((response) => response.json())
+        .then((data) => {{
+            feed.insertAdjacentHTML("beforeend", data.html);
+            offset += data.count;
+            isEnd = data.end;
+            isLoading = false;
+        }});
+}}
+feed.addEventListener("scroll", () => {{
+    if (feed.scrollTop + feed.clientHeight >= feed.scrollHeight - 10) {{
+        load();
+    }}
+}});
+load();
+</script>
+</body>
+</html>
+"""
+
+CARD_TEMPLATE = """<div class="Nv2PK" style="height: 120px;">
+  <a class="hfpxzc" href="/maps/place/{name_url}/data=!4m7!3m6!1s0x{fid_a:x}:0x{fid_b:x}!8m2"></a>
+  <div class="qBF1Pd">{name}</div>
+  <div class="W4Efsd">{address}</div>
+  {phone}
+  {website}
+</div>
+"""
+
+
+def build_cards(path: str, offset: int, count: int, config: FixtureConfig) -> str:
+    """
+    Builds the HTML of count deterministic cards of the feed at the path.
+    """
+    cards = []
+    for index in range(offset, offset + count):
+        rng = random.Random(f"{path}#{index}")
+        name = f"Place {index} {rng.choice(['Cafe', 'Market', 'Studio', 'Garage', 'Bakery'])}"
+        address = "" if rng.random() < config.missing_address else \
+            f'<div class="W4Efsd">{rng.randint(1, 300)} Fixture Street</div>'
+        phone = "" if rng.random() < config.missing_phone else \
+            f'<span class="UsdlK">+90 {rng.randint(200, 599)} {rng.randint(100, 999)} {rng.randint(1000, 9999)}</span>'
+        website = "" if rng.random() < config.missing_website else \
+            f'<a aria-label="Visit {escape(name)} website" href="https://example.com/{index}"></a>'
+        cards.append(CARD_TEMPLATE.format(
+            name=escape(name),
+            name_url=name.replace(" ", "+"),
+            fid_a=rng.getrandbits(60),
+            fid_b=rng.getrandbits(60),
+            address=address,
+            phone=phone,
+            website=website
+        ))
+    return "".join(cards)
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server: "FixtureServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body: str, content_type: str):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        config = self.server.config
+        url = urlparse(self.path)
+        self.server.count_requests += 1
+
+        if url.path.startswith("/maps/search/"):
+            time.sleep(config.latency_page)
+            title = unquote(url.path.split("/")[3])
+            self.send_body(
+                PAGE_TEMPLATE.format(title=escape(title), path=json.dumps(url.path)),
+                "text/html"
+            )
+        elif url.path == "/feed":
+            query = parse_qs(url.query)
+            path = query.get("path", [""])[0]
+            offset = int(query.get("offset", ["0"])[0])
+            time.sleep(config.latency_first_card if offset == 0 else config.latency_scroll)
+            count = max(0, min(config.batch, config.cards - offset))
+            is_end = offset + count >= config.cards
+            html = build_cards(path, offset, count, config)
+            if is_end and config.end_marker:
+                html += '<div class="m6QErb"><span class="HlvSq">You\'ve reached the end of the list.</span></div>'
+            self.send_body(json.dumps({"html": html, "count": count, "end": is_end}), "application/json")
+        elif url.path.startswith("/maps/place/"):
+            self.send_body("<html><body>place</body></html>", "text/html")
+        else:
+            self.send_error(404)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Local HTTP server of synthetic result feeds, configured through its FixtureConfig.
+    """
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: FixtureConfig | None = None):
+        super(FixtureServer, self).__init__((host, port), FixtureHandler)
+        self.config = config or FixtureConfig()
+        self.count_requests: int = 0
+        self.thread: Thread | None = None
+
+    @property
+    def url_base(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def url_gmaps_keyword(self) -> str:
+        """
+        Search URL template to set as the scraper's url_gmaps_keyword.
+        """
+        return self.url_base + "/maps/search/{keyword}/@{latitude},{longitude}"
+
+    def start(self) -> "FixtureServer":
+        self.thread = Thread(target=self.serve_forever, name="FixtureServer", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == "__main__":
+    server = FixtureServer(port=8765).start()
+    print(f"Fixture server on {server.url_base} with {asdict(server.config)}")
+    print(f"Example: {server.url_base}/maps/search/cafe/@41.01,28.97,12z")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
@@ -7,10 +7,11 @@ import json
 import os
 import sys
 import logging
-from logging.handlers import RotatingFileHandler
 import subprocess
 import yaml
 
+from Modules.module_logger import ModuleLogger
+
 
 def create_logger(
     name: str,
@@ -19,37 +20,20 @@ def create_logger(
     level_file: int = logging.DEBUG,
     mode: str = "a",
     maxBytes: int = 5 * 1024 * 1024,
-    backupCount: int = 2
+    backupCount: int = 2,
+    is_json: bool = False
 ) -> logging.Logger:
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-
-    stdout_formatter = logging.Formatter(
-        '%(levelname)s | %(name)s | %(message)s'
+    # Same queued, idempotent setup as the modules' loggers, so both share one writer thread
+    return ModuleLogger.create_logger(
+        name=name,
+        path=path,
+        level_stdout=level_stdout,
+        level_file=level_file,
+        mode=mode,
+        maxBytes=maxBytes,
+        backupCount=backupCount,
+        is_json=is_json
     )
-    file_formatter = logging.Formatter(
-        '%(asctime)s | %(levelname)s | %(name)s | %(message)s',
-        '%m-%d-%Y %H:%M:%S'
-    )
-
-    stdout_handler = logging.StreamHandler(sys.stdout)
-    stdout_handler.setLevel(level_stdout)
-    stdout_handler.setFormatter(stdout_formatter)
-    logger.addHandler(stdout_handler)
-
-    if path:
-        path_obj = Path(path)
-        if not path_obj.parent.exists():
-            path_obj.parent.mkdir(parents=True, exist_ok=True)
-
-        file_handler = RotatingFileHandler(
-            path_obj, mode=mode, maxBytes=maxBytes, backupCount=backupCount
-        )
-        file_handler.setLevel(level_file)
-        file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
-
-    return logger
 
 
 def readJsonFile(path):
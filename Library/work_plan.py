@@ -0,0 +1,186 @@
+import logging
+
+from Modules.module_scraper_gmaps import BLOCKING_PROFILES, build_maps_search_url
+from Modules.module_tile_planner import ModuleTilePlanner
+
+
+# Rough page load and first card time of one target, used for the runtime estimate
+PLAN_SECONDS_PAGE_LOAD = 3.0
+
+ENGINES = ("selenium", "cdp")
+SCROLL_MODES = ("adaptive", "fixed")
+EXTRACTION_MODES = ("js", "element")
+
+
+def locations_parse(config: dict) -> list[tuple[str, str]]:
+    """
+    Parses the "lat, lon" strings of the locations into (latitude, longitude) tuples.
+    """
+    locations = []
+    for location in config.get("locations") or []:
+        latitude, longitude = str(location).split(",")
+        locations.append((latitude.strip(), longitude.strip()))
+    return locations
+
+
+def config_validate(config: dict) -> list[str]:
+    """
+    Checks the configuration, returns a message for every problem found.
+    """
+    errors = []
+
+    def check(key: str, types: tuple, is_required: bool = True, minimum: float | None = None):
+        if key not in config:
+            if is_required:
+                errors.append(f"{key}: missing")
+            return
+        value = config[key]
+        # bool is an int, it is only accepted where bool is asked for
+        if not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+            errors.append(f"{key}: expected {' or '.join(t.__name__ for t in types)}, got {value!r}")
+        elif minimum is not None and value < minimum:
+            errors.append(f"{key}: must be at least {minimum}, got {value!r}")
+
+    def check_choice(key: str, choices, default: str):
+        value = config.get(key, default)
+        if value not in choices:
+            errors.append(f"{key}: expected one of {', '.join(choices)}, got {value!r}")
+
+    check("headless", (bool,))
+    check("output", (str,))
+    check("max_scrolls", (int,), minimum=0)
+    check("max_results", (int,), is_required=False, minimum=0)
+    check("zoom", (int,))
+    check("delay_target_iteration", (int, float), minimum=0)
+    check("delay_scroll", (int, float), minimum=0)
+    check("workers", (int,), is_required=False, minimum=1)
+    check("tabs", (int,), is_required=False, minimum=1)
+    check("timeout_url_load", (int, float), is_required=False, minimum=0)
+    check("cache_ttl", (int, float), is_required=False, minimum=0)
+    check("rate_initial", (int, float), is_required=False, minimum=0)
+    check("rate_min", (int, float), is_required=False, minimum=0)
+    check("rate_max", (int, float), is_required=False, minimum=0)
+    check("max_block_retries", (int,), is_required=False, minimum=0)
+    check("max_target_retries", (int,), is_required=False, minimum=0)
+    check("enrich", (bool,), is_required=False)
+    check("enrich_workers", (int,), is_required=False, minimum=1)
+    check("enrich_queue_size", (int,), is_required=False, minimum=1)
+    check_choice("engine", ENGINES, "selenium")
+    check_choice("block_profile", BLOCKING_PROFILES, "default")
+    check_choice("scroll_mode", SCROLL_MODES, "adaptive")
+    check_choice("extraction_mode", EXTRACTION_MODES, "js")
+    for key in ("log_level", "log_level_file"):
+        if not isinstance(logging.getLevelName(str(config.get(key, "DEBUG")).upper()), int):
+            errors.append(f"{key}: unknown level {config[key]!r}")
+
+    keywords = config.get("keywords")
+    if not keywords or not isinstance(keywords, list) or not all(isinstance(keyword, str) and keyword for keyword in keywords):
+        errors.append(f"keywords: expected a non-empty list of strings, got {keywords!r}")
+    weights = config.get("keyword_weights") or {}
+    if not isinstance(weights, dict) or not all(isinstance(weight, (int, float)) and weight > 0 for weight in weights.values()):
+        errors.append(f"keyword_weights: expected positive numbers by keyword, got {weights!r}")
+
+    for location in config.get("locations") or []:
+        try:
+            latitude, longitude = map(float, str(location).split(","))
+        except ValueError:
+            errors.append(f"locations: expected \"lat, lon\", got {location!r}")
+            continue
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            errors.append(f"locations: out of range {location!r}")
+
+    if config.get("tiling"):
+        try:
+            ModuleTilePlanner(**config["tiling"])
+        except (TypeError, ValueError) as error:
+            errors.append(f"tiling: {error}")
+    elif not config.get("locations"):
+        errors.append("locations: no locations and no tiling, there is nothing to scrape")
+
+    for sink_config in config.get("sinks") or []:
+        if not isinstance(sink_config, dict) or not sink_config.get("path"):
+            errors.append(f"sinks: every sink needs a path, got {sink_config!r}")
+    return errors
+
+
+def targets_expand(config: dict) -> list[tuple[str, str, str, int]]:
+    """
+    Expands the keywords over the locations and the initial tiles into (keyword, latitude, longitude, zoom) targets.
+    Tiles split while scraping are not known in advance.
+    """
+    targets = []
+    locations = locations_parse(config)
+    for keyword in config["keywords"]:
+        for latitude, longitude in locations:
+            targets.append((keyword, latitude, longitude, 0))
+        if config.get("tiling"):
+            for tile in ModuleTilePlanner(**config["tiling"]).plan():
+                latitude, longitude = tile.center
+                targets.append((keyword, latitude, longitude, tile.zoom))
+    # Repeated targets are stored once
+    return list(dict.fromkeys(targets))
+
+
+def plan_build(config: dict, targets_stored: list | None = None, targets_done: set | None = None, result_cache=None, max_age: float | None = None) -> dict:
+    """
+    Builds the work plan of a run: the targets to scrape per keyword, the ones skipped as done in the
+    job store or fresh in the cache, and an estimate of the runtime.
+    """
+    targets = targets_expand(config)
+    # Targets of an interrupted run, e.g. split tiles, are continued as well
+    if targets_stored:
+        targets = list(dict.fromkeys(targets + [tuple(target) for target in targets_stored]))
+    targets_done = targets_done or set()
+
+    keywords: dict[str, dict[str, int]] = {}
+    count_done = count_cached = 0
+    for keyword, latitude, longitude, zoom in targets:
+        counts = keywords.setdefault(keyword, {"targets": 0, "done": 0, "cached": 0, "pages": 0})
+        counts["targets"] += 1
+        if (keyword, latitude, longitude) in targets_done:
+            counts["done"] += 1
+            count_done += 1
+            continue
+        url = build_maps_search_url(keyword, latitude, longitude, zoom=zoom or config["zoom"])
+        if result_cache is not None and result_cache.contains(url, max_age=max_age):
+            counts["cached"] += 1
+            count_cached += 1
+            continue
+        counts["pages"] += 1
+
+    count_pages = len(targets) - count_done - count_cached
+    concurrency = config.get("tabs", 8) if config.get("engine", "selenium") == "cdp" else config.get("workers", 1)
+    seconds_per_page = PLAN_SECONDS_PAGE_LOAD + config["max_scrolls"] * config["delay_scroll"] + config["delay_target_iteration"]
+    seconds = count_pages * seconds_per_page / concurrency
+    # The rate limiter caps the pages per second of all workers together
+    rate = config.get("rate_initial", 1.)
+    if rate > 0:
+        seconds = max(seconds, count_pages / rate)
+    return {
+        "keywords": keywords,
+        "targets": len(targets),
+        "done": count_done,
+        "cached": count_cached,
+        "pages": count_pages,
+        "concurrency": concurrency,
+        "seconds_per_page": seconds_per_page,
+        "seconds_estimated": seconds,
+    }
+
+
+def plan_format(plan: dict) -> list[str]:
+    """
+    Formats the work plan as lines of a table.
+    """
+    lines = [f"{'Keyword':<24} {'Targets':>8} {'Done':>8} {'Cached':>8} {'Pages':>8}"]
+    for keyword, counts in plan["keywords"].items():
+        lines.append(f"{keyword:<24} {counts['targets']:>8} {counts['done']:>8} {counts['cached']:>8} {counts['pages']:>8}")
+    lines.append(f"{'Total':<24} {plan['targets']:>8} {plan['done']:>8} {plan['cached']:>8} {plan['pages']:>8}")
+    minutes, seconds = divmod(int(plan["seconds_estimated"]), 60)
+    hours, minutes = divmod(minutes, 60)
+    lines.append(
+        f"Estimated runtime: {hours}h {minutes:02d}m {seconds:02d}s "
+        f"({plan['pages']} pages, {plan['concurrency']} in parallel, ~{plan['seconds_per_page']:.1f} seconds per page; "
+        f"split tiles come on top)"
+    )
+    return lines
@@ -0,0 +1,209 @@
+import logging
+import os
+from pathlib import Path
+from threading import Lock, Thread
+
+
+def process_tree_rss(pid: int) -> int:
+    """
+    Returns the resident memory in bytes of the process and all of its descendants, read from /proc.
+    Returns 0 where /proc is not available.
+    """
+    path_proc = Path("/proc")
+    if not path_proc.is_dir():
+        return 0
+
+    # Parent of every process, the 4th field of /proc/<pid>/stat (after the parenthesized name)
+    children: dict[int, list[int]] = {}
+    for entry in os.scandir(path_proc):
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = Path(entry.path, "stat").read_text()
+        except OSError:
+            continue
+        ppid = int(stat[stat.rindex(")") + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+
+    rss = 0
+    pids = [pid]
+    while pids:
+        pid_current = pids.pop()
+        pids.extend(children.get(pid_current, []))
+        try:
+            for line in Path(path_proc, str(pid_current), "status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    rss += int(line.split()[1]) * 1024
+                    break
+        except OSError:
+            continue
+    return rss
+
+
+def driver_pid(driver) -> int | None:
+    """
+    Returns the pid of the driver's chromedriver process, Chrome runs as its descendants.
+    """
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+class ModuleDriverManager():
+    """
+    This class is used to manage the lifecycle of the workers' web drivers.
+    Drivers start lazily on first use and in parallel, a warm spare is kept ready
+    so a replacement never waits for a cold start, and a driver is recycled after
+    max_pages pages, once its process tree grows over max_rss_mb or when its session dies.
+    """
+
+    def __init__(self, factory, logger: logging.Logger | None = None, count_spares: int = 1, max_pages: int = 0, max_rss_mb: float = 0):
+        self.factory = factory
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.count_spares = count_spares
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+
+        self.lock = Lock()
+        self.drivers: dict[int, object] = {}
+        self.pages: dict[int, int] = {}
+        self.spares: list = []
+        self.count_spares_starting: int = 0
+        self.count_recycled: int = 0
+        self.is_closed: bool = False
+
+    def acquire(self, worker_id: int):
+        """
+        This method is used to get the driver of a worker, a spare or a new one is used if it has none.
+        Raises a RuntimeError once the manager is closed, a driver started meanwhile is quit.
+        """
+        with self.lock:
+            if self.is_closed:
+                raise RuntimeError("Driver manager is closed")
+            driver = self.drivers.get(worker_id)
+            if driver is not None:
+                return driver
+            driver = self.spares.pop() if self.spares else None
+
+        if driver is None:
+            self.logger.info(f"Starting driver for worker {worker_id}...")
+            driver = self.factory()
+        else:
+            self.logger.info(f"Worker {worker_id} took a warm spare driver")
+
+        with self.lock:
+            is_closed = self.is_closed
+            if not is_closed:
+                self.drivers[worker_id] = driver
+                self.pages[worker_id] = 0
+        if is_closed:
+            # Closed while the driver started, nobody else would quit it
+            self.__quit(driver)
+            raise RuntimeError("Driver manager is closed")
+        self.spares_fill()
+        return driver
+
+    def spares_fill(self):
+        """
+        This method is used to start spare drivers in the background until count_spares are ready or starting.
+        """
+        with self.lock:
+            if self.is_closed:
+                return
+            count_missing = self.count_spares - len(self.spares) - self.count_spares_starting
+            self.count_spares_starting += max(0, count_missing)
+        for _ in range(count_missing):
+            Thread(target=self.__spare_start, name="DriverManager-Spare", daemon=True).start()
+
+    def __spare_start(self):
+        try:
+            driver = self.factory()
+        except Exception as error:
+            self.logger.error(f"Spare driver failed to start -> {error}")
+            driver = None
+
+        with self.lock:
+            self.count_spares_starting -= 1
+            if driver is not None and not self.is_closed:
+                self.spares.append(driver)
+                driver = None
+        if driver is not None:
+            self.__quit(driver)
+
+    def page_done(self, worker_id: int):
+        """
+        This method is used to count a page of a worker and recycle its driver when it is worn out.
+        """
+        with self.lock:
+            driver = self.drivers.get(worker_id)
+            if driver is None:
+                return
+            self.pages[worker_id] += 1
+            count_pages = self.pages[worker_id]
+
+        if self.max_pages and count_pages >= self.max_pages:
+            self.recycle(worker_id, f"{count_pages} pages")
+            return
+
+        if self.max_rss_mb:
+            pid = driver_pid(driver)
+            rss_mb = process_tree_rss(pid) / (1024 * 1024) if pid else 0
+            if rss_mb > self.max_rss_mb:
+                self.recycle(worker_id, f"{rss_mb:.0f} MB resident memory")
+
+    def check(self, worker_id: int) -> bool:
+        """
+        This method is used to check whether the session of a worker's driver is alive, a dead one is replaced.
+        """
+        with self.lock:
+            driver = self.drivers.get(worker_id)
+        if driver is None:
+            return False
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            self.recycle(worker_id, "dead session")
+            return False
+
+    def recycle(self, worker_id: int, reason: str = ""):
+        """
+        This method is used to retire a worker's driver, its next acquire takes a spare.
+        """
+        with self.lock:
+            driver = self.drivers.pop(worker_id, None)
+            self.pages.pop(worker_id, None)
+            if driver is not None:
+                self.count_recycled += 1
+        if driver is None:
+            return
+        self.logger.info(f"Recycling driver of worker {worker_id} ({reason})")
+        Thread(target=self.__quit, args=(driver,), name="DriverManager-Quit", daemon=True).start()
+        self.spares_fill()
+
+    def __quit(self, driver):
+        try:
+            driver.quit()
+        except Exception as error:
+            self.logger.warning(f"Driver quit failed -> {error}")
+
+    def drivers_get(self) -> list:
+        """
+        This method is used to get the drivers in use.
+        """
+        with self.lock:
+            return list(self.drivers.values())
+
+    def close(self):
+        """
+        This method is used to quit every driver and spare.
+        """
+        with self.lock:
+            self.is_closed = True
+            drivers = list(self.drivers.values()) + self.spares
+            self.drivers = {}
+            self.pages = {}
+            self.spares = []
+        for driver in drivers:
+            self.__quit(driver)
@@ -0,0 +1,274 @@
+from collections import deque
+import logging
+from threading import Condition, Event, Lock, Thread
+import time
+
+from Modules.module_driver_manager import ModuleDriverManager
+from Modules.module_place_index import place_key
+from Modules.module_scraper_gmaps import PAGE_EMPTY, SCRIPT_PAGE_BLOCK
+from Modules.module_tracer import TRACER
+
+
+# CSS selectors of the place detail panel
+SELECTORS_DETAILS = {
+    "name": "h1.DUwDvf",
+    "category": "button.DkEaL",
+    "rating": "div.F7nice > span > span[aria-hidden='true']",
+    "reviews": "div.F7nice span[aria-label]",
+    "address": "button[data-item-id='address'] .Io6YTe",
+    "phone": "button[data-item-id^='phone:tel:']",
+    "website": "a[data-item-id='authority']",
+    "hours_rows": "table.eK4R0e tr",
+    "hours_day": "td.ylH6lf",
+    "hours_time": "td.mxowUb",
+}
+
+# Reads the detail panel of a place in one round trip, null until the panel is rendered.
+# Arguments: selectors
+SCRIPT_EXTRACT_DETAILS = """
+const selectors = arguments[0];
+const one = (selector) => document.querySelector(selector);
+const text = (element) => element ? element.innerText.trim() : null;
+if (!one(selectors.name)) {
+    return null;
+}
+const rating = text(one(selectors.rating));
+const reviews = one(selectors.reviews);
+const phone = one(selectors.phone);
+const website = one(selectors.website);
+const hours = {};
+document.querySelectorAll(selectors.hours_rows).forEach((row) => {
+    const day = text(row.querySelector(selectors.hours_day));
+    const time = row.querySelector(selectors.hours_time);
+    if (day && time) {
+        hours[day] = (time.getAttribute("aria-label") || time.innerText).trim();
+    }
+});
+return {
+    category: text(one(selectors.category)),
+    rating: rating ? parseFloat(rating.replace(",", ".")) || null : null,
+    reviews: reviews ? parseInt((reviews.getAttribute("aria-label") || reviews.innerText).replace(/[^0-9]/g, "")) || null : null,
+    address: text(one(selectors.address)),
+    phone: phone ? phone.getAttribute("data-item-id").replace("phone:tel:", "") || text(phone) : null,
+    website: website ? website.href : null,
+    hours: Object.keys(hours).length ? hours : null
+};
+"""
+
+
+class EnrichmentJob():
+    """
+    Places of a listed target waiting for their detail pages.
+    """
+    __slots__ = ("keyword", "latitude", "longitude", "places", "count_remaining")
+
+    def __init__(self, keyword: str, latitude: str, longitude: str, places: list[dict]):
+        self.keyword = keyword
+        self.latitude = latitude
+        self.longitude = longitude
+        self.places = places
+        self.count_remaining = len(places)
+
+
+class ModuleEnricher():
+    """
+    This class is used to run the second pipeline stage: the detail page of every listed place is
+    opened on the enricher's own drivers and its rating, reviews, category, hours, phone and website
+    are merged into the place.
+    Listing workers hand their targets over through a bounded queue of places and go on with the next
+    target; a full queue blocks them, so memory stays bounded and both stages run side by side.
+    A target is finished through callback_done once all of its places are enriched.
+    """
+
+    def __init__(
+        self,
+        factory,
+        callback_done,
+        logger: logging.Logger | None = None,
+        workers: int = 1,
+        queue_size: int = 200,
+        rate_limiter=None,
+        stats=None,
+        driver_spares: int = 0,
+        driver_max_pages: int = 0,
+        driver_max_rss_mb: float = 0
+    ):
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.callback_done = callback_done
+        self.workers: int = max(1, int(workers))
+        self.queue_size: int = max(1, int(queue_size))
+        # Detail pages count against the same request rate as the listings
+        self.rate_limiter = rate_limiter
+        self.stats = stats
+        self.driver_manager = ModuleDriverManager(
+            factory=factory,
+            logger=self.logger,
+            count_spares=driver_spares,
+            max_pages=driver_max_pages,
+            max_rss_mb=driver_max_rss_mb
+        )
+
+        self.selectors: dict = dict(SELECTORS_DETAILS)
+        self.timeout_page_load: float = 10.0
+        self.poll_page_load: float = 0.1
+
+        # Places waiting for a worker as (job, index), guarded by the condition
+        self.queue: deque = deque()
+        self.queue_changed = Condition(Lock())
+        self.event_stop = Event()
+        self.threads: list[Thread] = []
+
+        # Details of places enriched before, a place listed under several targets is opened once
+        self.details: dict[str, dict] = {}
+        self.max_details: int = 100_000
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def start(self):
+        self.event_stop.clear()
+        self.threads = [
+            Thread(target=self.task_worker, args=(worker_id,), name=f"Enricher-Worker-{worker_id}", daemon=True)
+            for worker_id in range(self.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, keyword: str, latitude: str, longitude: str, places: list[dict]) -> bool:
+        """
+        This method is used to queue the places of a listed target, blocking while the queue is full.
+        Returns False if the enricher is stopped first, the target is then not finished.
+        """
+        job = EnrichmentJob(keyword, latitude, longitude, places)
+        indexes = []
+        for index, place in enumerate(places):
+            details = self.details.get(place_key(place)) if place.get("url") else {}
+            if details is None:
+                indexes.append(index)
+            else:
+                self.merge(place, details)
+        job.count_remaining = len(indexes)
+        if not indexes:
+            self.job_done(job)
+            return True
+
+        for index in indexes:
+            with self.queue_changed:
+                with TRACER.span("enrich_queue_wait"):
+                    self.queue_changed.wait_for(lambda: len(self.queue) < self.queue_size or self.event_stop.is_set())
+                if self.event_stop.is_set():
+                    return False
+                self.queue.append((job, index))
+                self.queue_changed.notify_all()
+        return True
+
+    @staticmethod
+    def merge(place: dict, details: dict):
+        """
+        This method is used to add the details to a place, fields the detail page lacks keep their listing values.
+        """
+        for key, value in details.items():
+            if value is not None:
+                place[key] = value
+
+    def enrich(self, driver, url: str) -> dict | None:
+        """
+        This method is used to open a detail page and read its fields.
+        Returns None if the panel is not rendered within timeout_page_load.
+        """
+        with TRACER.span("enrich_navigate", url=url):
+            driver.get(url)
+        time_deadline = time.monotonic() + self.timeout_page_load
+        while True:
+            details = driver.execute_script(SCRIPT_EXTRACT_DETAILS, self.selectors)
+            if details:
+                return details
+            if time.monotonic() >= time_deadline or self.event_stop.wait(self.poll_page_load):
+                return None
+
+    def task_worker(self, worker_id: int):
+        """
+        This method is used to enrich queued places with the worker's own driver.
+        """
+        while True:
+            with self.queue_changed:
+                self.queue_changed.wait_for(lambda: self.queue or self.event_stop.is_set())
+                if self.event_stop.is_set():
+                    break
+                job, index = self.queue.popleft()
+                self.queue_changed.notify_all()
+
+            place = job.places[index]
+            details = None
+            if self.rate_limiter is None or self.rate_limiter.acquire(self.event_stop):
+                time_start = time.time()
+                try:
+                    driver = self.driver_manager.acquire(worker_id)
+                    with TRACER.span("enrich", url=place["url"]):
+                        details = self.enrich(driver, place["url"])
+                    self.driver_manager.page_done(worker_id)
+                    if details is None and not self.event_stop.is_set():
+                        self.page_failed(driver, place)
+                except Exception as error:
+                    # Drivers quit by stop fail the page in flight
+                    if self.event_stop.is_set():
+                        break
+                    self.logger.error(f"Enrichment failed for {place.get('name')} -> {error}")
+                    self.driver_manager.check(worker_id)
+                if details is not None:
+                    self.details_add(place, details)
+                    self.merge(place, details)
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.success()
+                    if self.stats is not None:
+                        self.stats.counter_add("places_enriched")
+                        self.stats.observe("time_enrich", time.time() - time_start)
+            if self.event_stop.is_set():
+                break
+
+            # The place keeps its listing fields when its detail page failed
+            with self.queue_changed:
+                job.count_remaining -= 1
+                is_done = job.count_remaining == 0
+            if is_done:
+                self.job_done(job)
+        self.logger.info(f"Enricher worker {worker_id} ended.")
+
+    def page_failed(self, driver, place: dict):
+        """
+        This method is used to slow the request rate down when a detail page was blocked.
+        """
+        try:
+            reason = driver.execute_script(SCRIPT_PAGE_BLOCK) or PAGE_EMPTY
+        except Exception:
+            reason = PAGE_EMPTY
+        self.logger.warning(f"No detail panel for {place.get('name')} ({reason})")
+        if self.stats is not None:
+            self.stats.counter_add("places_enrich_failed")
+        if self.rate_limiter is not None and reason != PAGE_EMPTY:
+            self.rate_limiter.backoff()
+
+    def details_add(self, place: dict, details: dict):
+        with self.queue_changed:
+            if len(self.details) >= self.max_details:
+                # The oldest details are dropped first
+                del self.details[next(iter(self.details))]
+            self.details[place_key(place)] = details
+
+    def job_done(self, job: EnrichmentJob):
+        try:
+            self.callback_done(job.keyword, job.latitude, job.longitude, job.places)
+        except Exception as error:
+            self.logger.error(f"Finishing {job.keyword} at {job.latitude}, {job.longitude} failed -> {error}")
+
+    def stop(self):
+        """
+        This method is used to stop the workers and quit their drivers, targets still queued are not finished.
+        """
+        self.event_stop.set()
+        with self.queue_changed:
+            self.queue_changed.notify_all()
+        self.driver_manager.close()
+        for thread in self.threads:
+            thread.join()
+        self.queue.clear()
@@ -0,0 +1,142 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+from threading import Thread
+from urllib.request import Request, urlopen
+
+from Modules.module_job_store import ModuleJobStore
+
+
+# Job store methods served to the workers
+QUEUE_METHODS = (
+    "target_add",
+    "target_set_state",
+    "target_done",
+    "targets_get",
+    "targets_lease",
+    "targets_remaining",
+    "targets_count",
+    "results_get",
+)
+
+
+class JobQueueHandler(BaseHTTPRequestHandler):
+    server: "ModuleJobQueueServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        method = self.path.strip("/")
+        if method not in QUEUE_METHODS:
+            self.send_error(404)
+            return
+
+        try:
+            parameters = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            result = getattr(self.server.job_store, method)(**parameters)
+            if method == "results_get":
+                # Coordinates are tuple keys, sent as rows
+                result = [
+                    [keyword, latitude, longitude, places]
+                    for keyword, pack in result.items()
+                    for (latitude, longitude), places in pack.items()
+                ]
+            data = json.dumps({"result": result}, ensure_ascii=False).encode("utf-8")
+        except Exception as error:
+            self.server.logger.error(f"Job queue call {method} failed -> {error}")
+            data = json.dumps({"error": str(error)}).encode("utf-8")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class ModuleJobQueueServer(ThreadingHTTPServer):
+    """
+    This class is used to serve a job store to scrapers on other hosts.
+    Workers lease targets from it and send their results back, so the results are merged in one store.
+    """
+    daemon_threads = True
+
+    def __init__(self, job_store: ModuleJobStore, host: str = "0.0.0.0", port: int = 8700, logger: logging.Logger | None = None):
+        super(ModuleJobQueueServer, self).__init__((host, port), JobQueueHandler)
+        self.job_store = job_store
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.thread: Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "ModuleJobQueueServer":
+        self.thread = Thread(target=self.serve_forever, name="JobQueueServer", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Job queue served on {self.url}")
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class ModuleJobQueueClient():
+    """
+    This class is used to reach a job store served by ModuleJobQueueServer, it stands in for ModuleJobStore.
+    """
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.path = self.url
+        self.timeout = timeout
+
+    def call(self, method: str, **parameters):
+        """
+        This method is used to call a job store method on the server.
+        Raises OSError when the server can not be reached and RuntimeError when the call failed on the server.
+        """
+        request = Request(
+            f"{self.url}/{method}",
+            data=json.dumps(parameters, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urlopen(request, timeout=self.timeout) as response:
+            data = json.loads(response.read())
+        if "error" in data:
+            raise RuntimeError(f"Job queue call {method} failed -> {data['error']}")
+        return data["result"]
+
+    def target_add(self, keyword: str, latitude: str, longitude: str, zoom: int = 0):
+        self.call("target_add", keyword=keyword, latitude=latitude, longitude=longitude, zoom=zoom)
+
+    def target_set_state(self, keyword: str, latitude: str, longitude: str, state: str, error: str = ""):
+        self.call("target_set_state", keyword=keyword, latitude=latitude, longitude=longitude, state=state, error=error)
+
+    def target_done(self, keyword: str, latitude: str, longitude: str, places: list[dict]):
+        self.call("target_done", keyword=keyword, latitude=latitude, longitude=longitude, places=places)
+
+    def targets_get(self, states: tuple | None = None) -> list[tuple[str, str, str, int]]:
+        parameters = {} if states is None else {"states": list(states)}
+        return [tuple(row) for row in self.call("targets_get", **parameters)]
+
+    def targets_lease(self, owner: str, count: int = 1, duration: float = 600.0) -> list[tuple[str, str, str, int]]:
+        return [tuple(row) for row in self.call("targets_lease", owner=owner, count=count, duration=duration)]
+
+    def targets_remaining(self) -> int:
+        return self.call("targets_remaining")
+
+    def targets_count(self) -> dict[str, int]:
+        return self.call("targets_count")
+
+    def results_get(self) -> dict:
+        results: dict = {}
+        for keyword, latitude, longitude, places in self.call("results_get"):
+            results.setdefault(keyword, {})[(latitude, longitude)] = places
+        return results
+
+    def close(self):
+        pass
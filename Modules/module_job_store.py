@@ -0,0 +1,212 @@
+import json
+from pathlib import Path
+import sqlite3
+from threading import Lock
+import time
+
+
+STATE_PENDING = "pending"
+STATE_IN_PROGRESS = "in-progress"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+
+STATES = (STATE_PENDING, STATE_IN_PROGRESS, STATE_DONE, STATE_FAILED)
+
+
+class ModuleJobStore():
+    """
+    This class is used to persist the state of every keyword x location target and its results.
+    It is backed by SQLite so an interrupted run can be resumed without re-fetching completed targets.
+    Several processes can share one store through time-limited leases, see targets_lease.
+    """
+
+    def __init__(self, path: str | Path, is_read_only: bool = False):
+        self.path = Path(path)
+        # A target started this many times is not leased again and counts as finished, 0 for no limit
+        self.max_attempts: int = 0
+
+        self.lock = Lock()
+        if is_read_only:
+            # An existing store is only read, e.g. by --plan, nothing is created or converted
+            self.connection = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, timeout=30, check_same_thread=False)
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Other processes sharing the store may hold the write lock for a while
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS targets (
+                keyword TEXT NOT NULL,
+                latitude TEXT NOT NULL,
+                longitude TEXT NOT NULL,
+                state TEXT NOT NULL,
+                zoom INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT NOT NULL DEFAULT '',
+                lease_owner TEXT NOT NULL DEFAULT '',
+                lease_expires REAL NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (keyword, latitude, longitude)
+            );
+            CREATE INDEX IF NOT EXISTS targets_state ON targets (state);
+            CREATE TABLE IF NOT EXISTS results (
+                keyword TEXT NOT NULL,
+                latitude TEXT NOT NULL,
+                longitude TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (keyword, latitude, longitude)
+            );
+            """
+        )
+        # Stores created before per-target zooms and leases
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(targets)")]
+        if "zoom" not in columns:
+            self.connection.execute("ALTER TABLE targets ADD COLUMN zoom INTEGER NOT NULL DEFAULT 0")
+        if "lease_owner" not in columns:
+            self.connection.execute("ALTER TABLE targets ADD COLUMN lease_owner TEXT NOT NULL DEFAULT ''")
+            self.connection.execute("ALTER TABLE targets ADD COLUMN lease_expires REAL NOT NULL DEFAULT 0")
+        self.connection.commit()
+
+    def execute(self, query: str, parameters=()) -> list:
+        """
+        This method is used to run a query and commit it.
+        """
+        with self.lock:
+            cursor = self.connection.execute(query, parameters)
+            rows = cursor.fetchall()
+            self.connection.commit()
+        return rows
+
+    def target_add(self, keyword: str, latitude: str, longitude: str, zoom: int = 0):
+        """
+        This method is used to add a pending target, known targets keep their state.
+        """
+        self.execute(
+            "INSERT OR IGNORE INTO targets (keyword, latitude, longitude, zoom, state, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (keyword, latitude, longitude, zoom, STATE_PENDING, time.time())
+        )
+
+    def target_set_state(self, keyword: str, latitude: str, longitude: str, state: str, error: str = ""):
+        """
+        This method is used to change the state of a target.
+        """
+        if state not in STATES:
+            raise ValueError(f"Unknown target state: {state}")
+        self.execute(
+            "UPDATE targets SET state = ?, error = ?, updated_at = ?, attempts = attempts + ? "
+            "WHERE keyword = ? AND latitude = ? AND longitude = ?",
+            (state, error, time.time(), int(state == STATE_IN_PROGRESS), keyword, latitude, longitude)
+        )
+
+    def target_done(self, keyword: str, latitude: str, longitude: str, places: list[dict]):
+        """
+        This method is used to store the results of a target and mark it done in one transaction.
+        """
+        with self.lock:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO results (keyword, latitude, longitude, data) VALUES (?, ?, ?, ?)",
+                    (keyword, latitude, longitude, json.dumps(places, ensure_ascii=False))
+                )
+                self.connection.execute(
+                    "UPDATE targets SET state = ?, error = '', updated_at = ? "
+                    "WHERE keyword = ? AND latitude = ? AND longitude = ?",
+                    (STATE_DONE, time.time(), keyword, latitude, longitude)
+                )
+
+    def targets_get(self, states: tuple = (STATE_PENDING, STATE_FAILED)) -> list[tuple[str, str, str, int]]:
+        """
+        This method is used to get the (keyword, latitude, longitude, zoom) targets in the given states.
+        """
+        return self.execute(
+            f"SELECT keyword, latitude, longitude, zoom FROM targets WHERE state IN ({', '.join('?' * len(states))}) "
+            "ORDER BY rowid",
+            tuple(states)
+        )
+
+    def targets_lease(self, owner: str, count: int = 1, duration: float = 600.0) -> list[tuple[str, str, str, int]]:
+        """
+        This method is used to lease up to count (keyword, latitude, longitude, zoom) targets to an owner for duration seconds.
+        Pending and failed targets are leased first, then in-progress targets whose lease has expired.
+        Targets out of max_attempts are not leased.
+        """
+        time_now = time.time()
+        with self.lock:
+            # The write lock is taken before reading so two processes never lease the same target
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.connection.execute(
+                    "SELECT rowid, keyword, latitude, longitude, zoom FROM targets "
+                    "WHERE (state IN (?, ?) OR (state = ? AND lease_expires < ?)) AND (? = 0 OR attempts < ?) "
+                    "ORDER BY state = ?, rowid LIMIT ?",
+                    (
+                        STATE_PENDING, STATE_FAILED, STATE_IN_PROGRESS, time_now,
+                        self.max_attempts, self.max_attempts, STATE_IN_PROGRESS, count
+                    )
+                ).fetchall()
+                self.connection.executemany(
+                    "UPDATE targets SET state = ?, lease_owner = ?, lease_expires = ?, updated_at = ? WHERE rowid = ?",
+                    [(STATE_IN_PROGRESS, owner, time_now + duration, time_now, row[0]) for row in rows]
+                )
+                self.connection.commit()
+            except BaseException:
+                self.connection.rollback()
+                raise
+        return [tuple(row[1:]) for row in rows]
+
+    def targets_remaining(self) -> int:
+        """
+        This method is used to count the targets which are not done yet, leased ones included.
+        Targets out of max_attempts are finished unless a live lease still works on them.
+        """
+        return self.execute(
+            "SELECT COUNT(*) FROM targets WHERE state != ? "
+            "AND (? = 0 OR attempts < ? OR (state = ? AND lease_expires >= ?))",
+            (STATE_DONE, self.max_attempts, self.max_attempts, STATE_IN_PROGRESS, time.time())
+        )[0][0]
+
+    def targets_reset_in_progress(self) -> int:
+        """
+        This method is used to return targets which were in progress when the process died to pending.
+        """
+        with self.lock:
+            cursor = self.connection.execute(
+                "UPDATE targets SET state = ?, updated_at = ? WHERE state = ?",
+                (STATE_PENDING, time.time(), STATE_IN_PROGRESS)
+            )
+            self.connection.commit()
+        return cursor.rowcount
+
+    def targets_count(self) -> dict[str, int]:
+        """
+        This method is used to count the targets per state.
+        """
+        counts = {state: 0 for state in STATES}
+        counts.update(dict(self.execute("SELECT state, COUNT(*) FROM targets GROUP BY state")))
+        return counts
+
+    def results_get(self) -> dict:
+        """
+        This method is used to get the stored results in the same structure as the scraper's buffer_results.
+        """
+        results: dict = {}
+        for keyword, latitude, longitude, data in self.execute(
+            "SELECT keyword, latitude, longitude, data FROM results ORDER BY rowid"
+        ):
+            results.setdefault(keyword, {})[(latitude, longitude)] = json.loads(data)
+        return results
+
+    def clear(self):
+        """
+        This method is used to forget every target and result.
+        """
+        with self.lock:
+            self.connection.executescript("DELETE FROM targets; DELETE FROM results;")
+            self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -1,8 +1,110 @@
+import atexit
+import copy
+from datetime import datetime
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from os import listdir
 from pathlib import Path
+from queue import SimpleQueue
 import sys
+from threading import RLock
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    This class is used to format records as JSON lines.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "name": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class LogQueueHandler(QueueHandler):
+    """
+    This class is used to queue records with their message and exception text already rendered.
+    Unlike QueueHandler the traceback is kept apart in exc_text instead of being merged into the message,
+    so the listener's formatters, JsonFormatter included, still see it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        # Tracebacks and arguments may not be picklable or thread-safe to render later
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class LogListener(QueueListener):
+    """
+    This class is used to write the records of every queued logger in one background thread.
+    Each logger name is routed to its own handlers, so a slow disk only delays the listener, never the logging thread.
+    Records of child loggers, e.g. "ModuleScraperGMaps.worker", go to the handlers of their nearest routed parent.
+    """
+
+    def __init__(self):
+        super(LogListener, self).__init__(SimpleQueue(), respect_handler_level=True)
+        self.lock = RLock()
+        self.routes: dict[str, tuple[logging.Handler, ...]] = {}
+
+    def route_add(self, name: str, handlers: list[logging.Handler]) -> QueueHandler:
+        """
+        This method is used to route the records of a logger to the handlers, returns the handler to attach to the logger.
+        """
+        with self.lock:
+            self.routes[name] = tuple(handlers)
+            if self._thread is None:
+                self.start()
+                atexit.register(self.stop)
+        return LogQueueHandler(self.queue)
+
+    def route_get(self, name: str) -> tuple[logging.Handler, ...]:
+        """
+        This method is used to get the handlers of a logger name or of its nearest routed parent.
+        """
+        while name:
+            handlers = self.routes.get(name)
+            if handlers is not None:
+                return handlers
+            name = name.rpartition(".")[0]
+        return ()
+
+    def handle(self, record: logging.LogRecord):
+        record = self.prepare(record)
+        for handler in self.route_get(record.name):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def stop(self):
+        """
+        This method is used to write the queued records and stop the thread.
+        """
+        with self.lock:
+            if self._thread is None:
+                return
+            super(LogListener, self).stop()
+            for handlers in self.routes.values():
+                for handler in handlers:
+                    handler.flush()
+
+
+# Process-wide listener shared by every logger made with create_logger
+LOG_LISTENER = LogListener()
 
 
 class ModuleLogger():
@@ -16,6 +118,7 @@ class ModuleLogger():
         mode="a",
         maxBytes=1 * 1024 * 1024,
         backupCount=5,
+        logger_is_json: bool = False,
         *args, **kwargs
     ):
         super(ModuleLogger, self).__init__(*args, **kwargs)
@@ -28,12 +131,13 @@ class ModuleLogger():
 
             self.logger = self.create_logger(
                 name=logger_name,
-                path=self.logger_file_path,
+                path=logger_file_path,
                 level_stdout=logger_level_stdo,
                 level_file=logger_level_file,
                 mode=mode,
                 maxBytes=maxBytes,
-                backupCount=backupCount
+                backupCount=backupCount,
+                is_json=logger_is_json
             )
         else:
             self.logger = logger
@@ -76,35 +180,48 @@ class ModuleLogger():
         level_file: int = logging.DEBUG,
         mode: str = "a",
         maxBytes: int = 5 * 1024 * 1024,
-        backupCount: int = 2
+        backupCount: int = 2,
+        is_json: bool = False
     ) -> logging.Logger:
-        logger = logging.getLogger(name)
-        logger.setLevel(logging.DEBUG)
-
-        stdout_formatter = logging.Formatter(
-            '%(levelname)s | %(name)s | %(message)s'
-        )
-        file_formatter = logging.Formatter(
-            '%(asctime)s | %(levelname)s | %(name)s | %(message)s',
-            '%m-%d-%Y %H:%M:%S'
-        )
-
-        stdout_handler = logging.StreamHandler(sys.stdout)
-        stdout_handler.setLevel(level_stdout)
-        stdout_handler.setFormatter(stdout_formatter)
-        logger.addHandler(stdout_handler)
-
-        if path:
-            path_obj = Path(path)
-            if not path_obj.parent.is_dir():
+        """
+        This method is used to create a logger whose records are written to stdout and the rotating file by LOG_LISTENER.
+        The logger only gets a queue handler, so logging never waits for the console or the disk.
+        Creating a logger with a name again returns the existing one instead of adding more handlers.
+        """
+        with LOG_LISTENER.lock:
+            logger = logging.getLogger(name)
+            if name in LOG_LISTENER.routes:
+                return logger
+
+            stdout_formatter = logging.Formatter(
+                '%(levelname)s | %(name)s | %(message)s'
+            )
+            if is_json:
+                file_formatter = JsonFormatter()
+            else:
+                file_formatter = logging.Formatter(
+                    '%(asctime)s | %(levelname)s | %(name)s | %(message)s',
+                    '%m-%d-%Y %H:%M:%S'
+                )
+
+            stdout_handler = logging.StreamHandler(sys.stdout)
+            stdout_handler.setLevel(level_stdout)
+            stdout_handler.setFormatter(stdout_formatter)
+            handlers: list[logging.Handler] = [stdout_handler]
+
+            if path:
+                path_obj = Path(path)
                 if not path_obj.parent.exists():
                     path_obj.parent.mkdir(parents=True, exist_ok=True)
 
                 file_handler = RotatingFileHandler(
-                    path_obj, mode=mode, maxBytes=maxBytes, backupCount=backupCount
+                    path_obj, mode=mode, maxBytes=maxBytes, backupCount=backupCount, encoding="utf-8"
                 )
                 file_handler.setLevel(level_file)
                 file_handler.setFormatter(file_formatter)
-                logger.addHandler(file_handler)
+                handlers.append(file_handler)
 
-        return logger
+            # Records below every handler's level are dropped by the logger before they are built or queued
+            logger.setLevel(min(handler.level for handler in handlers))
+            logger.addHandler(LOG_LISTENER.route_add(name, handlers))
+            return logger
@@ -0,0 +1,110 @@
+import hashlib
+import re
+from threading import Lock
+
+
+# Google Maps feature id in place URLs, e.g. "!1s0x14caa7040068086b:0xe1ccfe98bc01b0d0"
+PATTERN_FEATURE_ID = re.compile(r"(0x[0-9a-f]+:0x[0-9a-f]+)", re.IGNORECASE)
+PATTERN_CID = re.compile(r"[?&]cid=(\d+)")
+PATTERN_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_text(text: str | None) -> str:
+    """
+    Lower-cases the text and collapses punctuation and whitespace.
+    """
+    if not text:
+        return ""
+    return " ".join(PATTERN_PUNCTUATION.sub(" ", text.casefold()).split())
+
+
+def place_key(place: dict) -> str | None:
+    """
+    Returns the identity of a place.
+    The feature id or CID of the place URL is preferred, then the URL itself,
+    then a hash of the normalized name and address. None if the place has neither a URL nor a name or address.
+    """
+    url = place.get("url")
+    if url:
+        match = PATTERN_FEATURE_ID.search(url)
+        if match:
+            return f"fid:{match.group(1).lower()}"
+        match = PATTERN_CID.search(url)
+        if match:
+            return f"cid:{match.group(1)}"
+        return f"url:{url.split('?')[0]}"
+
+    name = normalize_text(place.get("name"))
+    address = normalize_text(place.get("address"))
+    if not name and not address:
+        return None
+    name_address = f"{name}|{address}"
+    return f"hash:{hashlib.blake2b(name_address.encode('utf-8'), digest_size=12).hexdigest()}"
+
+
+class ModulePlaceIndex():
+    """
+    This class is used to deduplicate places across targets.
+    Each place identity maps to the (keyword, latitude, longitude) targets it was seen under.
+    """
+
+    def __init__(self):
+        self.index: dict[str, set[tuple[str, str, str]]] = {}
+        self.lock = Lock()
+        self.count_duplicates: int = 0
+
+    def filter(self, keyword: str, latitude: str, longitude: str, places: list[dict]) -> list[dict]:
+        """
+        This method is used to record the places of a target and return only the unseen ones.
+        Kept places get their identity in the "id" field, places without an identity are always kept and not indexed.
+        """
+        target = (keyword, latitude, longitude)
+        places_new = []
+        with self.lock:
+            for place in places:
+                key = place_key(place)
+                if key is None:
+                    places_new.append(place)
+                    continue
+                sightings = self.index.get(key)
+                if sightings is None:
+                    self.index[key] = {target}
+                    place["id"] = key
+                    places_new.append(place)
+                else:
+                    sightings.add(target)
+                    self.count_duplicates += 1
+        return places_new
+
+    def load(self, results: dict):
+        """
+        This method is used to fill the index from results in the buffer_results structure.
+        """
+        with self.lock:
+            for keyword, pack in results.items():
+                for (latitude, longitude), places in pack.items():
+                    for place in places:
+                        key = place.get("id") or place_key(place)
+                        if key is None:
+                            continue
+                        self.index.setdefault(key, set()).add((keyword, latitude, longitude))
+
+    def sightings_get(self, key: str) -> list[tuple[str, str, str]]:
+        """
+        This method is used to get the targets a place was seen under.
+        """
+        with self.lock:
+            return sorted(self.index.get(key, ()))
+
+    def sightings_convert(self) -> dict[str, list[str]]:
+        """
+        This method is used to convert the sightings for saving in json, e.g. {id: ["keyword @ lat, lon"]}
+        """
+        with self.lock:
+            return {
+                key: [f"{keyword} @ {latitude}, {longitude}" for keyword, latitude, longitude in sorted(sightings)]
+                for key, sightings in self.index.items()
+            }
+
+    def __len__(self) -> int:
+        return len(self.index)
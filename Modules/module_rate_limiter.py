@@ -0,0 +1,86 @@
+from threading import Event, Lock
+import time
+
+
+class ModuleRateLimiter():
+    """
+    This class is used to pace page requests with a token bucket shared by every worker.
+    The rate grows additively with every healthy page and is cut multiplicatively (AIMD) when a
+    block is detected, so it settles just under the highest rate the site tolerates.
+    A rate of 0 disables the limiter.
+    """
+
+    def __init__(self, rate: float = 1., rate_min: float = 0.05, rate_max: float = 4., burst: float = 1., increase: float = 0.05, decrease: float = 0.5):
+        self.rate = rate
+        self.rate_min = rate_min
+        self.rate_max = rate_max
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+
+        self.lock = Lock()
+        self.tokens: float = burst
+        self.time_last: float = time.monotonic()
+        self.time_backoff: float = 0.
+        self.count_success: int = 0
+        self.count_backoff: int = 0
+
+    @property
+    def is_enabled(self) -> bool:
+        return self.rate > 0
+
+    def __refill(self, time_now: float):
+        self.tokens = min(self.burst, self.tokens + (time_now - self.time_last) * self.rate)
+        self.time_last = time_now
+
+    def acquire(self, event_stop: Event | None = None) -> bool:
+        """
+        This method is used to wait for a token, returns False if the stop event is set first.
+        """
+        while self.is_enabled:
+            with self.lock:
+                self.__refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                time_wait = (1 - self.tokens) / self.rate
+            if event_stop is None:
+                time.sleep(time_wait)
+            elif event_stop.wait(time_wait):
+                return False
+        return True
+
+    def success(self):
+        """
+        This method is used to report a healthy page, the rate is raised by increase.
+        """
+        if not self.is_enabled:
+            return
+        with self.lock:
+            self.count_success += 1
+            self.rate = min(self.rate_max, self.rate + self.increase)
+
+    def backoff(self):
+        """
+        This method is used to report a blocked page, the rate is multiplied by decrease and the bucket is drained.
+        Blocks reported by several workers within one request interval count once.
+        """
+        if not self.is_enabled:
+            return
+        with self.lock:
+            time_now = time.monotonic()
+            if time_now - self.time_backoff < 1. / self.rate:
+                return
+            self.time_backoff = time_now
+            self.count_backoff += 1
+            self.__refill(time_now)
+            self.rate = max(self.rate_min, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0.)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "rate": self.rate,
+                "successes": self.count_success,
+                "backoffs": self.count_backoff,
+            }
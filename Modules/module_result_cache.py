@@ -0,0 +1,125 @@
+import json
+from pathlib import Path
+import sqlite3
+from threading import Lock
+import time
+
+
+class ModuleResultCache():
+    """
+    This class is used to cache the extracted places of a search on disk.
+    Entries are keyed by the canonical search URL, expire after the TTL and the
+    least recently used entries are evicted once the cache grows over max_bytes.
+    """
+
+    def __init__(self, path: str | Path, ttl: float = 24 * 60 * 60, max_bytes: int = 512 * 1024 * 1024, is_read_only: bool = False):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self.count_hits: int = 0
+        self.count_misses: int = 0
+
+        self.lock = Lock()
+        if is_read_only:
+            # An existing cache is only checked with contains, e.g. by --plan, nothing is created or converted
+            self.connection = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            self.size = 0
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at);
+            """
+        )
+        self.connection.commit()
+        self.size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def get(self, key: str, max_age: float | None = None) -> list[dict] | None:
+        """
+        This method is used to get the cached places of a key, None if missing or older than max_age (default: TTL).
+        """
+        max_age = self.ttl if max_age is None else max_age
+        time_now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT data, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or time_now - row[1] > max_age:
+                self.count_misses += 1
+                return None
+            self.connection.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (time_now, key))
+            self.connection.commit()
+            self.count_hits += 1
+        return json.loads(row[0])
+
+    def contains(self, key: str, max_age: float | None = None) -> bool:
+        """
+        This method is used to check if a key has fresh places, without reading them or counting a hit.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and time.time() - row[0] <= max_age
+
+    def set(self, key: str, places: list[dict]):
+        """
+        This method is used to cache the places of a key and evict the oldest entries over the size limit.
+        """
+        data = json.dumps(places, ensure_ascii=False)
+        time_now = time.time()
+        with self.lock:
+            row = self.connection.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.size -= row[0]
+            self.connection.execute(
+                "INSERT OR REPLACE INTO cache (key, data, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), time_now, time_now)
+            )
+            self.size += len(data)
+            if self.size > self.max_bytes:
+                self.__evict()
+            self.connection.commit()
+
+    def __evict(self):
+        """
+        This method is used to drop expired entries, then the least recently used ones until the cache fits.
+        """
+        self.connection.execute("DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl,))
+        self.size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        rows = self.connection.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall()
+        keys = []
+        for key, size in rows:
+            if self.size <= self.max_bytes:
+                break
+            keys.append((key,))
+            self.size -= size
+        self.connection.executemany("DELETE FROM cache WHERE key = ?", keys)
+
+    def stats(self) -> dict:
+        """
+        This method is used to get the hit and miss counts of this run.
+        """
+        with self.lock:
+            return {
+                "hits": self.count_hits,
+                "misses": self.count_misses,
+                "size": self.size,
+            }
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
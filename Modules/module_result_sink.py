@@ -0,0 +1,216 @@
+from abc import ABC, abstractmethod
+import csv
+import gzip
+import io
+import json
+from pathlib import Path
+from threading import Lock
+
+
+# Columns written in front of every place
+COLUMNS_TARGET = ["keyword", "latitude", "longitude"]
+COLUMNS_PLACE = ["id", "name", "address", "phone", "website", "url"]
+
+COMPRESSIONS = ("", "gzip", "zstd")
+SUFFIXES_COMPRESSION = {".gz": "gzip", ".zst": "zstd"}
+SUFFIXES_FORMAT = {".jsonl": "jsonl", ".csv": "csv", ".parquet": "parquet"}
+
+
+def open_append(path: Path, compression: str = ""):
+    """
+    Opens a text stream that appends to the path with the given compression.
+    """
+    if compression == "gzip":
+        return gzip.open(path, "at", encoding="utf-8", newline="")
+    elif compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as error:
+            raise ImportError("zstd compression requires the 'zstandard' package") from error
+        return io.TextIOWrapper(
+            zstandard.open(path, "ab"),
+            encoding="utf-8",
+            newline=""
+        )
+    return open(path, "a", encoding="utf-8", newline="")
+
+
+class ModuleResultSink(ABC):
+    """
+    This class is the base of the append-only result sinks.
+    Every finished target is written and flushed at once so partial runs leave usable output.
+    """
+
+    def __init__(self, path: str | Path, compression: str = ""):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+        self.count_rows: int = 0
+        self.lock = Lock()
+
+    @staticmethod
+    def rows(keyword: str, latitude: str, longitude: str, places: list[dict]) -> list[dict]:
+        """
+        This method is used to flatten the places of a target into rows.
+        """
+        return [
+            {"keyword": keyword, "latitude": latitude, "longitude": longitude, **place}
+            for place in places
+        ]
+
+    def write(self, keyword: str, latitude: str, longitude: str, places: list[dict]):
+        """
+        This method is used to write the places of a finished target.
+        """
+        rows = self.rows(keyword, latitude, longitude, places)
+        with self.lock:
+            self.write_rows(rows)
+            self.count_rows += len(rows)
+
+    @abstractmethod
+    def write_rows(self, rows: list[dict]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self):
+        raise NotImplementedError
+
+
+class ModuleResultSinkJSONL(ModuleResultSink):
+    """
+    This class is used to append results as JSON lines.
+    """
+
+    def __init__(self, path: str | Path, compression: str = ""):
+        super(ModuleResultSinkJSONL, self).__init__(path=path, compression=compression)
+        self.file = open_append(self.path, compression)
+
+    def write_rows(self, rows: list[dict]):
+        for row in rows:
+            self.file.write(json.dumps(row, ensure_ascii=False))
+            self.file.write("\n")
+        self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class ModuleResultSinkCSV(ModuleResultSink):
+    """
+    This class is used to append results as CSV rows.
+    Fields which are not in the columns are ignored.
+    """
+
+    def __init__(self, path: str | Path, compression: str = "", columns: list[str] | None = None):
+        is_new = not Path(path).exists() or Path(path).stat().st_size == 0
+        super(ModuleResultSinkCSV, self).__init__(path=path, compression=compression)
+        self.columns = columns or COLUMNS_TARGET + COLUMNS_PLACE
+        self.file = open_append(self.path, compression)
+        self.writer = csv.DictWriter(self.file, fieldnames=self.columns, extrasaction="ignore")
+        if is_new:
+            self.writer.writeheader()
+            self.file.flush()
+
+    def write_rows(self, rows: list[dict]):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class ModuleResultSinkParquet(ModuleResultSink):
+    """
+    This class is used to write results as Parquet, one row group per target.
+    Parquet files are only readable once closed, so the output is split into
+    parts of at most max_rows_per_file rows; every finished part is usable on its own.
+    """
+
+    def __init__(self, path: str | Path, compression: str = "", columns: list[str] | None = None, max_rows_per_file: int = 100_000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as error:
+            raise ImportError("Parquet output requires the 'pyarrow' package") from error
+        super(ModuleResultSinkParquet, self).__init__(path=path, compression=compression)
+        self.pyarrow = pyarrow
+        self.parquet = pyarrow.parquet
+        self.columns = columns or COLUMNS_TARGET + COLUMNS_PLACE
+        self.schema = pyarrow.schema([(column, pyarrow.string()) for column in self.columns])
+        self.max_rows_per_file = max_rows_per_file
+        self.writer = None
+        self.count_parts: int = 0
+        self.count_rows_part: int = 0
+
+        # Never overwrite the parts of a previous run
+        while self.path_part().exists():
+            self.count_parts += 1
+
+    def path_part(self) -> Path:
+        """
+        This method is used to get the path of the current part, numbered in front of the format and compression suffixes.
+        e.g. "results.parquet.zst" -> "results-00000.parquet.zst"
+        """
+        name = self.path.name
+        suffixes = ""
+        for suffix in reversed(self.path.suffixes):
+            if suffix.lower() not in SUFFIXES_FORMAT and suffix.lower() not in SUFFIXES_COMPRESSION:
+                break
+            suffixes = suffix + suffixes
+        name = name[:len(name) - len(suffixes)]
+        return self.path.with_name(f"{name}-{self.count_parts:05d}{suffixes}")
+
+    def write_rows(self, rows: list[dict]):
+        if not rows:
+            return
+        if self.writer is None:
+            self.writer = self.parquet.ParquetWriter(
+                self.path_part(),
+                self.schema,
+                compression=self.compression or "none"
+            )
+        table = self.pyarrow.Table.from_pylist(
+            [{column: row.get(column) for column in self.columns} for row in rows],
+            schema=self.schema
+        )
+        self.writer.write_table(table)
+        self.count_rows_part += len(rows)
+        if self.count_rows_part >= self.max_rows_per_file:
+            self.close_part()
+
+    def close_part(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.count_parts += 1
+            self.count_rows_part = 0
+
+    def close(self):
+        with self.lock:
+            self.close_part()
+
+
+def create_result_sink(path: str | Path, format: str = "", compression: str = "", **kwargs) -> ModuleResultSink:
+    """
+    Creates a result sink, the format and compression are guessed from the suffixes when not given.
+    e.g. "results.jsonl.gz" -> JSONL with gzip compression
+    """
+    path = Path(path)
+    suffixes = [suffix.lower() for suffix in path.suffixes]
+    if not compression and suffixes and suffixes[-1] in SUFFIXES_COMPRESSION:
+        compression = SUFFIXES_COMPRESSION[suffixes.pop()]
+    if not format and suffixes and suffixes[-1] in SUFFIXES_FORMAT:
+        format = SUFFIXES_FORMAT[suffixes[-1]]
+
+    if format == "jsonl":
+        return ModuleResultSinkJSONL(path, compression=compression)
+    elif format == "csv":
+        return ModuleResultSinkCSV(path, compression=compression, **kwargs)
+    elif format == "parquet":
+        return ModuleResultSinkParquet(path, compression=compression, **kwargs)
+    raise ValueError(f"Unsupported sink format for {path}: '{format}'")
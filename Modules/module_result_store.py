@@ -0,0 +1,221 @@
+import hashlib
+import json
+import math
+from pathlib import Path
+import sqlite3
+from threading import Lock
+import time
+
+from Modules.module_place_index import place_key
+
+
+# Kilometers per degree of latitude
+KM_PER_DEGREE = 111.32
+
+# Keywords with fewer sightings are queried through the list of their places
+KEYWORD_ROWS_LISTED = 10_000
+
+
+def distance_km(latitude_1: float, longitude_1: float, latitude_2: float, longitude_2: float) -> float:
+    """
+    Returns the great-circle distance between two points in kilometers.
+    """
+    phi_1, phi_2 = math.radians(latitude_1), math.radians(latitude_2)
+    delta_phi = phi_2 - phi_1
+    delta_lambda = math.radians(longitude_2 - longitude_1)
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi_1) * math.cos(phi_2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * 6371.0088 * math.asin(min(1., math.sqrt(a)))
+
+
+class ModuleResultStore():
+    """
+    This class is used to keep every scraped place once in an indexed SQLite database.
+    Places are upserted by identity (see place_key); every keyword and location a place was found
+    under is kept as a sighting together with the run that saw it, so results can be queried
+    without loading the JSON output.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.run_id: int | None = None
+
+        self.lock = Lock()
+        self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.create_function("distance_km", 4, distance_km, deterministic=True)
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                label TEXT NOT NULL DEFAULT '',
+                started_at REAL NOT NULL,
+                ended_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS places (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                address TEXT,
+                phone TEXT,
+                website TEXT,
+                url TEXT,
+                data TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sightings (
+                place_id TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                run_id INTEGER,
+                seen_at REAL NOT NULL,
+                PRIMARY KEY (place_id, keyword, latitude, longitude)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS sightings_keyword ON sightings (keyword, place_id);
+            CREATE INDEX IF NOT EXISTS sightings_location ON sightings (latitude, longitude);
+            CREATE INDEX IF NOT EXISTS places_phone ON places (phone) WHERE phone IS NOT NULL;
+            CREATE INDEX IF NOT EXISTS places_website ON places (website) WHERE website IS NOT NULL;
+            CREATE INDEX IF NOT EXISTS places_last_seen ON places (last_seen);
+            """
+        )
+        self.connection.commit()
+
+    def execute(self, query: str, parameters=()) -> list:
+        """
+        This method is used to run a query and commit it.
+        """
+        with self.lock:
+            cursor = self.connection.execute(query, parameters)
+            rows = cursor.fetchall()
+            self.connection.commit()
+        return rows
+
+    def run_start(self, label: str = "") -> int:
+        """
+        This method is used to record a new run, the places upserted from now on are attributed to it.
+        """
+        with self.lock:
+            cursor = self.connection.execute("INSERT INTO runs (label, started_at) VALUES (?, ?)", (label, time.time()))
+            self.connection.commit()
+        self.run_id = cursor.lastrowid
+        return self.run_id
+
+    def run_end(self):
+        if self.run_id is not None:
+            self.execute("UPDATE runs SET ended_at = ? WHERE id = ?", (time.time(), self.run_id))
+
+    def places_upsert(self, keyword: str, latitude: str, longitude: str, places: list[dict]):
+        """
+        This method is used to insert or update the places of a target and record where they were seen in one transaction.
+        Known places keep the fields the new record lacks or has as null, in the columns and in data alike.
+        """
+        time_now = time.time()
+        rows_place = []
+        rows_sighting = []
+        for place in places:
+            data = json.dumps(place, ensure_ascii=False)
+            identity = place.get("id") or place_key(place)
+            if identity is None:
+                # A place without a URL, name or address is only merged with an identical record
+                identity = f"data:{hashlib.blake2b(data.encode('utf-8'), digest_size=12).hexdigest()}"
+            rows_place.append((
+                identity, place.get("name"), place.get("address"), place.get("phone"), place.get("website"), place.get("url"),
+                data, time_now, time_now,
+                # Only the known fields are patched into data, a null would delete the key
+                json.dumps({key: value for key, value in place.items() if value is not None}, ensure_ascii=False)
+            ))
+            rows_sighting.append((identity, keyword, float(latitude), float(longitude), self.run_id, time_now))
+
+        with self.lock:
+            with self.connection:
+                self.connection.executemany(
+                    "INSERT INTO places (id, name, address, phone, website, url, data, first_seen, last_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET "
+                    "name = COALESCE(excluded.name, name), address = COALESCE(excluded.address, address), "
+                    "phone = COALESCE(excluded.phone, phone), website = COALESCE(excluded.website, website), "
+                    "url = COALESCE(excluded.url, url), data = json_patch(data, ?), last_seen = excluded.last_seen",
+                    rows_place
+                )
+                self.connection.executemany(
+                    "INSERT INTO sightings (place_id, keyword, latitude, longitude, run_id, seen_at) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT DO UPDATE SET run_id = excluded.run_id, seen_at = excluded.seen_at",
+                    rows_sighting
+                )
+
+    def places_query(
+        self,
+        keyword: str = "",
+        near: tuple[float, float] | None = None,
+        radius_km: float = 5.,
+        phone: str = "",
+        website: str = "",
+        has_website: bool | None = None,
+        limit: int = 100
+    ) -> list[dict]:
+        """
+        This method is used to find places by keyword, by the search location they were found around,
+        by phone or website, or by whether they have a website. Every filter given must match.
+        """
+        conditions = []
+        parameters: list = []
+        if keyword:
+            # The places of a common keyword are found soonest by probing the newest places one by one,
+            # those of a rare keyword by listing them from the keyword index
+            count_sightings = self.execute(
+                "SELECT COUNT(*) FROM (SELECT 1 FROM sightings WHERE keyword = ? LIMIT ?)", (keyword, KEYWORD_ROWS_LISTED)
+            )[0][0]
+            if count_sightings < KEYWORD_ROWS_LISTED:
+                conditions.append("id IN (SELECT place_id FROM sightings WHERE keyword = ?)")
+            else:
+                conditions.append("EXISTS (SELECT 1 FROM sightings WHERE place_id = places.id AND keyword = ?)")
+            parameters.append(keyword)
+        if near is not None:
+            latitude, longitude = near
+            # The bounding box is answered by the location index, the exact distance only checks its rows
+            span_latitude = radius_km / KM_PER_DEGREE
+            span_longitude = radius_km / (KM_PER_DEGREE * max(0.01, math.cos(math.radians(latitude))))
+            conditions.append(
+                "id IN (SELECT place_id FROM sightings WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ? "
+                "AND distance_km(latitude, longitude, ?, ?) <= ?)"
+            )
+            parameters += [
+                latitude - span_latitude, latitude + span_latitude,
+                longitude - span_longitude, longitude + span_longitude,
+                latitude, longitude, radius_km
+            ]
+        if phone:
+            conditions.append("phone = ?")
+            parameters.append(phone)
+        if website:
+            conditions.append("website = ?")
+            parameters.append(website)
+        if has_website is True:
+            conditions.append("website IS NOT NULL")
+        elif has_website is False:
+            conditions.append("website IS NULL")
+
+        query = "SELECT id, data, first_seen, last_seen FROM places"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY last_seen DESC LIMIT ?"
+        parameters.append(limit)
+        return [
+            {**json.loads(data), "id": identity, "first_seen": first_seen, "last_seen": last_seen}
+            for identity, data, first_seen, last_seen in self.execute(query, parameters)
+        ]
+
+    def keywords_count(self) -> dict[str, int]:
+        """
+        This method is used to count the distinct places found under every keyword.
+        """
+        return dict(self.execute("SELECT keyword, COUNT(DISTINCT place_id) FROM sightings GROUP BY keyword ORDER BY keyword"))
+
+    def places_count(self) -> int:
+        return self.execute("SELECT COUNT(*) FROM places")[0][0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
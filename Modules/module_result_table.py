@@ -0,0 +1,185 @@
+import sys
+from typing import Iterator
+
+
+# Fields every extracted place has, they are stored as columns of every target
+FIELDS_PLACE = ("name", "address", "phone", "website", "url")
+
+
+class Missing():
+    """
+    Marks a field a place does not have, e.g. the details of a place which was not enriched.
+    """
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING = Missing()
+
+
+class Place():
+    """
+    This class is used to hold one place in a compact record instead of a dict.
+    The extracted fields are slots, fields added later (id, details of the enricher) are kept in extra.
+    """
+    __slots__ = FIELDS_PLACE + ("extra",)
+
+    def __init__(
+        self,
+        name: str | None = None,
+        address: str | None = None,
+        phone: str | None = None,
+        website: str | None = None,
+        url: str | None = None,
+        extra: dict | None = None
+    ):
+        self.name = name
+        self.address = address
+        self.phone = phone
+        self.website = website
+        self.url = url
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, place: dict) -> "Place":
+        extra = {key: value for key, value in place.items() if key not in FIELDS_PLACE}
+        return cls(*(place.get(field) for field in FIELDS_PLACE), extra=extra or None)
+
+    def to_dict(self) -> dict:
+        place = {field: getattr(self, field) for field in FIELDS_PLACE}
+        if self.extra:
+            place.update(self.extra)
+        return place
+
+    def __repr__(self) -> str:
+        return f"Place({self.to_dict()!r})"
+
+
+class PlaceColumns():
+    """
+    This class is used to keep the places of one target column by column.
+    A row costs one pointer per column instead of a dict; a field first seen after some rows gets a
+    column padded with MISSING, so places keep exactly the keys they were added with.
+    """
+    __slots__ = ("columns", "count")
+
+    def __init__(self):
+        self.columns: dict[str, list] = {field: [] for field in FIELDS_PLACE}
+        self.count: int = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, place: dict):
+        self.extend([place])
+
+    def extend(self, places: list[dict]):
+        columns = self.columns
+        for place in places:
+            if not columns.keys() >= place.keys():
+                for field in place.keys() - columns.keys():
+                    columns[field] = [MISSING] * self.count
+        # Filled column by column, fields a place lacks are padded
+        for field, column in columns.items():
+            column.extend([place.get(field, MISSING) for place in places])
+        self.count += len(places)
+
+    def row(self, index: int) -> Place:
+        """
+        This method is used to get one place as a Place record.
+        """
+        return Place.from_dict(self.row_dict(index))
+
+    def row_dict(self, index: int) -> dict:
+        place = {}
+        for field, column in self.columns.items():
+            value = column[index]
+            if value is not MISSING:
+                place[field] = value
+        return place
+
+    def to_dicts(self) -> list[dict]:
+        """
+        This method is used to get the places as the dicts they were added as.
+        """
+        fields = list(self.columns)
+        return [
+            {field: value for field, value in zip(fields, values) if value is not MISSING}
+            for values in zip(*self.columns.values())
+        ]
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.to_dicts())
+
+
+class ModuleResultTable():
+    """
+    This class is used to hold the results of a run in memory column by column.
+    Keywords and (latitude, longitude) keys are interned, so the strings of a target are stored once
+    however often it is looked up or finished. results_get keeps the buffer_results shape through
+    to_dict, places come back as the dicts they were added as.
+    It is not thread-safe, the owner guards it with its own lock.
+    """
+
+    def __init__(self):
+        self.targets: dict[str, dict[tuple[str, str], PlaceColumns]] = {}
+
+    @staticmethod
+    def key(keyword: str, latitude: str, longitude: str) -> tuple[str, tuple[str, str]]:
+        """
+        This method is used to intern the keyword and location of a target.
+        """
+        return sys.intern(keyword), (sys.intern(latitude), sys.intern(longitude))
+
+    def __len__(self) -> int:
+        return sum(len(chunk) for pack in self.targets.values() for chunk in pack.values())
+
+    def __contains__(self, keyword: str) -> bool:
+        return keyword in self.targets
+
+    def extend(self, keyword: str, latitude: str, longitude: str, places: list[dict]):
+        """
+        This method is used to add the places of a target, places of a target added before are kept.
+        """
+        keyword, location = self.key(keyword, latitude, longitude)
+        pack = self.targets.setdefault(keyword, {})
+        chunk = pack.get(location)
+        if chunk is None:
+            chunk = pack[location] = PlaceColumns()
+        chunk.extend(places)
+
+    def append(self, keyword: str, latitude: str, longitude: str, place: dict):
+        self.extend(keyword, latitude, longitude, [place])
+
+    def evict(self, keyword: str, latitude: str, longitude: str):
+        """
+        This method is used to drop the places of a target.
+        """
+        pack = self.targets.get(keyword)
+        if pack is None:
+            return
+        pack.pop((latitude, longitude), None)
+        if not pack:
+            del self.targets[keyword]
+
+    def places(self, keyword: str, latitude: str, longitude: str) -> list[dict]:
+        pack = self.targets.get(keyword) or {}
+        chunk = pack.get((latitude, longitude))
+        return chunk.to_dicts() if chunk is not None else []
+
+    def items(self) -> Iterator[tuple[str, dict[tuple[str, str], PlaceColumns]]]:
+        return iter(self.targets.items())
+
+    def to_dict(self) -> dict:
+        """
+        This method is used to get the results as {keyword: {(latitude, longitude): [place, ...]}}.
+        """
+        return {
+            keyword: {location: chunk.to_dicts() for location, chunk in pack.items()}
+            for keyword, pack in self.targets.items()
+        }
+
+    def clear(self):
+        self.targets = {}
@@ -1,12 +1,171 @@
+from concurrent.futures import Future
+import json
 import time
-from threading import Lock
+from threading import Condition, Event, Lock, Thread
 
+from Modules.module_driver_manager import ModuleDriverManager
+from Modules.module_job_store import STATE_FAILED, STATE_IN_PROGRESS
+from Modules.module_rate_limiter import ModuleRateLimiter
+from Modules.module_result_table import ModuleResultTable
+from Modules.module_stats import BUCKETS_PLACES, ModuleStats
+from Modules.module_target_scheduler import ModuleTargetScheduler
 from Modules.module_thread import ModuleThread
+from Modules.module_tracer import TRACER
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from tqdm import tqdm
+# selenium and tqdm are imported where they are used, so planning and the other modules
+# importing from here start without them
+
+
+# Collects name, address, phone, website and place URL of every result card from the start index on in one round trip.
+# Arguments: results class, name class, address XPath, phone XPath, website XPath, place URL XPath, start index
+SCRIPT_EXTRACT_PLACES = """
+const [classResults, className, xpathAddress, xpathPhone, xpathWebsite, xpathUrl, start] = arguments;
+const first = (card, xpath) => document.evaluate(
+    xpath, card, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue;
+const text = (element) => element ? element.innerText : null;
+const href = (element) => element ? (element.href || element.getAttribute("href")) : null;
+return Array.from(document.getElementsByClassName(classResults)).slice(start || 0).map((card) => {
+    return {
+        name: text(card.getElementsByClassName(className)[0]),
+        address: text(first(card, xpathAddress)),
+        phone: text(first(card, xpathPhone)),
+        website: href(first(card, xpathWebsite)),
+        url: href(first(card, xpathUrl))
+    };
+});
+"""
+
+
+# Scrolls the feed container and reports its state in one round trip.
+# Arguments: feed XPath, results class, end of list XPath, scroll flag
+SCRIPT_SCROLL_FEED = """
+const [xpathFeed, classResults, xpathEnd, scroll] = arguments;
+const feed = document.evaluate(
+    xpathFeed, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue;
+if (!feed) {
+    return null;
+}
+if (scroll) {
+    feed.scrollTop = feed.scrollHeight;
+}
+return {
+    cards: feed.getElementsByClassName(classResults).length,
+    height: feed.scrollHeight,
+    end: document.evaluate(
+        xpathEnd, feed, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+    ).singleNodeValue !== null
+};
+"""
+
+# URL patterns blocked through Network.setBlockedURLs, the scraper only needs the result feed DOM
+BLOCK_URLS_TILES = [
+    "*://*.google.com/maps/vt*",
+    "*://*.googleapis.com/maps/vt*",
+    "*://khms*.google.com/*",
+    "*://streetviewpixels-pa.googleapis.com/*",
+]
+BLOCK_URLS_IMAGES = [
+    "*://*.googleusercontent.com/*",
+    "*://*.ggpht.com/*",
+    "*.png*",
+    "*.jpg*",
+    "*.jpeg*",
+    "*.gif*",
+    "*.webp*",
+    "*.svg*",
+]
+BLOCK_URLS_FONTS = [
+    "*://fonts.gstatic.com/*",
+    "*.woff*",
+    "*.ttf*",
+]
+BLOCK_URLS_ANALYTICS = [
+    "*://*.google-analytics.com/*",
+    "*://*.googletagmanager.com/*",
+    "*://*.doubleclick.net/*",
+    "*/gen_204*",
+    "*/log?*",
+]
+BLOCKING_PROFILES = {
+    "none": [],
+    "default": BLOCK_URLS_TILES + BLOCK_URLS_IMAGES,
+    "strict": BLOCK_URLS_TILES + BLOCK_URLS_IMAGES + BLOCK_URLS_FONTS + BLOCK_URLS_ANALYTICS,
+}
+
+# Search URL of a keyword around a location
+URL_GMAPS_KEYWORD = "https://www.google.com/maps/search/{keyword}/@{latitude},{longitude}"
+
+# Reasons reported by the adaptive scroll
+SCROLL_STOP_EXHAUSTED = "exhausted"
+SCROLL_STOP_CAP = "cap reached"
+SCROLL_STOP_STALLED = "stalled"
+SCROLL_STOP_NO_FEED = "no feed"
+SCROLL_STOP_STOPPED = "stopped"
+SCROLL_STOP_MAX_RESULTS = "max results"
+
+# Pages served instead of a result feed
+PAGE_CONSENT = "consent"
+PAGE_CAPTCHA = "captcha"
+PAGE_EMPTY = "empty feed"
+
+# Returns "consent" or "captcha" for the interstitials Google serves to suspicious clients, null otherwise
+SCRIPT_PAGE_BLOCK = """
+if (location.hostname.startsWith("consent.") || document.querySelector('form[action*="consent.google"]')) {
+    return "consent";
+}
+if (location.pathname.startsWith("/sorry/")
+        || document.querySelector('#captcha-form, iframe[src*="recaptcha"], div.g-recaptcha')) {
+    return "captcha";
+}
+const text = document.body ? document.body.innerText.slice(0, 5000) : "";
+if (/unusual traffic/i.test(text)) {
+    return "captcha";
+}
+return null;
+"""
+
+
+class BlockedError(Exception):
+    """
+    Raised when a consent wall, a CAPTCHA or an empty feed is served instead of results.
+    """
+
+    def __init__(self, reason: str):
+        super(BlockedError, self).__init__(f"Blocked page: {reason}")
+        self.reason = reason
+
+
+def build_maps_search_url(keyword: str, latitude: str, longitude: str, zoom: int = 10, url_template: str = URL_GMAPS_KEYWORD) -> str:
+    """
+    Builds the search URL of a target, zoom levels outside 1-21 are left out.
+    """
+    if zoom < 1 or zoom > 21:
+        return url_template.format(
+            keyword=keyword,
+            latitude=latitude,
+            longitude=longitude,
+        )
+    else:
+        url = url_template
+        url += ",{zoom}z"
+        return url.format(
+            keyword=keyword,
+            latitude=latitude,
+            longitude=longitude,
+            zoom=zoom
+        )
+
+
+def wait_stop(event_stop: Event | None, seconds: float) -> bool:
+    """
+    Sleeps for the given seconds, returns True at once if the stop event is set first.
+    """
+    if event_stop is None:
+        time.sleep(seconds)
+        return False
+    return event_stop.wait(seconds)
 
 
 class ModuleScraperGMaps(ModuleThread):
@@ -14,28 +173,63 @@ class ModuleScraperGMaps(ModuleThread):
     This class is used to scrape data from a website.
     """
 
-    def __init__(self, path_driver: str = "", headless: bool = True, *args, **kwargs):
+    def __init__(self, path_driver: str = "", headless: bool = True, workers: int = 1, block_profile: str = "default", block_urls: list[str] | None = None, *args, **kwargs):
         kwargs["name"] = "ModuleScraperGMaps"
         super(ModuleScraperGMaps, self).__init__(*args, **kwargs)
 
         # URLs for Google Maps
         # self.url_gmaps_location = "https://www.google.com/maps/search/{location}"
-        self.url_gmaps_keyword = "https://www.google.com/maps/search/{keyword}/@{longitude},{latitude}"
+        self.url_gmaps_keyword = URL_GMAPS_KEYWORD
 
         # Built-in variables
-        self.web_driver = self.init_driver(
-            path_driver=path_driver,
-            headless=headless
+        # Requests matching the blocking profile and the extra URL patterns are never loaded
+        if block_profile not in BLOCKING_PROFILES:
+            raise ValueError(f"Unknown blocking profile: {block_profile}")
+        self.block_profile = block_profile
+        self.block_urls: list[str] = BLOCKING_PROFILES[block_profile] + list(block_urls or [])
+
+        # Every worker owns its own driver, started lazily by the driver manager which keeps a warm spare
+        # and recycles drivers after max_pages pages or max_rss_mb resident memory
+        self.path_driver = path_driver
+        self.headless = headless
+        self.workers: int = max(1, int(workers))
+        self.driver_manager = ModuleDriverManager(
+            factory=self.init_driver_worker,
+            logger=self.logger,
+            count_spares=1,
+            max_pages=0,
+            max_rss_mb=0
         )
-        self.web_driver.implicitly_wait(10)  # Implicit wait for elements to load
 
         self.is_running: bool = True
+        # Set by stop, wakes every wait and ends the scroll and extract loops of the targets in flight
+        self.event_stop = Event()
         self.max_scrolls: int = 10
         self.zoom: int = 10
 
         self.delay_scroll: float = 2.0
         self.delay_target_iteration: float = 3.0
-        self.delay_url_load: float = 3.0
+
+        # Page requests of every worker are paced by one token bucket, the rate backs off when consent walls
+        # or CAPTCHAs are served and grows back with every healthy page
+        self.rate_limiter = ModuleRateLimiter()
+        # A blocked target is requeued this many times before it fails, an empty feed is retried
+        # max_empty_retries times before the target is accepted as one without results
+        self.max_block_retries: int = 3
+        self.max_empty_retries: int = 1
+
+        # Page readiness: wait for the feed and its first card up to this deadline per target
+        self.timeout_url_load: float = 10.0
+        self.poll_url_load: float = 0.05
+
+        # Scroll mode: "adaptive" stops when the feed stops growing, "fixed" always scrolls max_scrolls times
+        self.scroll_mode: str = "adaptive"
+        self.scroll_poll_interval: float = 0.1
+
+        # Extraction mode: "js" collects every card in one execute_script call, "element" uses per-card lookups
+        self.extraction_mode: str = "js"
+        # Scrolling stops once a target has this many places, 0 for no limit; target_add can override it per target
+        self.max_results: int = 0
 
         # XPATHs
         self.xpath_results = "Nv2PK"
@@ -43,20 +237,81 @@ class ModuleScraperGMaps(ModuleThread):
         self.xpath_address: str = './/div[contains(@class, "W4Efsd")]/div[contains(@class, "W4Efsd")]'
         self.xpath_phone = './/span[contains(@class, "UsdlK")]'
         self.xpath_website = './/a[contains(@aria-label, "Visit")]'
+        self.xpath_url: str = './/a[contains(@href, "/maps/place/")]'
+        self.xpath_feed: str = '//div[@role="feed"]'
+        self.xpath_end_of_list: str = './/span[contains(@class, "HlvSq")]'
+
+        # Per-target metrics, keyed by (keyword, latitude, longitude)
+        self.target_metrics: dict = {}
+        self.target_metrics_lock = Lock()
+        # Aggregated counters and histograms of the scraping stages, see get_stats
+        self.stats = ModuleStats()
 
         # Buffers
-        self.buffer_targets: dict = {}
+        # Targets are claimed by priority, keywords take turns by weight, see ModuleTargetScheduler
+        self.scheduler = ModuleTargetScheduler()
+        # Failed targets are retried after the targets of the same priority, a target failing
+        # more than max_target_retries times is given up and its Future gets the error
+        self.priority_retry_penalty: float = 1.
+        self.max_target_retries: int = 3
+        self.buffer_target_failures: dict = {}
+        self.buffer_target_zooms: dict = {}
+        self.buffer_target_max_results: dict = {}
         self.buffer_targets_lock = Lock()
-        self.buffer_results: dict = {}
+        # Notified whenever targets are added, released or removed
+        self.buffer_targets_changed = Condition(self.buffer_targets_lock)
+        # Future of every target in the buffer, resolved with its places
+        self.buffer_target_futures: dict = {}
+        # Blocked pages served per target, see target_blocked
+        self.buffer_target_blocks: dict = {}
+        # Places are kept column by column with interned target keys, see ModuleResultTable
+        self.buffer_results = ModuleResultTable()
+        # Places of the targets in progress, extracted while scrolling; they move to buffer_results once the target finishes
+        self.buffer_results_partial = ModuleResultTable()
         self.buffer_results_lock = Lock()
 
+        # Result sinks are fed as each target finishes
+        # In bounded memory mode the target's results are evicted from buffer_results once written
+        self.result_sinks: list = []
+        self.is_bounded_memory: bool = False
+
+        # Optional durable job store which records the state and results of every target
+        self.job_store = None
+        # With a lease owner set, the job store is a queue shared with other processes
+        # and workers lease targets from it once the buffer has no free targets
+        self.lease_owner: str = ""
+        self.lease_duration: float = 600.0
+
+        # Optional place identity index which drops places already seen under another target
+        self.place_index = None
+
+        # Optional indexed SQLite store which upserts every extracted place with its keyword, location and run
+        self.result_store = None
+
+        # Optional second stage which opens the detail page of every listed place, see ModuleEnricher
+        # Targets handed to it are finished by the enricher once their places are enriched
+        self.enricher = None
+
+        # Optional on-disk cache of extracted places, max_age overrides its TTL when set
+        self.result_cache = None
+        self.cache_max_age: float | None = None
+
+        # Called with (keyword, latitude, longitude, places) once a target is extracted, before it leaves the buffer
+        self.callbacks_target_done: list = []
+
+        # Queue depth is read when the stats are taken
+        self.stats.gauge_function_set("targets_queued", self.target_get_count_coordinates)
+        self.stats.gauge_function_set("targets_in_progress", lambda: len(self.scheduler.in_progress))
+        self.stats.gauge_function_set("request_rate", lambda: self.rate_limiter.rate)
+
     def set_xpaths(
         self,
         xpath_results: str = "",
         xpath_name: str = "",
         xpath_address: str = "",
         xpath_phone: str = "",
-        xpath_website: str = ""
+        xpath_website: str = "",
+        xpath_url: str = ""
     ):
         """
         This method is used to set the XPATHs.
@@ -71,71 +326,186 @@ class ModuleScraperGMaps(ModuleThread):
             self.xpath_phone = xpath_phone
         if xpath_website:
             self.xpath_website = xpath_website
+        if xpath_url:
+            self.xpath_url = xpath_url
 
-        self.logger.info(f"XPATHs set to: {self.xpath_results}, {self.xpath_name}, {self.xpath_address}, {self.xpath_phone}, {self.xpath_website}")
+        self.logger.info(f"XPATHs set to: {self.xpath_results}, {self.xpath_name}, {self.xpath_address}, {self.xpath_phone}, {self.xpath_website}, {self.xpath_url}")
 
-    def target_add(self, keyword: str, latitude: str, longitude: str):
+    def target_add(self, keyword: str, latitude: str, longitude: str, zoom: int = 0, priority: float = 0., max_results: int = 0) -> Future:
         """
-        This method is used to add a target to the buffer.
+        This method is used to add a target to the buffer, a target already in the buffer is kept once.
+        A zoom other than 0 overrides the search zoom for this target, lower priorities are scraped first,
+        a max_results other than 0 overrides the global max_results.
+        Returns a Future resolving to the target's extracted places.
         """
+        # Every buffer shares one copy of the target's strings
+        keyword, (latitude, longitude) = ModuleResultTable.key(keyword, latitude, longitude)
+        target = (keyword, latitude, longitude)
         self.buffer_targets_lock.acquire()
-        if keyword in self.buffer_targets:
-            self.buffer_targets[keyword].append((latitude, longitude))
-        else:
-            # If the keyword is not in the buffer, add it with the coordinates
-            self.buffer_targets[keyword] = [(latitude, longitude)]
+        if zoom:
+            self.buffer_target_zooms[target] = zoom
+        if max_results:
+            self.buffer_target_max_results[target] = max_results
+        self.scheduler.add(keyword, latitude, longitude, priority=priority)
+        future = self.buffer_target_futures.get(target)
+        if future is None:
+            future = self.buffer_target_futures[target] = Future()
+        self.buffer_targets_changed.notify_all()
+        self.buffer_targets_lock.release()
+        return future
+
+    def target_resolve(self, keyword: str, latitude: str, longitude: str, places: list[dict] | None = None, error: Exception | None = None):
+        """
+        This method is used to resolve the Future of a target with its places or an error.
+        """
+        self.buffer_targets_lock.acquire()
+        future = self.buffer_target_futures.pop((keyword, latitude, longitude), None)
         self.buffer_targets_lock.release()
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(places)
+
+    def target_wait(self, timeout: float | None = None) -> bool:
+        """
+        This method is used to wait until the buffer has a free target or the module is stopped.
+        """
+        with self.buffer_targets_changed:
+            return self.buffer_targets_changed.wait_for(
+                lambda: self.event_stop.is_set() or self.scheduler.count_free() > 0,
+                timeout
+            )
+
+    def target_wait_empty(self, timeout: float | None = None, poll_interval: float = 1.) -> bool:
+        """
+        This method is used to wait until every target of the buffer is finished, returns False on timeout.
+        The task is checked every poll_interval seconds, a RuntimeError is raised if it ended or its thread died with targets left.
+        """
+        time_deadline = None if timeout is None else time.time() + timeout
+        with self.buffer_targets_changed:
+            while len(self.scheduler):
+                if not self.is_Task_Alive():
+                    raise RuntimeError(f"Scraping task ended with {len(self.scheduler)} targets left")
+                time_wait = poll_interval if time_deadline is None else min(poll_interval, time_deadline - time.time())
+                if time_wait <= 0:
+                    return False
+                self.buffer_targets_changed.wait(time_wait)
+            return True
 
     def target_remove(self, keyword: str, latitude: str, longitude: str):
         """
-        This method is used to add a target to the buffer.
+        This method is used to remove a target from the buffer, its unresolved Future is cancelled.
         """
         self.buffer_targets_lock.acquire()
-        if keyword in self.buffer_targets:
-            if (latitude, longitude) in self.buffer_targets[keyword]:
-                self.buffer_targets[keyword].remove((latitude, longitude))
-                if not self.buffer_targets[keyword]:
-                    del self.buffer_targets[keyword]
+        self.scheduler.remove(keyword, latitude, longitude)
+        self.buffer_target_zooms.pop((keyword, latitude, longitude), None)
+        self.buffer_target_max_results.pop((keyword, latitude, longitude), None)
+        self.buffer_target_blocks.pop((keyword, latitude, longitude), None)
+        self.buffer_target_failures.pop((keyword, latitude, longitude), None)
+        future = self.buffer_target_futures.pop((keyword, latitude, longitude), None)
+        if future is not None:
+            future.cancel()
+        self.buffer_targets_changed.notify_all()
         self.buffer_targets_lock.release()
+        self.results_partial_evict(keyword, latitude, longitude)
+
+    def target_done_callback_add(self, callback):
+        """
+        This method is used to add a callback which is called with (keyword, latitude, longitude, places) of every extracted target.
+        Targets added from the callback are queued before the finished target leaves the buffer.
+        """
+        self.callbacks_target_done.append(callback)
 
     def target_clear(self):
         """
         This method is used to clear the buffer.
         """
         self.buffer_targets_lock.acquire()
-        self.buffer_targets = {}
+        self.scheduler.clear()
+        self.buffer_target_zooms = {}
+        self.buffer_target_max_results = {}
+        self.buffer_target_blocks = {}
+        self.buffer_target_failures = {}
+        futures = self.buffer_target_futures
+        self.buffer_target_futures = {}
+        self.buffer_targets_changed.notify_all()
         self.buffer_targets_lock.release()
+        for future in futures.values():
+            future.cancel()
 
-    def target_get(self):
+    def target_get(self) -> dict:
         """
-        This method is used to get the buffer.
+        This method is used to get a snapshot of the buffer as {keyword: [(latitude, longitude), ...]}.
         """
-        return self.buffer_targets
+        self.buffer_targets_lock.acquire()
+        targets = self.scheduler.snapshot()
+        self.buffer_targets_lock.release()
+        return targets
 
     def target_get_count(self):
         """
-        This method is used to get the count of the buffer.
+        This method is used to get the count of keywords with targets in the buffer.
         """
         self.buffer_targets_lock.acquire()
-        count = len(self.buffer_targets)
+        count = self.scheduler.count_keywords()
         self.buffer_targets_lock.release()
         return count
 
+    def target_get_count_coordinates(self) -> int:
+        """
+        This method is used to get the count of targets in the buffer, every keyword x location counted.
+        """
+        self.buffer_targets_lock.acquire()
+        count = len(self.scheduler)
+        self.buffer_targets_lock.release()
+        return count
+
+    def target_claim(self):
+        """
+        This method is used to claim the next free target for a worker.
+        """
+        target = self.__target_claim_buffer()
+        if target is None and self.lease_owner and self.job_store is not None:
+            try:
+                targets_leased = self.job_store.targets_lease(self.lease_owner, count=1, duration=self.lease_duration)
+            except (OSError, RuntimeError) as error:
+                # An unreachable queue is polled again after the worker's lease wait
+                self.logger.warning(f"Leasing from the job queue failed -> {error}")
+                self.stats.counter_add("lease_errors")
+                return None
+            for keyword, latitude, longitude, zoom in targets_leased:
+                self.target_add(keyword, latitude, longitude, zoom=zoom)
+            target = self.__target_claim_buffer()
+        return target
+
+    def __target_claim_buffer(self):
+        """
+        This method is used to claim the next free target of the buffer.
+        """
+        self.buffer_targets_lock.acquire()
+        target = self.scheduler.claim()
+        self.buffer_targets_lock.release()
+        return target
+
+    def target_release(self, keyword: str, latitude: str, longitude: str, penalty: float = 0.):
+        """
+        This method is used to give a claimed target back to the buffer, its priority raised by the penalty.
+        """
+        self.buffer_targets_lock.acquire()
+        self.scheduler.release(keyword, latitude, longitude, penalty=penalty)
+        self.buffer_targets_changed.notify_all()
+        self.buffer_targets_lock.release()
+        # The target is scraped from its first card again
+        self.results_partial_evict(keyword, latitude, longitude)
+
     def __result_add(self, keyword: str, latitude: str, longitude: str, data: dict):
         """
         This method is used to add a result to the buffer.
         """
         self.buffer_results_lock.acquire()
-        if keyword in self.buffer_results:
-            if (latitude, longitude) not in self.buffer_results[keyword]:
-                # If the coordinates are not in the buffer, add them with the data
-                self.buffer_results[keyword][(latitude, longitude)] = [data]
-            else:
-                self.buffer_results[keyword][(latitude, longitude)].append(data)
-        else:
-            # If the keyword is not in the buffer, add it with the coordinates
-            self.buffer_results[keyword] = {}
-            self.buffer_results[keyword][(latitude, longitude)] = [data]
+        self.buffer_results.append(keyword, latitude, longitude, data)
         self.buffer_results_lock.release()
 
     def __result_add_bulk(self, keyword: str, latitude: str, longitude: str, data: list[dict]):
@@ -143,19 +513,42 @@ class ModuleScraperGMaps(ModuleThread):
         This method is used to add a result to the buffer.
         """
         self.buffer_results_lock.acquire()
-        if keyword in self.buffer_results:
-            if (latitude, longitude) not in self.buffer_results[keyword]:
-                # If the coordinates are not in the buffer, add them with the data
-                self.buffer_results[keyword][(latitude, longitude)] = data
-            else:
-                # If the coordinates are already in the buffer, extend the list with new data
-                self.buffer_results[keyword][(latitude, longitude)].extend(data)
-        else:
-            # If the keyword is not in the buffer, add it with the coordinates
-            self.buffer_results[keyword] = {}
-            self.buffer_results[keyword][(latitude, longitude)] = data
+        self.buffer_results.extend(keyword, latitude, longitude, data)
         self.buffer_results_lock.release()
 
+    def __result_evict(self, keyword: str, latitude: str, longitude: str):
+        """
+        This method is used to remove the results of a target from the buffer.
+        """
+        self.buffer_results_lock.acquire()
+        self.buffer_results.evict(keyword, latitude, longitude)
+        self.buffer_results_lock.release()
+
+    def sink_add(self, sink):
+        """
+        This method is used to add a result sink which is fed as each target finishes.
+        """
+        self.result_sinks.append(sink)
+
+    def sinks_close(self):
+        """
+        This method is used to close the result sinks.
+        """
+        for sink in self.result_sinks:
+            sink.close()
+        self.result_sinks = []
+
+    def __sinks_write(self, keyword: str, latitude: str, longitude: str, places: list[dict]):
+        """
+        This method is used to write the results of a finished target to the sinks.
+        """
+        if not self.result_sinks:
+            return
+        for sink in self.result_sinks:
+            sink.write(keyword, latitude, longitude, places)
+        if self.is_bounded_memory:
+            self.__result_evict(keyword, latitude, longitude)
+
     def results_convert(self, results):
         """
         This method is used to convert the results.
@@ -174,19 +567,87 @@ class ModuleScraperGMaps(ModuleThread):
                     results_converted[keyword][key_location_str].extend(data)
         return results_converted
 
-    def results_get(self):
+    def metrics_set(self, keyword: str, latitude: str, longitude: str, **metrics):
+        """
+        This method is used to record metrics of a target.
+        """
+        self.target_metrics_lock.acquire()
+        self.target_metrics.setdefault((keyword, latitude, longitude), {}).update(metrics)
+        self.target_metrics_lock.release()
+
+    def get_stats(self) -> dict:
         """
-        This method is used to get the buffer.
+        This method is used to get the counters, queue depth gauges and stage time histograms of the run.
         """
-        return self.buffer_results
+        return self.stats.get()
+
+    def stats_stages(self, time_page_load: float, time_first_card: float | None, time_scroll: float, time_extract: float, reason_scroll: str):
+        """
+        This method is used to record the stage times of a scraped target.
+        """
+        self.stats.observe("page_load_seconds", time_page_load)
+        self.stats.observe("first_card_seconds", time_first_card)
+        self.stats.observe("scroll_seconds", time_scroll)
+        self.stats.observe("extract_seconds", time_extract)
+        self.stats.counter_add(f"scroll_stops_{reason_scroll.replace(' ', '_')}")
+        if time_first_card is None:
+            self.stats.counter_add("targets_not_ready")
+
+    def metrics_get(self) -> dict:
+        """
+        This method is used to get the per-target metrics.
+        """
+        self.target_metrics_lock.acquire()
+        metrics = {target: values.copy() for target, values in self.target_metrics.items()}
+        self.target_metrics_lock.release()
+        return metrics
+
+    def results_get(self) -> dict:
+        """
+        This method is used to get the buffer as {keyword: {(latitude, longitude): [place, ...]}}.
+        """
+        self.buffer_results_lock.acquire()
+        results = self.buffer_results.to_dict()
+        self.buffer_results_lock.release()
+        return results
 
     def results_clear(self):
         """
         This method is used to clear the buffer.
         """
         self.buffer_results_lock.acquire()
-        self.buffer_results = {}
+        self.buffer_results.clear()
+        self.buffer_results_partial.clear()
+        self.buffer_results_lock.release()
+
+    def results_partial_get(self) -> dict:
+        """
+        This method is used to get the places extracted so far of the targets in progress, in the results_get structure.
+        """
+        self.buffer_results_lock.acquire()
+        results = self.buffer_results_partial.to_dict()
         self.buffer_results_lock.release()
+        return results
+
+    def results_partial_evict(self, keyword: str, latitude: str, longitude: str):
+        self.buffer_results_lock.acquire()
+        self.buffer_results_partial.evict(keyword, latitude, longitude)
+        self.buffer_results_lock.release()
+
+    def target_extend(self, keyword: str, latitude: str, longitude: str, places: list[dict], places_new: list[dict], max_results: int = 0) -> bool:
+        """
+        This method is used to add newly extracted places to a target in progress, capped at max_results.
+        The new places are visible through results_partial_get at once. Returns True once the target has max_results places.
+        """
+        if max_results:
+            places_new = places_new[:max(0, max_results - len(places))]
+        places.extend(places_new)
+        if places_new:
+            self.buffer_results_lock.acquire()
+            self.buffer_results_partial.extend(keyword, latitude, longitude, places_new)
+            self.buffer_results_lock.release()
+            self.stats.counter_add("places_streamed", len(places_new))
+        return bool(max_results) and len(places) >= max_results
 
     # def build_maps_location_url(self, location: str = "İstanbul"):
     #     """
@@ -195,24 +656,48 @@ class ModuleScraperGMaps(ModuleThread):
     #     return self.url_gmaps_location.format(location=location)
 
     def build_maps_search_url(self, keyword: str = "business", latitude: str = "0.0", longitude: str = "0.0", zoom: int = 10):
-        if zoom < 1 or zoom > 21:
-            return self.url_gmaps_keyword.format(
-                keyword=keyword,
-                latitude=latitude,
-                longitude=longitude,
-            )
-        else:
-            url = self.url_gmaps_keyword
-            url += ",{zoom}z"
-            return url.format(
-                keyword=keyword,
-                latitude=latitude,
-                longitude=longitude,
-                zoom=zoom
-            )
+        return build_maps_search_url(keyword, latitude, longitude, zoom=zoom, url_template=self.url_gmaps_keyword)
+
+    @property
+    def web_driver(self):
+        """
+        Driver of the first worker, started on first use.
+        """
+        return self.driver_manager.acquire(0)
+
+    @property
+    def web_drivers(self) -> list:
+        return self.driver_manager.drivers_get()
+
+    def init_driver_worker(self):
+        """
+        This method is used to start a driver with the scraper's settings.
+        """
+        return self.init_driver(
+            path_driver=self.path_driver,
+            headless=self.headless,
+            block_urls=self.block_urls,
+            block_images=self.block_profile != "none"
+        )
+
+    def init_driver_enricher(self):
+        """
+        This method is used to start a driver for the enricher, whose traffic is not measured.
+        Without the performance log chromedriver does not buffer the network events of every detail page.
+        """
+        return self.init_driver(
+            path_driver=self.path_driver,
+            headless=self.headless,
+            block_urls=self.block_urls,
+            block_images=self.block_profile != "none",
+            is_performance_log=False
+        )
 
     @staticmethod
-    def init_driver(path_driver: str = "", headless: bool = True):
+    def init_driver(path_driver: str = "", headless: bool = True, block_urls: list[str] | None = None, block_images: bool = False, is_performance_log: bool = True):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
         options = Options()
         if headless:
             options.add_argument("--headless")
@@ -223,73 +708,282 @@ class ModuleScraperGMaps(ModuleThread):
         options.add_argument("--disable-gpu")
         options.add_argument("--no-sandbox")
         options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        if block_images:
+            options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        # Network events are read back from the performance log to measure the transferred bytes
+        if is_performance_log:
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
         # if path_driver:
         #     options.add_argument(f"user-data-dir={path_driver}")
 
         if path_driver:
             from selenium.webdriver.chrome.service import Service
             service = Service(path_driver)
-            return webdriver.Chrome(service=service)
+            driver = webdriver.Chrome(service=service, options=options)
         else:
-            return webdriver.Chrome(options=options)
+            driver = webdriver.Chrome(options=options)
+
+        if block_urls:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": block_urls})
+        return driver
 
     @staticmethod
-    def scroll_results(driver, pause_time: float = 2., max_scrolls: int = 10, scrollable_div_xpath: str = '//div[@role="feed"]'):
-        for _ in range(max_scrolls):
+    def traffic_read(driver) -> int | None:
+        """
+        This method is used to sum the bytes received since the last call from the driver's performance log.
+        Returns None if the log is not available.
+        """
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return None
+
+        count_bytes = 0
+        for entry in entries:
+            # Cheap check before decoding, most entries are other network events
+            if "Network.loadingFinished" not in entry["message"]:
+                continue
+            message = json.loads(entry["message"])["message"]
+            if message["method"] == "Network.loadingFinished":
+                count_bytes += int(message["params"].get("encodedDataLength", 0))
+        return count_bytes
+
+    @staticmethod
+    def wait_results_ready(
+        driver,
+        xpath_results: str,
+        timeout: float = 10.,
+        poll_interval: float = 0.05,
+        scrollable_div_xpath: str = '//div[@role="feed"]',
+        xpath_end_of_list: str = './/span[contains(@class, "HlvSq")]',
+        event_stop: Event | None = None
+    ) -> bool:
+        """
+        This method is used to wait until the feed and its first result card are present.
+        Returns False if the deadline passes or the stop event is set first.
+        """
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=poll_interval).until(
+                lambda d: (event_stop is not None and event_stop.is_set())
+                or (d.execute_script(SCRIPT_SCROLL_FEED, scrollable_div_xpath, xpath_results, xpath_end_of_list, False) or {}).get("cards", 0) > 0
+            )
+            return event_stop is None or not event_stop.is_set()
+        except TimeoutException:
+            return False
+
+    @staticmethod
+    def scroll_results(
+        driver,
+        pause_time: float = 2.,
+        max_scrolls: int = 10,
+        scrollable_div_xpath: str = '//div[@role="feed"]',
+        event_stop: Event | None = None,
+        callback_scroll=None
+    ) -> bool:
+        """
+        This method is used to scroll the feed max_scrolls times, pausing pause_time after each scroll.
+        callback_scroll is called after every pause, returns True if it stopped the scrolling.
+        """
+        from selenium.webdriver.common.by import By
+
+        for index in range(max_scrolls):
             try:
-                scroll_box = driver.find_element(By.XPATH, scrollable_div_xpath)
-                driver.execute_script(
-                    'arguments[0].scrollTop = arguments[0].scrollHeight',
-                    scroll_box
-                )
-                time.sleep(pause_time)
+                with TRACER.span("scroll_iteration", index=index):
+                    scroll_box = driver.find_element(By.XPATH, scrollable_div_xpath)
+                    driver.execute_script(
+                        'arguments[0].scrollTop = arguments[0].scrollHeight',
+                        scroll_box
+                    )
+                    if wait_stop(event_stop, pause_time):
+                        break
             except Exception:
                 break
+            if callback_scroll is not None and callback_scroll():
+                return True
+        return False
 
     @staticmethod
-    def extract_places(driver, xpath_results: str, xpath_name: str, xpath_address: str, xpath_phone: str, xpath_website: str):
+    def scroll_results_adaptive(
+        driver,
+        xpath_results: str,
+        timeout_stall: float = 2.,
+        poll_interval: float = 0.1,
+        max_scrolls: int = 10,
+        scrollable_div_xpath: str = '//div[@role="feed"]',
+        xpath_end_of_list: str = './/span[contains(@class, "HlvSq")]',
+        event_stop: Event | None = None,
+        callback_scroll=None
+    ) -> tuple[str, int]:
+        """
+        This method is used to scroll the feed until it stops growing.
+        It moves on as soon as new cards appear and returns the stop reason with the card count.
+        callback_scroll is called whenever new cards are loaded, scrolling stops once it returns True.
+        """
+        state = driver.execute_script(SCRIPT_SCROLL_FEED, scrollable_div_xpath, xpath_results, xpath_end_of_list, False)
+        if not state:
+            return SCROLL_STOP_NO_FEED, 0
+
+        for index in range(max_scrolls):
+            if callback_scroll is not None and callback_scroll():
+                return SCROLL_STOP_MAX_RESULTS, state["cards"]
+            with TRACER.span("scroll_iteration", index=index, cards=state["cards"]):
+                if state["end"]:
+                    return SCROLL_STOP_EXHAUSTED, state["cards"]
+                if event_stop is not None and event_stop.is_set():
+                    return SCROLL_STOP_STOPPED, state["cards"]
+
+                state_previous = state
+                state = driver.execute_script(SCRIPT_SCROLL_FEED, scrollable_div_xpath, xpath_results, xpath_end_of_list, True)
+                time_deadline = time.time() + timeout_stall
+                while state and not state["end"] \
+                        and state["cards"] <= state_previous["cards"] \
+                        and state["height"] <= state_previous["height"]:
+                    if time.time() >= time_deadline:
+                        return SCROLL_STOP_STALLED, state["cards"]
+                    if wait_stop(event_stop, poll_interval):
+                        return SCROLL_STOP_STOPPED, state["cards"]
+                    state = driver.execute_script(SCRIPT_SCROLL_FEED, scrollable_div_xpath, xpath_results, xpath_end_of_list, False)
+
+            if not state:
+                return SCROLL_STOP_NO_FEED, 0
+
+        if state["end"]:
+            return SCROLL_STOP_EXHAUSTED, state["cards"]
+        return SCROLL_STOP_CAP, state["cards"]
+
+    def scroll(self, driver, callback_scroll=None):
+        """
+        This method is used to scroll the results with the configured scroll mode.
+        callback_scroll extracts the newly loaded cards and stops the scrolling by returning True.
+        """
+        if self.scroll_mode == "adaptive":
+            reason, count = self.scroll_results_adaptive(
+                driver=driver,
+                xpath_results=self.xpath_results,
+                timeout_stall=self.delay_scroll,
+                poll_interval=self.scroll_poll_interval,
+                max_scrolls=self.max_scrolls,
+                scrollable_div_xpath=self.xpath_feed,
+                xpath_end_of_list=self.xpath_end_of_list,
+                event_stop=self.event_stop,
+                callback_scroll=callback_scroll
+            )
+            self.logger.info(f"Scrolling stopped ({reason}) with {count} cards loaded")
+            return reason
+
+        is_full = self.scroll_results(
+            driver=driver,
+            pause_time=self.delay_scroll,
+            max_scrolls=self.max_scrolls,
+            scrollable_div_xpath=self.xpath_feed,
+            event_stop=self.event_stop,
+            callback_scroll=callback_scroll
+        )
+        if is_full:
+            return SCROLL_STOP_MAX_RESULTS
+        return SCROLL_STOP_STOPPED if self.event_stop.is_set() else SCROLL_STOP_CAP
+
+    @staticmethod
+    def extract_places(driver, xpath_results: str, xpath_name: str, xpath_address: str, xpath_phone: str, xpath_website: str, xpath_url: str = './/a[contains(@href, "/maps/place/")]', event_stop: Event | None = None, start: int = 0):
+        from selenium.webdriver.common.by import By
+        from tqdm import tqdm
+
         places = []
-        # Extract the places from the results
-        cards = driver.find_elements(By.CLASS_NAME, xpath_results)
+        # Extract the places from the results, cards before start were extracted before
+        cards = driver.find_elements(By.CLASS_NAME, xpath_results)[start:]
 
         # Extract the name, address, phone, and website from each card
-        for card in tqdm(cards, desc="Extracting places", unit="it"):
-            # Name
-            try:
-                name = card.find_element(By.CLASS_NAME, xpath_name).text
-            except Exception:
-                name = None
+        for index, card in enumerate(tqdm(cards, desc="Extracting places", unit="it"), start=start):
+            if event_stop is not None and event_stop.is_set():
+                break
+            with TRACER.span("extract_card", index=index):
+                # Name
+                try:
+                    name = card.find_element(By.CLASS_NAME, xpath_name).text
+                except Exception:
+                    name = None
 
-            # Address
-            try:
-                address_element = card.find_element(By.XPATH, xpath_address)
-                address = address_element.text if address_element else None
-            except Exception:
-                address = None
+                # Address
+                try:
+                    address_element = card.find_element(By.XPATH, xpath_address)
+                    address = address_element.text if address_element else None
+                except Exception:
+                    address = None
 
-            # Phone
-            try:
-                phone_element = card.find_element(By.XPATH, xpath_phone)
-                phone = phone_element.text if phone_element else None
-            except Exception:
-                phone = None
+                # Phone
+                try:
+                    phone_element = card.find_element(By.XPATH, xpath_phone)
+                    phone = phone_element.text if phone_element else None
+                except Exception:
+                    phone = None
 
-            # Website
-            try:
-                website_element = card.find_element(By.XPATH, xpath_website)
-                website = website_element.get_attribute('href') if website_element else None
-            except Exception:
-                website = None
+                # Website
+                try:
+                    website_element = card.find_element(By.XPATH, xpath_website)
+                    website = website_element.get_attribute('href') if website_element else None
+                except Exception:
+                    website = None
+
+                # Place URL, identifies the place across targets
+                try:
+                    url_element = card.find_element(By.XPATH, xpath_url)
+                    url = url_element.get_attribute('href') if url_element else None
+                except Exception:
+                    url = None
 
-            places.append({
-                'name': name,
-                'address': address,
-                'phone': phone,
-                'website': website
-            })
+                places.append({
+                    'name': name,
+                    'address': address,
+                    'phone': phone,
+                    'website': website,
+                    'url': url
+                })
 
         return places
 
+    @staticmethod
+    def extract_places_js(driver, xpath_results: str, xpath_name: str, xpath_address: str, xpath_phone: str, xpath_website: str, xpath_url: str = './/a[contains(@href, "/maps/place/")]', start: int = 0):
+        """
+        This method is used to extract the fields of every card from start on in a single execute_script round trip.
+        """
+        with TRACER.span("extract_js", start=start):
+            places = driver.execute_script(
+                SCRIPT_EXTRACT_PLACES,
+                xpath_results,
+                xpath_name,
+                xpath_address,
+                xpath_phone,
+                xpath_website,
+                xpath_url,
+                start
+            )
+        if not isinstance(places, list):
+            raise ValueError(f"Unexpected extraction result: {type(places)}")
+        return places
+
+    def extract(self, driver, start: int = 0):
+        """
+        This method is used to extract the places of the cards from start on with the configured extraction mode.
+        """
+        xpaths = dict(
+            xpath_results=self.xpath_results,
+            xpath_name=self.xpath_name,
+            xpath_address=self.xpath_address,
+            xpath_phone=self.xpath_phone,
+            xpath_website=self.xpath_website,
+            xpath_url=self.xpath_url
+        )
+        if self.extraction_mode == "js":
+            try:
+                return self.extract_places_js(driver=driver, start=start, **xpaths)
+            except Exception as error:
+                self.logger.warning(f"JS extraction failed, falling back to element extraction -> {error}")
+        return self.extract_places(driver=driver, event_stop=self.event_stop, start=start, **xpaths)
+
     def set_search_parameters(self, max_scrolls: int = 10, zoom: int = 10):
         """
         This method is used to set the search parameters.
@@ -297,60 +991,328 @@ class ModuleScraperGMaps(ModuleThread):
         self.max_scrolls = max_scrolls
         self.zoom = zoom
 
+    def target_url(self, keyword: str, latitude: str, longitude: str) -> str:
+        """
+        This method is used to build the search URL of a target with its own or the global zoom.
+        """
+        zoom = self.buffer_target_zooms.get((keyword, latitude, longitude), self.zoom)
+        return self.build_maps_search_url(keyword, latitude, longitude, zoom=zoom)
+
+    def target_max_results(self, keyword: str, latitude: str, longitude: str) -> int:
+        """
+        This method is used to get the max_results of a target, its own or the global one.
+        """
+        return self.buffer_target_max_results.get((keyword, latitude, longitude), self.max_results)
+
+    def scrape_target(self, driver, keyword: str, latitude: str, longitude: str) -> list[dict]:
+        """
+        This method is used to scrape a single target with the given driver.
+        """
+        url = self.target_url(keyword, latitude, longitude)
+        self.traffic_read(driver)
+        time_start = time.time()
+        with TRACER.span("navigate", url=url):
+            driver.get(url)
+        time_page_load = time.time() - time_start
+        self.logger.info(f"Visiting URL: {url}")
+
+        # Wait for the feed and its first card instead of a fixed sleep
+        with TRACER.span("wait_first_card"):
+            is_ready = self.wait_results_ready(
+                driver=driver,
+                xpath_results=self.xpath_results,
+                timeout=max(0., self.timeout_url_load - time_page_load),
+                poll_interval=self.poll_url_load,
+                scrollable_div_xpath=self.xpath_feed,
+                xpath_end_of_list=self.xpath_end_of_list,
+                event_stop=self.event_stop
+            )
+        time_first_card = time.time() - time_start if is_ready else None
+        self.metrics_set(
+            keyword, latitude, longitude,
+            time_page_load=time_page_load,
+            time_first_card=time_first_card,
+            is_ready=is_ready
+        )
+        if is_ready:
+            self.logger.info(f"First card in {time_first_card:.3f} seconds (page load {time_page_load:.3f} seconds)")
+        elif not self.event_stop.is_set():
+            # Consent walls and "unusual traffic" pages have no feed, they must not be extracted as zero results
+            self.logger.warning(f"No result card within {self.timeout_url_load} seconds for {keyword} at {latitude}, {longitude}")
+            raise BlockedError(self.detect_block(driver))
+
+        # Cards are extracted as they load, so every card is read once and the places show up in
+        # results_partial_get while the feed is still scrolled
+        places: list[dict] = []
+        max_results = self.target_max_results(keyword, latitude, longitude)
+        time_extract = 0.
+
+        def extract_new() -> bool:
+            nonlocal time_extract
+            time_stage = time.time()
+            with TRACER.span("extract", start=len(places)):
+                places_new = self.extract(driver, start=len(places))
+            time_extract += time.time() - time_stage
+            return self.target_extend(keyword, latitude, longitude, places, places_new, max_results=max_results)
+
+        # Scroll through the results
+        time_stage = time.time()
+        with TRACER.span("scroll"):
+            reason_scroll = self.scroll(driver, callback_scroll=extract_new)
+        time_scroll = time.time() - time_stage - time_extract
+
+        # Cards loaded by the last scroll
+        if reason_scroll != SCROLL_STOP_MAX_RESULTS and not self.event_stop.is_set():
+            extract_new()
+        self.stats_stages(time_page_load, time_first_card, time_scroll, time_extract, reason_scroll)
+        self.traffic_log(keyword, latitude, longitude, self.traffic_read(driver), time_page_load)
+        return places
+
+    @staticmethod
+    def detect_block(driver) -> str:
+        """
+        This method is used to tell why a page has no results: PAGE_CONSENT, PAGE_CAPTCHA or PAGE_EMPTY.
+        """
+        try:
+            reason = driver.execute_script(SCRIPT_PAGE_BLOCK)
+        except Exception:
+            reason = None
+        return reason or PAGE_EMPTY
+
+    def traffic_log(self, keyword: str, latitude: str, longitude: str, bytes_transferred: int | None, time_page_load: float):
+        """
+        This method is used to record the transferred bytes and the page load time of a target.
+        """
+        self.metrics_set(keyword, latitude, longitude, bytes_transferred=bytes_transferred)
+        if bytes_transferred is not None:
+            self.stats.counter_add("bytes_transferred", bytes_transferred)
+            self.logger.info(f"Traffic for {keyword} at {latitude}, {longitude}: {bytes_transferred / 1024:.1f} KiB, page load {time_page_load:.3f} seconds")
+
+    def target_begin(self, keyword: str, latitude: str, longitude: str) -> list[dict] | None:
+        """
+        This method is used to mark a claimed target in progress.
+        Returns the cached places of the target if there are fresh ones, otherwise None.
+        """
+        if self.job_store is not None:
+            self.job_store.target_set_state(keyword, latitude, longitude, STATE_IN_PROGRESS)
+
+        # Fresh cached results are served without touching the browser
+        if self.result_cache is not None:
+            url = self.target_url(keyword, latitude, longitude)
+            places = self.result_cache.get(url, max_age=self.cache_max_age)
+            if places is not None:
+                self.logger.info(f"Cache hit for {url}")
+                # Only complete feeds are cached, a target with a limit takes its first max_results places
+                max_results = self.target_max_results(keyword, latitude, longitude)
+                return places[:max_results] if max_results else places
+        return None
+
+    def target_fail(self, keyword: str, latitude: str, longitude: str, error: Exception, is_final: bool = False):
+        """
+        This method is used to record a failed target and give it back to the buffer.
+        With a shared job queue the target is given back to the queue instead, any process may lease it again.
+        A target out of max_target_retries, or failed with is_final, is given up: it is removed and its Future gets the error.
+        """
+        self.logger.error(f"Scraping failed for {keyword} at {latitude}, {longitude} -> {error}")
+        self.stats.counter_add("targets_failed")
+        self.stats.counter_add(f"errors_{type(error).__name__}")
+        if self.job_store is not None:
+            try:
+                self.job_store.target_set_state(keyword, latitude, longitude, STATE_FAILED, error=str(error))
+            except Exception as error_store:
+                # The target is still retried or given up, the store keeps its previous state
+                self.logger.warning(f"Recording the failure of {keyword} at {latitude}, {longitude} failed -> {error_store}")
+        target = (keyword, latitude, longitude)
+        with self.buffer_targets_lock:
+            count_failures = self.buffer_target_failures.get(target, 0) + 1
+            self.buffer_target_failures[target] = count_failures
+        is_final = is_final or count_failures > self.max_target_retries
+        if is_final:
+            self.logger.error(f"Giving up {keyword} at {latitude}, {longitude} after {count_failures} failures")
+            self.stats.counter_add("targets_given_up")
+        if self.lease_owner or is_final:
+            self.target_resolve(keyword, latitude, longitude, error=error)
+            self.target_remove(keyword, latitude, longitude)
+        else:
+            self.target_release(keyword, latitude, longitude, penalty=self.priority_retry_penalty)
+
+    def target_blocked(self, keyword: str, latitude: str, longitude: str, error: BlockedError) -> bool:
+        """
+        This method is used to slow the request rate down and requeue a target which was served a blocked page.
+        Returns True if the target is an empty feed out of retries, it is then finished without results and not cached.
+        """
+        target = (keyword, latitude, longitude)
+        with self.buffer_targets_lock:
+            count_blocks = self.buffer_target_blocks.get(target, 0) + 1
+            self.buffer_target_blocks[target] = count_blocks
+        is_empty = error.reason == PAGE_EMPTY
+        # Searches without results are routine with tiling, only consent walls and CAPTCHAs slow the rate down
+        if not is_empty:
+            self.rate_limiter.backoff()
+        self.stats.counter_add(f"pages_blocked_{error.reason.replace(' ', '_')}")
+        self.logger.warning(f"{error} for {keyword} at {latitude}, {longitude}, request rate {self.rate_limiter.rate:.2f}/s")
+
+        if count_blocks <= (self.max_empty_retries if is_empty else self.max_block_retries):
+            self.target_release(keyword, latitude, longitude, penalty=self.priority_retry_penalty)
+            return False
+        if is_empty:
+            return True
+        # Out of block retries, requeuing it would only halve the rate again
+        self.target_fail(keyword, latitude, longitude, error, is_final=True)
+        return False
+
+    def target_finish(self, keyword: str, latitude: str, longitude: str, places: list[dict], is_cached: bool = False, is_cacheable: bool = True):
+        """
+        This method is used to store the extracted places of a target and remove it from the buffer.
+        Places of a target with is_cacheable False, e.g. an empty feed out of retries, are not written to the result cache.
+        """
+        self.logger.info(f"Extracted {len(places)} places from {keyword} at {latitude}, {longitude}")
+        places_extracted = places
+        self.stats.counter_add("targets_cached" if is_cached else "targets_done")
+        self.stats.counter_add("places_extracted", len(places))
+        self.stats.observe("places_per_target", len(places), buckets=BUCKETS_PLACES)
+        # A feed cut short by max_results would be served truncated to runs with a higher limit
+        max_results = self.target_max_results(keyword, latitude, longitude)
+        is_cacheable = is_cacheable and not (max_results and len(places) >= max_results)
+        if self.result_cache is not None and not is_cached and is_cacheable:
+            self.result_cache.set(self.target_url(keyword, latitude, longitude), places)
+        for callback in self.callbacks_target_done:
+            callback(keyword, latitude, longitude, places)
+        if self.place_index is not None:
+            count_places = len(places)
+            places = self.place_index.filter(keyword, latitude, longitude, places)
+            self.logger.info(f"Dropped {count_places - len(places)} duplicate places")
+            self.stats.counter_add("places_duplicate", count_places - len(places))
+
+        # Add the results to the buffer
+        with TRACER.span("result_insert", places=len(places)):
+            self.__result_add_bulk(
+                keyword=keyword,
+                latitude=latitude,
+                longitude=longitude,
+                data=places
+            )
+        self.logger.info(f"Added {len(places)} places to buffer")
+        if self.job_store is not None:
+            with TRACER.span("job_store_done"):
+                self.job_store.target_done(keyword, latitude, longitude, places)
+        # The result store records every sighting, duplicates of other targets included
+        if self.result_store is not None:
+            with TRACER.span("result_store_upsert"):
+                self.result_store.places_upsert(keyword, latitude, longitude, places_extracted)
+        with TRACER.span("sinks_write"):
+            self.__sinks_write(keyword, latitude, longitude, places)
+        # The Future gets every extracted place, duplicates of other targets included
+        self.target_resolve(keyword, latitude, longitude, places=places_extracted)
+        self.target_remove(keyword, latitude, longitude)
+        self.logger.info(f"Removed {keyword} at {latitude}, {longitude} from buffer")
+
+    def target_complete(self, keyword: str, latitude: str, longitude: str, places: list[dict], is_cached: bool = False, is_cacheable: bool = True):
+        """
+        This method is used to finish a target with target_finish, a target failing to finish is given up with the error.
+        Stores, sinks and callbacks may have taken its places already, so it is not scraped again.
+        """
+        try:
+            self.target_finish(keyword, latitude, longitude, places, is_cached=is_cached, is_cacheable=is_cacheable)
+        except Exception as error:
+            self.target_fail(keyword, latitude, longitude, error, is_final=True)
+
+    def task_worker(self, worker_id: int):
+        """
+        This method is used to process targets from the buffer with the worker's own driver.
+        """
+        self.logger.info(f"Worker {worker_id} started.")
+        while self.is_running:
+            target = self.target_claim()
+
+            # If there are no free targets, wait until one is added or released
+            # Leased targets of a shared job queue can only be polled
+            if target is None:
+                self.logger.info(f"Worker {worker_id}: No targets in buffer, waiting...")
+                self.target_wait(timeout=1. if self.lease_owner else None)
+                continue
+
+            keyword, latitude, longitude = target
+            self.logger.info(f"Worker {worker_id}: Scraping data for {keyword} at {latitude}, {longitude}")
+            is_empty = False
+            try:
+                places = self.target_begin(keyword, latitude, longitude)
+                is_cached = places is not None
+                if not is_cached:
+                    with TRACER.span("driver_acquire"):
+                        driver = self.driver_manager.acquire(worker_id)
+                    with TRACER.span("rate_wait"):
+                        is_allowed = self.rate_limiter.acquire(self.event_stop)
+                    if not is_allowed:
+                        self.target_release(keyword, latitude, longitude)
+                        break
+                    with TRACER.span("target", keyword=keyword, latitude=latitude, longitude=longitude):
+                        places = self.scrape_target(driver, keyword, latitude, longitude)
+                    self.driver_manager.page_done(worker_id)
+                    self.rate_limiter.success()
+            except BlockedError as error:
+                self.driver_manager.page_done(worker_id)
+                if not self.target_blocked(keyword, latitude, longitude, error):
+                    self.event_stop.wait(self.delay_target_iteration)
+                    continue
+                places = []
+                is_empty = True
+            except Exception as error:
+                # Drivers quit by stop fail the target in flight, it is left for the next run
+                if self.event_stop.is_set():
+                    self.target_release(keyword, latitude, longitude)
+                    break
+                self.target_fail(keyword, latitude, longitude, error)
+                # A dead session is replaced before the next target
+                self.driver_manager.check(worker_id)
+                self.event_stop.wait(self.delay_target_iteration)
+                continue
+
+            # Places of a target interrupted by stop are incomplete
+            if self.event_stop.is_set() and not is_cached:
+                self.target_release(keyword, latitude, longitude)
+                break
+
+            # Cached places were enriched when they were cached, an empty feed has nothing to enrich
+            if self.enricher is not None and not is_cached and not is_empty:
+                if not self.enricher.submit(keyword, latitude, longitude, places):
+                    self.target_release(keyword, latitude, longitude)
+                    break
+            else:
+                self.target_complete(keyword, latitude, longitude, places, is_cached=is_cached, is_cacheable=not is_empty)
+            if not is_cached:
+                self.event_stop.wait(self.delay_target_iteration)
+        self.logger.info(f"Worker {worker_id} ended.")
+
     def task(self):
         """
         This method is used to run the module.
         """
         self.logger.info("Scraping task started.")
-        self.logger.info(f"Delays -> URL load: {self.delay_url_load}, Scroll: {self.delay_scroll}, Target Iteration: {self.delay_target_iteration}")
+        self.event_stop.clear()
+        self.logger.info(f"Delays -> URL load timeout: {self.timeout_url_load}, Scroll: {self.delay_scroll}, Target Iteration: {self.delay_target_iteration}")
         self.logger.info(f"Scroll {self.max_scrolls} times")
-        while self.is_running:
-            # Scrape data from the website
-            temp_buffer = self.buffer_targets.copy()
-            for keyword, coordinates in temp_buffer.items():
-                for latitude, longitude in coordinates:
-                    self.logger.info(f"Scraping data for {keyword} at {latitude}, {longitude}")
-                    url = self.build_maps_search_url(keyword, latitude, longitude, zoom=self.zoom)
-                    self.web_driver.get(url)
-                    self.logger.info(f"Visiting URL: {url}")
-                    time.sleep(self.delay_url_load)
-
-                    # Scroll through the results
-                    self.scroll_results(
-                        driver=self.web_driver,
-                        pause_time=self.delay_scroll,
-                        max_scrolls=self.max_scrolls
-                    )
+        self.logger.info(f"Workers: {self.workers}")
+        if self.enricher is not None:
+            self.enricher.start()
+            self.logger.info(f"Enricher workers: {self.enricher.workers}, queue size: {self.enricher.queue_size}")
+
+        # Extra workers run in their own threads, the first one runs in the task thread
+        threads = [
+            Thread(
+                target=self.task_worker,
+                args=(worker_id,),
+                name=f"{self.name}-Worker-{worker_id}",
+                daemon=True
+            )
+            for worker_id in range(1, self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        self.task_worker(0)
+        for thread in threads:
+            thread.join()
 
-                    # Extract data from the results
-                    places = self.extract_places(
-                        driver=self.web_driver,
-                        xpath_results=self.xpath_results,
-                        xpath_name=self.xpath_name,
-                        xpath_address=self.xpath_address,
-                        xpath_phone=self.xpath_phone,
-                        xpath_website=self.xpath_website
-                    )
-                    self.logger.info(f"Extracted {len(places)} places from {keyword} at {latitude}, {longitude}")
-
-                    # Add the results to the buffer
-                    self.__result_add_bulk(
-                        keyword=keyword,
-                        latitude=latitude,
-                        longitude=longitude,
-                        data=places
-                    )
-                    self.logger.info(f"Added {len(places)} places to buffer")
-                    self.target_remove(keyword, latitude, longitude)
-                    self.logger.info(f"Removed {keyword} at {latitude}, {longitude} from buffer")
-                    time.sleep(self.delay_target_iteration)
-
-            # If there are no targets, wait for a while
-            if not self.buffer_targets:
-                self.logger.info("No targets in buffer, waiting...")
-                time.sleep(1)
-            else:
-                self.logger.info(f"{len(self.buffer_targets)} targets in buffer")
         self.logger.info("Scraping task ended.")
         return 0
 
@@ -359,9 +1321,16 @@ class ModuleScraperGMaps(ModuleThread):
         This method is used to stop the module.
         """
         self.is_running = False
+        self.event_stop.set()
+        with self.buffer_targets_changed:
+            self.buffer_targets_changed.notify_all()
         self.logger.info("Stopping module...")
-        self.web_driver.quit()
+        # Workers waiting for room in the enricher's queue are woken as well
+        if self.enricher is not None:
+            self.enricher.stop()
+        self.driver_manager.close()
         self.logger.info("Module stopped.")
+        self.sinks_close()
         self.target_clear()
         self.results_clear()
         self.logger.info("Buffers cleared.")
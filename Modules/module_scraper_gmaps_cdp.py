@@ -0,0 +1,549 @@
+import json
+from pathlib import Path
+import shutil
+import subprocess
+import tempfile
+import time
+
+import trio
+from trio_websocket import ConnectionClosed, open_websocket_url
+
+from Modules.module_scraper_gmaps import (
+    PAGE_EMPTY,
+    SCRIPT_EXTRACT_PLACES,
+    SCRIPT_PAGE_BLOCK,
+    SCRIPT_SCROLL_FEED,
+    SCROLL_STOP_CAP,
+    SCROLL_STOP_EXHAUSTED,
+    SCROLL_STOP_MAX_RESULTS,
+    SCROLL_STOP_NO_FEED,
+    SCROLL_STOP_STALLED,
+    SCROLL_STOP_STOPPED,
+    BlockedError,
+    ModuleScraperGMaps
+)
+from Modules.module_tracer import TRACER
+
+
+# Chrome binaries looked up in PATH when no path_chrome is given
+CHROME_BINARIES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+# Trace tracks of the tabs are numbered from here, clear of real thread ids
+TRACE_TID_TABS = 1_000_000_000
+
+
+def script_call(script: str, *arguments) -> str:
+    """
+    Wraps a script written for Selenium's execute_script (reading `arguments`) into a Runtime.evaluate expression.
+    """
+    return f"(function() {{{script}}}).apply(null, {json.dumps(list(arguments))})"
+
+
+class CDPError(Exception):
+    pass
+
+
+class CDPConnection():
+    """
+    Chrome DevTools Protocol client over the browser websocket.
+    Commands of every tab are multiplexed on the one connection through flattened sessions.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.id_next: int = 0
+        self.pending: dict[int, list] = {}
+
+        # Event handlers by session id
+        self.listeners: dict = {}
+
+    async def send(self, method: str, params: dict | None = None, session_id: str = "") -> dict:
+        self.id_next += 1
+        message_id = self.id_next
+        message = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+
+        event = trio.Event()
+        self.pending[message_id] = [event, None]
+        try:
+            await self.websocket.send_message(json.dumps(message))
+            await event.wait()
+            response = self.pending[message_id][1]
+        finally:
+            self.pending.pop(message_id, None)
+
+        if "error" in response:
+            raise CDPError(f"{method}: {response['error'].get('message')}")
+        return response.get("result", {})
+
+    async def listen(self):
+        """
+        Dispatches the responses to the waiting commands and the events to their session's listener.
+        """
+        while True:
+            message = json.loads(await self.websocket.get_message())
+            if "method" in message:
+                listener = self.listeners.get(message.get("sessionId"))
+                if listener is not None:
+                    listener(message)
+                continue
+            waiter = self.pending.get(message.get("id"))
+            if waiter is not None:
+                waiter[1] = message
+                waiter[0].set()
+
+
+class CDPTab():
+    """
+    A page target attached to the browser connection.
+    """
+
+    def __init__(self, connection: CDPConnection, target_id: str, session_id: str):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+        self.bytes_received: int = 0
+        # Loader of the main frame's current document, set whenever a navigation commits
+        self.loader_id: str = ""
+        self.document_changed = trio.Event()
+        # Trace track of the tab, the tabs share the event loop's thread
+        self.trace_tid: int | None = None
+        self.connection.listeners[session_id] = self.on_event
+
+    @classmethod
+    async def open(cls, connection: CDPConnection, block_urls: list[str] | None = None) -> "CDPTab":
+        target = await connection.send("Target.createTarget", {"url": "about:blank"})
+        session = await connection.send("Target.attachToTarget", {"targetId": target["targetId"], "flatten": True})
+        tab = cls(connection, target["targetId"], session["sessionId"])
+
+        # Background tabs must keep running timers and scroll handlers
+        await tab.send("Emulation.setFocusEmulationEnabled", {"enabled": True})
+
+        # Page events tell when a navigation has replaced the previous document
+        await tab.send("Page.enable")
+        # Network events count the transferred bytes, blocked URLs are never requested
+        await tab.send("Network.enable")
+        if block_urls:
+            await tab.send("Network.setBlockedURLs", {"urls": block_urls})
+        return tab
+
+    def on_event(self, message: dict):
+        if message["method"] == "Network.loadingFinished":
+            self.bytes_received += int(message["params"].get("encodedDataLength", 0))
+        elif message["method"] == "Page.frameNavigated":
+            frame = message["params"].get("frame", {})
+            if not frame.get("parentId"):
+                self.loader_id = frame.get("loaderId", "")
+                self.document_changed.set()
+
+    def traffic_read(self) -> int:
+        """
+        Returns the bytes received since the last call.
+        """
+        count_bytes = self.bytes_received
+        self.bytes_received = 0
+        return count_bytes
+
+    async def send(self, method: str, params: dict | None = None) -> dict:
+        return await self.connection.send(method, params, session_id=self.session_id)
+
+    async def navigate(self, url: str, timeout: float = 30.):
+        """
+        Navigates the tab and waits until the new document replaced the previous one, like Selenium's get.
+        """
+        self.document_changed = trio.Event()
+        result = await self.send("Page.navigate", {"url": url})
+        if result.get("errorText"):
+            raise CDPError(f"Navigation to {url} failed: {result['errorText']}")
+        # Navigations within the same document have no loader
+        loader_id = result.get("loaderId")
+        if not loader_id:
+            return
+        with trio.move_on_after(timeout):
+            while self.loader_id != loader_id:
+                await self.document_changed.wait()
+                self.document_changed = trio.Event()
+            return
+        raise CDPError(f"Navigation to {url} did not commit within {timeout} seconds")
+
+    async def evaluate(self, expression: str):
+        result = await self.send("Runtime.evaluate", {"expression": expression, "returnByValue": True})
+        if "exceptionDetails" in result:
+            raise CDPError(f"Evaluation failed: {result['exceptionDetails'].get('text')}")
+        return result["result"].get("value")
+
+    async def close(self):
+        self.connection.listeners.pop(self.session_id, None)
+        await self.connection.send("Target.closeTarget", {"targetId": self.target_id})
+
+
+class ModuleScraperGMapsCDP(ModuleScraperGMaps):
+    """
+    This class is used to scrape many targets concurrently in the tabs of a single Chrome process.
+    It talks the Chrome DevTools Protocol on trio instead of blocking a thread per browser,
+    and keeps the target_add/results_get API of ModuleScraperGMaps.
+    """
+
+    def __init__(self, path_chrome: str = "", headless: bool = True, tabs: int = 8, *args, **kwargs):
+        self.path_chrome = path_chrome
+        self.tabs: int = max(1, int(tabs))
+        self.process_chrome: subprocess.Popen | None = None
+        self.dir_user_data: str = ""
+
+        # No Selenium drivers are started, the driver manager is never asked for one
+        super(ModuleScraperGMapsCDP, self).__init__(headless=headless, *args, **kwargs)
+
+        # Messages of large feeds exceed the websocket default of 1 MiB
+        self.max_message_size: int = 64 * 1024 * 1024
+
+        # Chrome is relaunched this many times in a row when it crashes or its websocket closes,
+        # the targets in flight are failed first; a session which finished a target resets the count
+        self.max_chrome_restarts: int = 3
+        # Target claimed by every tab, failed when the connection is lost
+        self.targets_in_flight: dict[int, tuple[str, str, str]] = {}
+        self.count_session_targets: int = 0
+
+    def launch_chrome(self) -> str:
+        """
+        This method is used to start Chrome with remote debugging and return its browser websocket URL.
+        """
+        path_chrome = self.path_chrome or next(
+            (shutil.which(binary) for binary in CHROME_BINARIES if shutil.which(binary)),
+            ""
+        )
+        if not path_chrome:
+            raise FileNotFoundError("Chrome binary not found, set path_chrome")
+
+        self.dir_user_data = tempfile.mkdtemp(prefix="gmaps-cdp-")
+        arguments = [
+            path_chrome,
+            "--remote-debugging-port=0",
+            f"--user-data-dir={self.dir_user_data}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--disable-blink-features=AutomationControlled",
+            "--disable-extensions",
+            "--disable-gpu",
+            "--no-sandbox",
+            "--window-size=1920,1080",
+            "--disable-background-timer-throttling",
+            "--disable-backgrounding-occluded-windows",
+            "--disable-renderer-backgrounding",
+        ]
+        if self.block_profile != "none":
+            arguments.append("--blink-settings=imagesEnabled=false")
+        if self.headless:
+            arguments.append("--headless=new")
+        arguments.append("about:blank")
+        self.process_chrome = subprocess.Popen(arguments, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        # Chrome writes the chosen port and the browser path once it listens
+        path_port = Path(self.dir_user_data) / "DevToolsActivePort"
+        time_deadline = time.time() + 30
+        while time.time() < time_deadline:
+            if self.process_chrome.poll() is not None:
+                raise RuntimeError(f"Chrome exited with code {self.process_chrome.returncode}")
+            if path_port.exists():
+                lines = path_port.read_text().split()
+                if len(lines) >= 2:
+                    url = f"ws://127.0.0.1:{lines[0]}{lines[1]}"
+                    self.logger.info(f"Chrome started ({self.process_chrome.pid}): {url}")
+                    return url
+            time.sleep(0.05)
+        raise TimeoutError("Chrome did not open its DevTools port in time")
+
+    def close_chrome(self):
+        """
+        This method is used to terminate Chrome and remove its profile.
+        """
+        if self.process_chrome is not None:
+            self.process_chrome.terminate()
+            try:
+                self.process_chrome.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process_chrome.kill()
+            self.process_chrome = None
+        if self.dir_user_data:
+            shutil.rmtree(self.dir_user_data, ignore_errors=True)
+            self.dir_user_data = ""
+
+    async def feed_state(self, tab: CDPTab, scroll: bool = False) -> dict | None:
+        return await tab.evaluate(script_call(
+            SCRIPT_SCROLL_FEED, self.xpath_feed, self.xpath_results, self.xpath_end_of_list, scroll
+        ))
+
+    async def wait_results_ready_async(self, tab: CDPTab, timeout: float) -> bool:
+        """
+        This method is used to wait until the feed and its first result card are present.
+        """
+        with trio.move_on_after(timeout):
+            while not self.event_stop.is_set():
+                try:
+                    state = await self.feed_state(tab)
+                except CDPError:
+                    # The execution context is replaced while the document loads
+                    state = None
+                if state and state["cards"] > 0:
+                    return True
+                await trio.sleep(self.poll_url_load)
+        return False
+
+    async def scroll_async(self, tab: CDPTab, callback_scroll=None) -> str:
+        """
+        This method is used to scroll the feed with the configured scroll mode, see scroll_results_adaptive.
+        The async callback_scroll extracts the newly loaded cards and stops the scrolling by returning True.
+        """
+        if self.scroll_mode != "adaptive":
+            for _ in range(self.max_scrolls):
+                if self.event_stop.is_set():
+                    return SCROLL_STOP_STOPPED
+                if not await self.feed_state(tab, scroll=True):
+                    break
+                await trio.sleep(self.delay_scroll)
+                if callback_scroll is not None and await callback_scroll():
+                    return SCROLL_STOP_MAX_RESULTS
+            return SCROLL_STOP_CAP
+
+        state = await self.feed_state(tab)
+        if not state:
+            return SCROLL_STOP_NO_FEED
+        reason = SCROLL_STOP_CAP
+        for _ in range(self.max_scrolls):
+            if callback_scroll is not None and await callback_scroll():
+                self.logger.info(f"Scrolling stopped ({SCROLL_STOP_MAX_RESULTS}) with {state['cards']} cards loaded")
+                return SCROLL_STOP_MAX_RESULTS
+            if state["end"]:
+                break
+            if self.event_stop.is_set():
+                return SCROLL_STOP_STOPPED
+            TRACER.instant("scroll_iteration", tid=tab.trace_tid, cards=state["cards"])
+            state_previous = state
+            state = await self.feed_state(tab, scroll=True)
+            time_deadline = trio.current_time() + self.delay_scroll
+            while state and not state["end"] \
+                    and state["cards"] <= state_previous["cards"] \
+                    and state["height"] <= state_previous["height"]:
+                if trio.current_time() >= time_deadline:
+                    reason = SCROLL_STOP_STALLED
+                    break
+                if self.event_stop.is_set():
+                    return SCROLL_STOP_STOPPED
+                await trio.sleep(self.scroll_poll_interval)
+                state = await self.feed_state(tab)
+            if not state:
+                return SCROLL_STOP_NO_FEED
+            if reason == SCROLL_STOP_STALLED:
+                break
+        if state["end"]:
+            reason = SCROLL_STOP_EXHAUSTED
+        self.logger.info(f"Scrolling stopped ({reason}) with {state['cards']} cards loaded")
+        return reason
+
+    async def extract_async(self, tab: CDPTab, start: int = 0) -> list[dict]:
+        places = await tab.evaluate(script_call(
+            SCRIPT_EXTRACT_PLACES,
+            self.xpath_results,
+            self.xpath_name,
+            self.xpath_address,
+            self.xpath_phone,
+            self.xpath_website,
+            self.xpath_url,
+            start
+        ))
+        if not isinstance(places, list):
+            raise CDPError(f"Unexpected extraction result: {type(places)}")
+        return places
+
+    async def detect_block_async(self, tab: CDPTab) -> str:
+        """
+        This method is used to tell why a page has no results, see ModuleScraperGMaps.detect_block.
+        """
+        try:
+            reason = await tab.evaluate(script_call(SCRIPT_PAGE_BLOCK))
+        except CDPError:
+            reason = None
+        return reason or PAGE_EMPTY
+
+    async def scrape_target_async(self, tab: CDPTab, keyword: str, latitude: str, longitude: str) -> list[dict]:
+        """
+        This method is used to scrape a single target in the given tab.
+        """
+        url = self.target_url(keyword, latitude, longitude)
+        tab.traffic_read()
+        time_start = time.time()
+        with TRACER.span("navigate", tid=tab.trace_tid, url=url):
+            await tab.navigate(url, timeout=self.timeout_url_load)
+        time_page_load = time.time() - time_start
+        self.logger.info(f"Visiting URL: {url}")
+
+        with TRACER.span("wait_first_card", tid=tab.trace_tid):
+            is_ready = await self.wait_results_ready_async(tab, max(0., self.timeout_url_load - time_page_load))
+        time_first_card = time.time() - time_start if is_ready else None
+        self.metrics_set(
+            keyword, latitude, longitude,
+            time_page_load=time_page_load,
+            time_first_card=time_first_card,
+            is_ready=is_ready
+        )
+        if not is_ready and not self.event_stop.is_set():
+            self.logger.warning(f"No result card within {self.timeout_url_load} seconds for {keyword} at {latitude}, {longitude}")
+            raise BlockedError(await self.detect_block_async(tab))
+
+        # Cards are extracted as they load, see ModuleScraperGMaps.scrape_target
+        places: list[dict] = []
+        max_results = self.target_max_results(keyword, latitude, longitude)
+        time_extract = 0.
+
+        async def extract_new() -> bool:
+            nonlocal time_extract
+            time_stage = time.time()
+            with TRACER.span("extract", tid=tab.trace_tid, start=len(places)):
+                places_new = await self.extract_async(tab, start=len(places))
+            time_extract += time.time() - time_stage
+            return self.target_extend(keyword, latitude, longitude, places, places_new, max_results=max_results)
+
+        time_stage = time.time()
+        with TRACER.span("scroll", tid=tab.trace_tid):
+            reason_scroll = await self.scroll_async(tab, callback_scroll=extract_new)
+        time_scroll = time.time() - time_stage - time_extract
+        if reason_scroll != SCROLL_STOP_MAX_RESULTS and not self.event_stop.is_set():
+            await extract_new()
+        self.stats_stages(time_page_load, time_first_card, time_scroll, time_extract, reason_scroll)
+        self.traffic_log(keyword, latitude, longitude, tab.traffic_read(), time_page_load)
+        return places
+
+    async def task_tab(self, connection: CDPConnection, tab_id: int):
+        """
+        This method is used to process targets from the buffer in a single tab.
+        """
+        tab = await CDPTab.open(connection, block_urls=self.block_urls)
+        tab.trace_tid = TRACE_TID_TABS + tab_id
+        TRACER.track_name_set(tab.trace_tid, f"Tab-{tab_id}")
+        self.logger.info(f"Tab {tab_id} opened.")
+        while self.is_running:
+            # Claiming may lease from a shared job queue, so it runs off the event loop
+            target = await trio.to_thread.run_sync(self.target_claim)
+            # The wait ends as soon as a target is added or released, or the module is stopped
+            if target is None:
+                await trio.to_thread.run_sync(self.target_wait, 1.)
+                continue
+
+            keyword, latitude, longitude = target
+            self.targets_in_flight[tab_id] = target
+            self.logger.info(f"Tab {tab_id}: Scraping data for {keyword} at {latitude}, {longitude}")
+            is_empty = False
+            try:
+                places = await trio.to_thread.run_sync(self.target_begin, keyword, latitude, longitude)
+                is_cached = places is not None
+                if not is_cached:
+                    with TRACER.span("rate_wait", tid=tab.trace_tid):
+                        is_allowed = await trio.to_thread.run_sync(self.rate_limiter.acquire, self.event_stop)
+                    if not is_allowed:
+                        del self.targets_in_flight[tab_id]
+                        self.target_release(keyword, latitude, longitude)
+                        break
+                    places = await self.scrape_target_async(tab, keyword, latitude, longitude)
+                    self.rate_limiter.success()
+            except BlockedError as error:
+                is_empty = await trio.to_thread.run_sync(self.target_blocked, keyword, latitude, longitude, error)
+                if not is_empty:
+                    del self.targets_in_flight[tab_id]
+                    await trio.sleep(self.delay_target_iteration)
+                    continue
+                places = []
+            except ConnectionClosed:
+                # The session is lost for every tab, task_async fails the targets in flight once
+                raise
+            except Exception as error:
+                del self.targets_in_flight[tab_id]
+                await trio.to_thread.run_sync(self.target_fail, keyword, latitude, longitude, error)
+                await trio.sleep(self.delay_target_iteration)
+                continue
+            # The target leaves the tab from here on, finished, handed to the enricher or released
+            del self.targets_in_flight[tab_id]
+
+            # Places of a target interrupted by stop are incomplete
+            if self.event_stop.is_set() and not is_cached:
+                self.target_release(keyword, latitude, longitude)
+                break
+
+            # Detail pages are opened by the enricher's own drivers, waiting for room in its queue blocks a thread
+            if self.enricher is not None and not is_cached and not is_empty:
+                is_submitted = await trio.to_thread.run_sync(self.enricher.submit, keyword, latitude, longitude, places)
+                if not is_submitted:
+                    self.target_release(keyword, latitude, longitude)
+                    break
+            else:
+                await trio.to_thread.run_sync(self.target_complete, keyword, latitude, longitude, places, is_cached, not is_empty)
+            self.count_session_targets += 1
+            if not is_cached:
+                await trio.sleep(self.delay_target_iteration)
+        await tab.close()
+        self.logger.info(f"Tab {tab_id} closed.")
+
+    async def task_async(self):
+        """
+        This method is used to run Chrome sessions until the buffer is done or the module is stopped.
+        A crashed Chrome or a closed websocket fails the targets in flight and Chrome is relaunched,
+        up to max_chrome_restarts times in a row.
+        """
+        count_restarts = 0
+        while self.is_running:
+            self.count_session_targets = 0
+            try:
+                await self.session_async()
+                return
+            except Exception as error:
+                if self.event_stop.is_set():
+                    return
+                self.logger.error(f"Chrome session lost -> {error!r}")
+                self.stats.counter_add("chrome_restarts")
+                await trio.to_thread.run_sync(self.targets_in_flight_fail, error)
+            count_restarts = 1 if self.count_session_targets else count_restarts + 1
+            if count_restarts > self.max_chrome_restarts:
+                self.logger.error(f"Chrome crashed {count_restarts} times in a row, giving up")
+                return
+            self.logger.info(f"Relaunching Chrome ({count_restarts}/{self.max_chrome_restarts})...")
+
+    def targets_in_flight_fail(self, error: Exception):
+        """
+        This method is used to fail the targets the tabs had claimed when their session was lost.
+        """
+        targets = list(self.targets_in_flight.values())
+        self.targets_in_flight = {}
+        for keyword, latitude, longitude in targets:
+            self.target_fail(keyword, latitude, longitude, error)
+
+    async def session_async(self):
+        """
+        This method is used to launch Chrome and process targets in its tabs until the buffer is done or the module is stopped.
+        """
+        url_browser = await trio.to_thread.run_sync(self.launch_chrome)
+        try:
+            async with open_websocket_url(url_browser, max_message_size=self.max_message_size) as websocket:
+                connection = CDPConnection(websocket)
+                async with trio.open_nursery() as nursery:
+                    nursery.start_soon(connection.listen)
+                    async with trio.open_nursery() as nursery_tabs:
+                        for tab_id in range(self.tabs):
+                            nursery_tabs.start_soon(self.task_tab, connection, tab_id)
+                    nursery.cancel_scope.cancel()
+        finally:
+            self.close_chrome()
+
+    def task(self):
+        """
+        This method is used to run the module.
+        """
+        self.logger.info("Scraping task started (CDP).")
+        self.event_stop.clear()
+        self.logger.info(f"Delays -> URL load timeout: {self.timeout_url_load}, Scroll: {self.delay_scroll}, Target Iteration: {self.delay_target_iteration}")
+        self.logger.info(f"Scroll {self.max_scrolls} times")
+        self.logger.info(f"Tabs: {self.tabs}")
+        if self.enricher is not None:
+            self.enricher.start()
+            self.logger.info(f"Enricher workers: {self.enricher.workers}, queue size: {self.enricher.queue_size}")
+        trio.run(self.task_async)
+        self.logger.info("Scraping task ended.")
+        return 0
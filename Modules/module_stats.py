@@ -0,0 +1,173 @@
+import bisect
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+from threading import Lock, Thread
+
+
+# Histogram bucket upper bounds
+BUCKETS_SECONDS = (0.05, 0.1, 0.25, 0.5, 1., 2.5, 5., 10., 30., 60.)
+BUCKETS_PLACES = (0, 1, 5, 10, 20, 50, 100, 120, 200)
+
+
+class Histogram():
+    """
+    This class is used to count observations into cumulative buckets, as Prometheus histograms do.
+    """
+    __slots__ = ("buckets", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count: int = 0
+        self.sum: float = 0.
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "buckets": buckets,
+        }
+
+
+class ModuleStats():
+    """
+    This class is used to keep thread-safe counters, gauges and histograms of the scraping stages.
+    """
+
+    def __init__(self, prefix: str = "gmaps_scraper"):
+        self.prefix = prefix
+        self.lock = Lock()
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self.histograms: dict[str, Histogram] = {}
+        # Gauges read on demand, name -> function returning the value
+        self.gauge_functions: dict = {}
+
+    def counter_add(self, name: str, value: float = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge_set(self, name: str, value: float):
+        with self.lock:
+            self.gauges[name] = value
+
+    def gauge_function_set(self, name: str, function):
+        """
+        This method is used to register a gauge whose value is read by calling the function.
+        """
+        with self.lock:
+            self.gauge_functions[name] = function
+
+    def observe(self, name: str, value: float | None, buckets: tuple = BUCKETS_SECONDS):
+        """
+        This method is used to add a value to a histogram, None values are skipped.
+        """
+        if value is None:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(buckets)
+            histogram.observe(value)
+
+    def get(self) -> dict:
+        """
+        This method is used to get a snapshot of every counter, gauge and histogram.
+        """
+        with self.lock:
+            gauge_functions = list(self.gauge_functions.items())
+            stats = {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "histograms": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            }
+        for name, function in gauge_functions:
+            stats["gauges"][name] = function()
+        return stats
+
+    def render_prometheus(self) -> str:
+        """
+        This method is used to render the snapshot in the Prometheus text exposition format.
+        """
+        stats = self.get()
+        lines = []
+        for name, value in sorted(stats["counters"].items()):
+            lines += [f"# TYPE {self.prefix}_{name}_total counter", f"{self.prefix}_{name}_total {value}"]
+        for name, value in sorted(stats["gauges"].items()):
+            lines += [f"# TYPE {self.prefix}_{name} gauge", f"{self.prefix}_{name} {value}"]
+        for name, histogram in sorted(stats["histograms"].items()):
+            metric = f"{self.prefix}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, count in histogram["buckets"].items():
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+            lines += [
+                f'{metric}_bucket{{le="+Inf"}} {histogram["count"]}',
+                f"{metric}_sum {histogram['sum']}",
+                f"{metric}_count {histogram['count']}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+class StatsHandler(BaseHTTPRequestHandler):
+    server: "ModuleStatsServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = self.server.stats.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class ModuleStatsServer(ThreadingHTTPServer):
+    """
+    This class is used to serve the stats on /metrics for Prometheus.
+    """
+    daemon_threads = True
+
+    def __init__(self, stats: ModuleStats, host: str = "0.0.0.0", port: int = 9100, logger: logging.Logger | None = None):
+        super(ModuleStatsServer, self).__init__((host, port), StatsHandler)
+        self.stats = stats
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.thread: Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> "ModuleStatsServer":
+        self.thread = Thread(target=self.serve_forever, name="StatsServer", daemon=True)
+        self.thread.start()
+        self.logger.info(f"Stats served on {self.url}")
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,157 @@
+import heapq
+import itertools
+
+
+class ModuleTargetScheduler():
+    """
+    This class is used to queue (keyword, latitude, longitude) targets by priority.
+    Every keyword has its own heap, lower priorities are claimed first and keywords take turns
+    in proportion to their weights, so one large keyword can not starve the others.
+    A target is queued at most once: membership is a dict lookup and a claim costs O(k + log n) for k keywords.
+    It is not thread-safe, the owner guards it with its own lock.
+    """
+
+    def __init__(self, keyword_weights: dict[str, float] | None = None, is_fair: bool = True):
+        self.keyword_weights: dict[str, float] = dict(keyword_weights or {})
+        self.is_fair = is_fair
+
+        # Heap entries are [priority, sequence, latitude, longitude, is_valid], removed entries are invalidated in place
+        self.heaps: dict[str, list] = {}
+        self.entries: dict[tuple, list] = {}
+        self.count_invalid: dict[str, int] = {}
+        # Claimed targets with their priority
+        self.in_progress: dict[tuple, float] = {}
+        # Queued plus in-progress targets per keyword
+        self.counts: dict[str, int] = {}
+        # Virtual time of every keyword for weighted round robin
+        self.passes: dict[str, float] = {}
+        self.sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.entries) + len(self.in_progress)
+
+    def __contains__(self, target: tuple) -> bool:
+        return target in self.entries or target in self.in_progress
+
+    def count_free(self) -> int:
+        """
+        This method is used to count the queued targets which are not claimed.
+        """
+        return len(self.entries)
+
+    def count_keywords(self) -> int:
+        """
+        This method is used to count the keywords with queued or claimed targets.
+        """
+        return len(self.counts)
+
+    def add(self, keyword: str, latitude: str, longitude: str, priority: float = 0.) -> bool:
+        """
+        This method is used to queue a target, returns False if it is already queued or claimed.
+        """
+        target = (keyword, latitude, longitude)
+        if target in self.entries or target in self.in_progress:
+            return False
+        self.__push(target, priority)
+        self.counts[keyword] = self.counts.get(keyword, 0) + 1
+        return True
+
+    def __push(self, target: tuple, priority: float):
+        keyword, latitude, longitude = target
+        heap = self.heaps.get(keyword)
+        if heap is None:
+            heap = self.heaps[keyword] = []
+            self.count_invalid[keyword] = 0
+            # A keyword joining or returning late starts at the current virtual time instead of catching up
+            pass_current = min((self.passes[key] for key in self.heaps if key != keyword), default=None)
+            if pass_current is None:
+                self.passes.setdefault(keyword, 0.)
+            else:
+                self.passes[keyword] = max(self.passes.get(keyword, 0.), pass_current)
+        entry = [priority, next(self.sequence), latitude, longitude, True]
+        heapq.heappush(heap, entry)
+        self.entries[target] = entry
+
+    def claim(self):
+        """
+        This method is used to pop the next target and mark it claimed, None if nothing is queued.
+        """
+        keyword_best = None
+        key_best = None
+        for keyword in list(self.heaps):
+            heap = self.heaps[keyword]
+            while heap and not heap[0][4]:
+                heapq.heappop(heap)
+                self.count_invalid[keyword] -= 1
+            if not heap:
+                del self.heaps[keyword]
+                del self.count_invalid[keyword]
+                continue
+            key = (self.passes[keyword], heap[0][0], heap[0][1]) if self.is_fair else (heap[0][0], heap[0][1])
+            if key_best is None or key < key_best:
+                keyword_best, key_best = keyword, key
+        if keyword_best is None:
+            return None
+
+        priority, _, latitude, longitude, _ = heapq.heappop(self.heaps[keyword_best])
+        target = (keyword_best, latitude, longitude)
+        del self.entries[target]
+        self.in_progress[target] = priority
+        self.passes[keyword_best] += 1. / self.keyword_weights.get(keyword_best, 1.)
+        return target
+
+    def release(self, keyword: str, latitude: str, longitude: str, penalty: float = 0.):
+        """
+        This method is used to queue a claimed target again, its priority raised by the penalty.
+        """
+        target = (keyword, latitude, longitude)
+        if target not in self.in_progress:
+            return
+        priority = self.in_progress.pop(target)
+        self.__push(target, priority + penalty)
+
+    def remove(self, keyword: str, latitude: str, longitude: str) -> bool:
+        """
+        This method is used to forget a queued or claimed target, returns False if it is unknown.
+        """
+        target = (keyword, latitude, longitude)
+        entry = self.entries.pop(target, None)
+        if entry is not None:
+            entry[4] = False
+            self.count_invalid[keyword] += 1
+            # Heaps are compacted once most of their entries are removed ones
+            heap = self.heaps[keyword]
+            if self.count_invalid[keyword] > len(heap) // 2:
+                heap[:] = [entry for entry in heap if entry[4]]
+                heapq.heapify(heap)
+                self.count_invalid[keyword] = 0
+        elif target in self.in_progress:
+            del self.in_progress[target]
+        else:
+            return False
+
+        self.counts[keyword] -= 1
+        if not self.counts[keyword]:
+            # Only removed entries are left in the keyword's heap
+            del self.counts[keyword]
+            self.heaps.pop(keyword, None)
+            self.count_invalid.pop(keyword, None)
+            self.passes.pop(keyword, None)
+        return True
+
+    def clear(self):
+        self.heaps = {}
+        self.entries = {}
+        self.count_invalid = {}
+        self.in_progress = {}
+        self.counts = {}
+        self.passes = {}
+
+    def snapshot(self) -> dict[str, list[tuple[str, str]]]:
+        """
+        This method is used to get the queued and claimed targets as {keyword: [(latitude, longitude), ...]}.
+        """
+        targets: dict = {}
+        for keyword, latitude, longitude in itertools.chain(self.in_progress, self.entries):
+            targets.setdefault(keyword, []).append((latitude, longitude))
+        return targets
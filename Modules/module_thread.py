@@ -1,14 +1,15 @@
 
 from abc import ABC  # , abstractmethod
 import logging
-from threading import Lock, Thread
+from threading import Event, Lock, Thread
 import time
 
 from Modules.module_logger import ModuleLogger
+from Modules.module_tracer import TRACER, ModuleSamplingProfiler
 
 
 class ModuleThread(ABC, Thread):
-    def __init__(self, logger=None, logger_name: str = "", logger_level_stdo: int = logging.DEBUG, logger_level_file: int = logging.DEBUG, logger_file_path: str = "", mode="a", maxBytes=1 * 1024 * 1024, backupCount=5, *args, **kwargs):
+    def __init__(self, logger=None, logger_name: str = "", logger_level_stdo: int = logging.DEBUG, logger_level_file: int = logging.DEBUG, logger_file_path: str = "", mode="a", maxBytes=1 * 1024 * 1024, backupCount=5, logger_is_json: bool = False, *args, **kwargs):
         super(ModuleThread, self).__init__(*args, **kwargs)
 
         # # Log Collection Lock # #
@@ -26,7 +27,8 @@ class ModuleThread(ABC, Thread):
                 logger_level_file=logger_level_file,
                 mode=mode,
                 maxBytes=maxBytes,
-                backupCount=backupCount
+                backupCount=backupCount,
+                logger_is_json=logger_is_json
             )
             self.logger = self.module_logger.get_Logger()
         else:
@@ -43,9 +45,21 @@ class ModuleThread(ABC, Thread):
         self.is_running = False
         self.is_finished = False
 
+        # Events
+        # event_wake wakes the idle thread on start_Task and stop_Thread, event_idle is set while no task runs
+        self.event_wake = Event()
+        self.event_idle = Event()
+        self.event_idle.set()
+
         # Configuration
         self.daemon = True
 
+        # Tracing, off unless trace_path is set before the task starts
+        # Spans are written as Chrome trace-event JSON, samples of the sampling profiler as folded stacks
+        self.trace_path: str = ""
+        self.trace_sampling_interval: float = 0.
+        self.profiler: ModuleSamplingProfiler | None = None
+
     def run(self) -> None:
         self.is_running = False
         self.is_finished = False
@@ -55,12 +69,19 @@ class ModuleThread(ABC, Thread):
 
                 self.is_running = True
                 self.is_finished = False
+                self.event_idle.clear()
 
                 self.before_task_call()
-                response = self.task(
-                    **self.get_Parameters()
-                )
-                self.after_task_call()
+                try:
+                    response = self.task(
+                        **self.get_Parameters()
+                    )
+                except Exception:
+                    # A crashed task must still end its waiters, see wait_To_Stop_Task
+                    self.logger.exception("Task Failed")
+                    response = 1
+                finally:
+                    self.after_task_call()
 
                 self.is_running = False
 
@@ -71,12 +92,17 @@ class ModuleThread(ABC, Thread):
                     self.logger.warning("Task Manually Stopped")
 
                 self.stop_Task()
-                time.sleep(1)
-            time.sleep(1)
+                self.event_idle.set()
+
+            # Sleep until the task is started again or the thread is stopped
+            self.event_wake.wait()
+            self.event_wake.clear()
+        self.event_idle.set()
 
     def stop_Thread(self) -> int:
         self._flag_thread_stop = True
         self._flag_task_stop = True
+        self.event_wake.set()
         self.join()
         self.logger.warning("Thread Stopped")
         return 0
@@ -92,9 +118,9 @@ class ModuleThread(ABC, Thread):
     def wait_To_Stop_Once_Task(self) -> int:
         self.logger.warning("Waiting to stop task once...")
 
-        time.sleep(1)  # Wait for the thread to start
-        while self.is_Running():
-            time.sleep(1)
+        if not self.wait_idle():
+            self.logger.error("Thread died before the task stopped")
+            return 1
 
         self.logger.warning("Task once stopped...")
         return 0
@@ -102,13 +128,30 @@ class ModuleThread(ABC, Thread):
     def wait_To_Stop_Task(self) -> int:
         self.logger.warning("Waiting to stop task fully...")
 
-        time.sleep(1)  # Wait for the thread to start
-        while self.is_Running() and self.is_Thread_Started():
-            time.sleep(1)
+        # event_idle is cleared by start_Task, so a task which has not started yet is waited for as well
+        if not self.wait_idle():
+            self.logger.error("Thread died before the task stopped")
+            return 1
 
         self.logger.warning("Task fully stopped...")
         return 0
 
+    def wait_idle(self, poll_interval: float = 1.) -> bool:
+        """
+        Waits until no task runs, returns False if the thread died first.
+        The thread is checked every poll_interval seconds, so a dead thread can not block the waiter.
+        """
+        while not self.event_idle.wait(poll_interval):
+            if not self.is_alive():
+                return self.event_idle.is_set()
+        return True
+
+    def is_Task_Alive(self) -> bool:
+        """
+        Returns True while the task runs or is about to start in a living thread.
+        """
+        return self.is_alive() and not self.event_idle.is_set()
+
     def is_Running(self) -> bool:
         return self.is_running
 
@@ -142,6 +185,8 @@ class ModuleThread(ABC, Thread):
             return 1
 
         self._flag_task_stop = False
+        self.event_idle.clear()
+        self.event_wake.set()
         self.logger.info("Task Started")
         return 0
 
@@ -166,12 +211,36 @@ class ModuleThread(ABC, Thread):
         raise NotImplementedError
 
     def before_task_call(self):
-        #  Re-Write before_task_call Function
-        pass
+        #  Re-Write before_task_call Function, call super to keep tracing
+        self.trace_start()
 
     def after_task_call(self):
-        #  Re-Write after_task_call Function
-        pass
+        #  Re-Write after_task_call Function, call super to keep tracing
+        self.trace_stop()
+
+    def trace_start(self):
+        if not self.trace_path:
+            return
+        TRACER.start()
+        if self.trace_sampling_interval > 0:
+            self.profiler = ModuleSamplingProfiler(interval=self.trace_sampling_interval)
+            self.profiler.start()
+        self.trace_span = TRACER.span("task", category="thread", thread=self.name)
+        self.trace_span.__enter__()
+        self.logger.info(f"Tracing to {self.trace_path}")
+
+    def trace_stop(self):
+        if not self.trace_path or not TRACER.is_enabled:
+            return
+        self.trace_span.__exit__(None, None, None)
+        TRACER.stop()
+        TRACER.save(self.trace_path)
+        self.logger.info(f"Trace saved to {self.trace_path}")
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler.save(f"{self.trace_path}.folded")
+            self.logger.info(f"Profile samples saved to {self.trace_path}.folded")
+            self.profiler = None
 
     def sleep(self, ms: float = 0):
         time.sleep(ms)
@@ -0,0 +1,176 @@
+import math
+from threading import Lock
+
+
+def point_in_polygon(latitude: float, longitude: float, polygon: list[tuple[float, float]]) -> bool:
+    """
+    Ray casting test of a point against a polygon given as [(latitude, longitude), ...].
+    """
+    is_inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lat_i > latitude) != (lat_j > latitude):
+            lon_cross = lon_i + (latitude - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if longitude < lon_cross:
+                is_inside = not is_inside
+        j = i
+    return is_inside
+
+
+class Tile():
+    """
+    A rectangular search area, scraped from its center at the given zoom.
+    """
+    __slots__ = ("lat_min", "lon_min", "lat_max", "lon_max", "zoom")
+
+    def __init__(self, lat_min: float, lon_min: float, lat_max: float, lon_max: float, zoom: int):
+        self.lat_min = lat_min
+        self.lon_min = lon_min
+        self.lat_max = lat_max
+        self.lon_max = lon_max
+        self.zoom = zoom
+
+    @property
+    def center(self) -> tuple[str, str]:
+        """
+        Center of the tile as the (latitude, longitude) strings used by the scraper targets.
+        """
+        return (
+            f"{(self.lat_min + self.lat_max) / 2:.7f}",
+            f"{(self.lon_min + self.lon_max) / 2:.7f}"
+        )
+
+    def split(self) -> list["Tile"]:
+        """
+        Splits the tile into four quadrants one zoom level finer.
+        """
+        lat_mid = (self.lat_min + self.lat_max) / 2
+        lon_mid = (self.lon_min + self.lon_max) / 2
+        return [
+            Tile(self.lat_min, self.lon_min, lat_mid, lon_mid, self.zoom + 1),
+            Tile(self.lat_min, lon_mid, lat_mid, self.lon_max, self.zoom + 1),
+            Tile(lat_mid, self.lon_min, self.lat_max, lon_mid, self.zoom + 1),
+            Tile(lat_mid, lon_mid, self.lat_max, self.lon_max, self.zoom + 1),
+        ]
+
+    def intersects(self, polygon: list[tuple[float, float]]) -> bool:
+        """
+        Checks whether the tile overlaps the polygon by its center, its corners or the polygon's vertices.
+        """
+        points = [
+            ((self.lat_min + self.lat_max) / 2, (self.lon_min + self.lon_max) / 2),
+            (self.lat_min, self.lon_min),
+            (self.lat_min, self.lon_max),
+            (self.lat_max, self.lon_min),
+            (self.lat_max, self.lon_max),
+        ]
+        if any(point_in_polygon(latitude, longitude, polygon) for latitude, longitude in points):
+            return True
+        return any(
+            self.lat_min <= latitude <= self.lat_max and self.lon_min <= longitude <= self.lon_max
+            for latitude, longitude in polygon
+        )
+
+
+class ModuleTilePlanner():
+    """
+    This class is used to cover a bounding box or polygon with search tiles.
+    A tile whose feed comes back saturated is split into four finer-zoom tiles,
+    so dense areas are covered completely while sparse areas are scraped once.
+    """
+
+    def __init__(
+        self,
+        bbox: list[float] | None = None,
+        polygon: list[list[float]] | None = None,
+        zoom: int = 12,
+        max_zoom: int = 17,
+        saturation: int = 100,
+        viewport_tiles: float = 4.
+    ):
+        if polygon:
+            self.polygon = [(float(latitude), float(longitude)) for latitude, longitude in polygon]
+            latitudes = [latitude for latitude, _ in self.polygon]
+            longitudes = [longitude for _, longitude in self.polygon]
+            bbox = [min(latitudes), min(longitudes), max(latitudes), max(longitudes)]
+        else:
+            self.polygon = []
+        if not bbox:
+            raise ValueError("Tile planner needs a bbox or a polygon")
+
+        self.lat_min, self.lon_min, self.lat_max, self.lon_max = map(float, bbox)
+        self.zoom = zoom
+        self.max_zoom = max_zoom
+        self.saturation = saturation
+
+        # Width of the browser viewport in 256 px map tiles
+        self.viewport_tiles = viewport_tiles
+
+        # Planned tiles by their center
+        self.tiles: dict[tuple[str, str], Tile] = {}
+        self.tiles_lock = Lock()
+
+    def tile_span(self, zoom: int, latitude: float) -> tuple[float, float]:
+        """
+        Returns the (latitude, longitude) span in degrees which one viewport covers at the zoom.
+        """
+        span_longitude = 360. / (2 ** zoom) * self.viewport_tiles
+        span_latitude = span_longitude * math.cos(math.radians(latitude))
+        return span_latitude, span_longitude
+
+    def plan(self) -> list[Tile]:
+        """
+        This method is used to generate the initial grid of tiles at the start zoom.
+        """
+        tiles = []
+        latitude = self.lat_min
+        while latitude < self.lat_max:
+            span_latitude, span_longitude = self.tile_span(self.zoom, latitude)
+            lat_top = min(latitude + span_latitude, self.lat_max)
+            longitude = self.lon_min
+            while longitude < self.lon_max:
+                lon_right = min(longitude + span_longitude, self.lon_max)
+                tile = Tile(latitude, longitude, lat_top, lon_right, self.zoom)
+                if not self.polygon or tile.intersects(self.polygon):
+                    tiles.append(tile)
+                longitude = lon_right
+            latitude = lat_top
+
+        with self.tiles_lock:
+            for tile in tiles:
+                self.tiles[tile.center] = tile
+        return tiles
+
+    def subdivide(self, latitude: str, longitude: str, count_results: int) -> list[Tile]:
+        """
+        This method is used to split a tile when its result count shows the feed was saturated.
+        Returns the new tiles, none if the tile is unknown, not saturated or at the maximum zoom.
+        """
+        with self.tiles_lock:
+            tile = self.tiles.get((latitude, longitude))
+            if tile is None or count_results < self.saturation or tile.zoom >= self.max_zoom:
+                return []
+
+            tiles = [
+                tile_sub for tile_sub in tile.split()
+                if tile_sub.center not in self.tiles and (not self.polygon or tile_sub.intersects(self.polygon))
+            ]
+            for tile_sub in tiles:
+                self.tiles[tile_sub.center] = tile_sub
+        return tiles
+
+    def tile_register(self, latitude: str, longitude: str, zoom: int) -> Tile:
+        """
+        This method is used to restore a planned tile, e.g. from the job store when resuming.
+        """
+        span_latitude, span_longitude = self.tile_span(zoom, float(latitude))
+        tile = Tile(
+            float(latitude) - span_latitude / 2, float(longitude) - span_longitude / 2,
+            float(latitude) + span_latitude / 2, float(longitude) + span_longitude / 2,
+            zoom
+        )
+        with self.tiles_lock:
+            self.tiles[(latitude, longitude)] = tile
+        return tile
@@ -0,0 +1,192 @@
+from collections import Counter
+import json
+import os
+from pathlib import Path
+import sys
+from threading import Lock, Thread, current_thread, get_native_id
+import time
+
+
+class NullSpan():
+    """
+    Span returned while tracing is off, entering and leaving it does nothing.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span():
+    __slots__ = ("tracer", "name", "category", "args", "tid", "time_start")
+
+    def __init__(self, tracer: "ModuleTracer", name: str, category: str, args: dict, tid: int | None):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.tid = tid
+        self.time_start: int = 0
+
+    def __enter__(self):
+        self.time_start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.args["error"] = repr(exc_value)
+        self.tracer.event_complete(self.name, self.category, self.time_start, time.perf_counter_ns(), self.args, self.tid)
+        return False
+
+
+class ModuleTracer():
+    """
+    This class is used to record spans as Chrome trace events, which can be loaded in Perfetto or chrome://tracing.
+    While it is disabled, span returns a shared no-op span so instrumented code pays a single attribute check.
+    """
+
+    def __init__(self):
+        self.is_enabled: bool = False
+        self.lock = Lock()
+        self.events: list[dict] = []
+        self.thread_names: dict[int, str] = {}
+        self.pid = os.getpid()
+        self.time_origin: int = time.perf_counter_ns()
+
+    def start(self):
+        """
+        This method is used to drop the recorded events and start recording.
+        """
+        with self.lock:
+            self.events = []
+            self.thread_names = {}
+            self.time_origin = time.perf_counter_ns()
+        self.is_enabled = True
+
+    def stop(self):
+        self.is_enabled = False
+
+    def span(self, name: str, category: str = "scraper", tid: int | None = None, **args):
+        """
+        This method is used to get a context manager which records its block as a complete event.
+        tid places the span on its own track, e.g. for trio tasks sharing a thread.
+        """
+        if not self.is_enabled:
+            return NULL_SPAN
+        return Span(self, name, category, args, tid)
+
+    def instant(self, name: str, category: str = "scraper", tid: int | None = None, **args):
+        """
+        This method is used to record a point in time.
+        """
+        if not self.is_enabled:
+            return
+        tid = self.__tid(tid)
+        event = {
+            "name": name, "cat": category, "ph": "i", "s": "t",
+            "ts": (time.perf_counter_ns() - self.time_origin) / 1000,
+            "pid": self.pid, "tid": tid, "args": args
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def event_complete(self, name: str, category: str, time_start: int, time_end: int, args: dict, tid: int | None = None):
+        tid = self.__tid(tid)
+        event = {
+            "name": name, "cat": category, "ph": "X",
+            "ts": (time_start - self.time_origin) / 1000,
+            "dur": (time_end - time_start) / 1000,
+            "pid": self.pid, "tid": tid, "args": args
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def track_name_set(self, tid: int, name: str):
+        """
+        This method is used to name a track of spans recorded with an explicit tid.
+        """
+        with self.lock:
+            self.thread_names[tid] = name
+
+    def __tid(self, tid: int | None) -> int:
+        if tid is not None:
+            return tid
+        tid = get_native_id()
+        if tid not in self.thread_names:
+            with self.lock:
+                self.thread_names[tid] = current_thread().name
+        return tid
+
+    def save(self, path: str | Path):
+        """
+        This method is used to write the recorded events as Chrome trace-event JSON.
+        """
+        with self.lock:
+            events = list(self.events)
+            threads = dict(self.thread_names)
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, file, default=str)
+
+
+class ModuleSamplingProfiler():
+    """
+    This class is used to sample the Python stacks of every thread at a fixed interval.
+    The samples are saved as folded stacks ("outer;inner count" lines) for speedscope or flamegraph.pl.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.is_running: bool = False
+        self.thread: Thread | None = None
+
+    def start(self):
+        self.samples = Counter()
+        self.is_running = True
+        self.thread = Thread(target=self.__sample_loop, name="SamplingProfiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.is_running = False
+        if self.thread is not None:
+            self.thread.join()
+
+    def __sample_loop(self):
+        ident_self = self.thread.ident
+        while self.is_running:
+            for ident, frame in sys._current_frames().items():
+                if ident == ident_self:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def save(self, path: str | Path):
+        """
+        This method is used to write the samples as folded stacks.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self.samples.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+# Process-wide tracer, static helpers record into it as well
+TRACER = ModuleTracer()
@@ -0,0 +1,114 @@
+"""
+Memory benchmark of the in-memory results buffer.
+
+Fills the buffer_results structure with synthetic places, once as the nested dicts of place dicts
+the scraper used to keep and once as a ModuleResultTable, and reports the bytes per place measured
+with tracemalloc. No browser is needed.
+
+    python benchmark_memory.py --places 1000000
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+
+from Modules.module_result_table import ModuleResultTable, Place
+
+
+def arg_parser():
+    parser = argparse.ArgumentParser(description="GMaps Scraper results memory benchmark")
+    parser.add_argument("--places", type=int, default=1_000_000, help="Places to hold in memory.")
+    parser.add_argument("--places-per-target", type=int, default=120, help="Places of every target, a full Maps feed.")
+    parser.add_argument("--keywords", type=int, default=10, help="Keywords the targets are spread over.")
+    parser.add_argument("--output", type=str, default="", help="Save the results as JSON.")
+    return parser.parse_args()
+
+
+def targets_generate(count_places: int, places_per_target: int, count_keywords: int) -> list[tuple[str, str, str, list[dict]]]:
+    """
+    Generates (keyword, latitude, longitude, places) targets with fields shaped like real listings.
+    """
+    targets = []
+    for index_target in range((count_places + places_per_target - 1) // places_per_target):
+        places = []
+        for index in range(index_target * places_per_target, min(count_places, (index_target + 1) * places_per_target)):
+            places.append({
+                "name": f"Business {index}",
+                "address": f"{index % 500} Example Street, District {index % 40}",
+                "phone": f"+90 212 {index % 1000:03d} {index % 10000:04d}" if index % 3 else None,
+                "website": f"https://business{index}.example.com/" if index % 2 else None,
+                "url": f"https://www.google.com/maps/place/Business+{index}/data=!4m2!3m1!1s0x0:0x{index:x}",
+            })
+        targets.append((f"keyword {index_target % count_keywords}", f"{41 + index_target / 1e4:.4f}", "29.0000", places))
+    return targets
+
+
+def measure(build) -> tuple[int, object]:
+    """
+    Returns the bytes allocated by build and what it built, which is kept alive until measured.
+    """
+    gc.collect()
+    tracemalloc.start()
+    built = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, built
+
+
+def build_dicts(targets: list) -> dict:
+    # The nested dict of place dicts kept before ModuleResultTable, keys are copies as read from JSON or SQLite
+    results: dict = {}
+    for keyword, latitude, longitude, places in targets:
+        key_location = ("%s" % latitude, "%s" % longitude)
+        results.setdefault("%s" % keyword, {})[key_location] = [dict(place) for place in places]
+    return results
+
+
+def build_records(targets: list) -> dict:
+    results: dict = {}
+    for keyword, latitude, longitude, places in targets:
+        keyword, location = ModuleResultTable.key("%s" % keyword, "%s" % latitude, "%s" % longitude)
+        results.setdefault(keyword, {})[location] = [Place.from_dict(place) for place in places]
+    return results
+
+
+def build_table(targets: list) -> ModuleResultTable:
+    table = ModuleResultTable()
+    for keyword, latitude, longitude, places in targets:
+        table.extend("%s" % keyword, "%s" % latitude, "%s" % longitude, places)
+    return table
+
+
+def main():
+    args = arg_parser()
+    print(f" > Generating {args.places} places")
+    size_strings, targets = measure(lambda: targets_generate(args.places, args.places_per_target, args.keywords))
+    # The generated dicts are containers too, only their strings are shared by every layout
+    size_generated_dicts, _ = measure(lambda: [dict(place) for *_, places in targets for place in places])
+    size_strings -= size_generated_dicts
+    count_places = sum(len(places) for *_, places in targets)
+
+    results = {"places": count_places, "string_bytes_per_place": size_strings / count_places}
+    for name, build in (("dicts", build_dicts), ("records", build_records), ("table", build_table)):
+        size, built = measure(lambda: build(targets))
+        results[name] = {
+            "bytes_per_place": size / count_places,
+            "bytes_per_place_with_strings": (size + size_strings) / count_places,
+            "megabytes": size / 2 ** 20,
+        }
+        print(
+            f" > {name:<8} {results[name]['bytes_per_place']:>7.1f} bytes per place, "
+            f"{results[name]['bytes_per_place_with_strings']:>7.1f} with strings, {results[name]['megabytes']:.1f} MB"
+        )
+        del built
+
+    print(f" > Strings {results['string_bytes_per_place']:.1f} bytes per place, shared by every layout")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+        print(f" > Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Offline benchmark of the scraping hot path.
+
+Runs scroll_results, extract_places and full task() sweeps against the local fixture server
+and reports places/second. No network is needed, only Chrome and ChromeDriver.
+
+    python benchmark_scraper.py --output bench.json
+    python benchmark_scraper.py --baseline bench.json --tolerance 0.2
+"""
+
+import argparse
+from dataclasses import asdict
+import json
+import sys
+import time
+
+from Library.fixture_server_gmaps import FixtureConfig, FixtureServer
+from Modules.module_scraper_gmaps import ModuleScraperGMaps
+
+
+# Feed shapes the benchmarks run against
+SCENARIOS = {
+    "dense": FixtureConfig(cards=120, batch=20, latency_first_card=0.1, latency_scroll=0.2),
+    "sparse": FixtureConfig(cards=15, batch=15, latency_first_card=0.1, latency_scroll=0.2),
+    "missing_fields": FixtureConfig(cards=120, batch=40, missing_phone=1., missing_website=1., missing_address=1.),
+    "slow": FixtureConfig(cards=60, batch=20, latency_page=0.5, latency_first_card=1., latency_scroll=0.8),
+}
+
+
+def arg_parser():
+    parser = argparse.ArgumentParser(description="GMaps Scraper offline benchmark")
+    parser.add_argument("--headless", type=int, default=1, help="Run Chrome headless (1) or not (0).")
+    parser.add_argument("--workers", type=int, default=2, help="Workers of the full sweep benchmark.")
+    parser.add_argument("--targets", type=int, default=8, help="Targets of the full sweep benchmark.")
+    parser.add_argument("--max-scrolls", type=int, default=10, help="Scroll cap per target.")
+    parser.add_argument("--output", type=str, default="", help="Save the results as JSON.")
+    parser.add_argument("--baseline", type=str, default="", help="Compare with a saved result and fail on regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed places/second drop against the baseline.")
+    parser.add_argument("--timeout", type=float, default=600., help="Seconds the full sweep of a scenario may take before the benchmark fails.")
+    return parser.parse_args()
+
+
+def load_page(scraper: ModuleScraperGMaps, keyword: str = "bench", latitude: str = "41.0", longitude: str = "29.0") -> float:
+    """
+    Opens a fixture page and waits for its first card, returns the time to first card.
+    """
+    time_start = time.time()
+    scraper.web_driver.get(scraper.build_maps_search_url(keyword, latitude, longitude, zoom=scraper.zoom))
+    scraper.wait_results_ready(
+        driver=scraper.web_driver,
+        xpath_results=scraper.xpath_results,
+        timeout=10.
+    )
+    return time.time() - time_start
+
+
+def count_cards(scraper: ModuleScraperGMaps) -> int:
+    return scraper.web_driver.execute_script(
+        "return document.getElementsByClassName(arguments[0]).length;", scraper.xpath_results
+    )
+
+
+def bench_scroll(scraper: ModuleScraperGMaps, max_scrolls: int) -> dict:
+    """
+    Times both scroll modes, the loaded cards per second are reported as places_per_second to be compared.
+    """
+    results = {}
+
+    load_page(scraper)
+    time_start = time.time()
+    scraper.scroll_results(driver=scraper.web_driver, pause_time=scraper.delay_scroll, max_scrolls=max_scrolls)
+    seconds = time.time() - time_start
+    count = count_cards(scraper)
+    results["fixed"] = {
+        "seconds": seconds,
+        "cards": count,
+        "places_per_second": count / seconds if seconds else 0.
+    }
+
+    load_page(scraper)
+    time_start = time.time()
+    reason, count = scraper.scroll_results_adaptive(
+        driver=scraper.web_driver,
+        xpath_results=scraper.xpath_results,
+        timeout_stall=scraper.delay_scroll,
+        max_scrolls=max_scrolls
+    )
+    seconds = time.time() - time_start
+    results["adaptive"] = {
+        "seconds": seconds,
+        "cards": count,
+        "reason": reason,
+        "places_per_second": count / seconds if seconds else 0.
+    }
+    return results
+
+
+def bench_extract(scraper: ModuleScraperGMaps, max_scrolls: int) -> dict:
+    results = {}
+    load_page(scraper)
+    scraper.scroll_results_adaptive(
+        driver=scraper.web_driver,
+        xpath_results=scraper.xpath_results,
+        timeout_stall=scraper.delay_scroll,
+        max_scrolls=max_scrolls
+    )
+    xpaths = dict(
+        xpath_results=scraper.xpath_results,
+        xpath_name=scraper.xpath_name,
+        xpath_address=scraper.xpath_address,
+        xpath_phone=scraper.xpath_phone,
+        xpath_website=scraper.xpath_website,
+        xpath_url=scraper.xpath_url
+    )
+    for mode, extract in (("element", scraper.extract_places), ("js", scraper.extract_places_js)):
+        time_start = time.time()
+        places = extract(driver=scraper.web_driver, **xpaths)
+        seconds = time.time() - time_start
+        results[mode] = {
+            "seconds": seconds,
+            "places": len(places),
+            "places_per_second": len(places) / seconds if seconds else 0.
+        }
+    return results
+
+
+def bench_task(scraper: ModuleScraperGMaps, targets: int, timeout: float) -> dict:
+    """
+    Runs a full sweep, raises a TimeoutError if it takes longer than timeout seconds.
+    """
+    for index in range(targets):
+        scraper.target_add(f"bench{index}", "41.0", f"{29.0 + index / 100:.2f}")
+
+    time_start = time.time()
+    scraper.start_Thread(start_task=True)
+    if not scraper.target_wait_empty(timeout=timeout):
+        raise TimeoutError(f"{scraper.target_get_count_coordinates()} targets left after {timeout} seconds")
+    seconds = time.time() - time_start
+
+    count_places = sum(len(places) for pack in scraper.results_get().values() for places in pack.values())
+    return {
+        "seconds": seconds,
+        "targets": targets,
+        "places": count_places,
+        "places_per_second": count_places / seconds if seconds else 0.
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Returns the places/second figures which dropped more than the tolerance against the baseline.
+    """
+    regressions = []
+
+    def walk(current: dict, previous: dict, path: str):
+        for key, value in current.items():
+            if key not in previous:
+                continue
+            if isinstance(value, dict):
+                walk(value, previous[key], f"{path}/{key}")
+            elif key == "places_per_second" and previous[key] and value < previous[key] * (1 - tolerance):
+                regressions.append(f"{path}: {value:.1f} < {previous[key]:.1f} places/second")
+
+    walk(results, baseline, "")
+    return regressions
+
+
+def main():
+    args = arg_parser()
+    server = FixtureServer().start()
+    print(f" > Fixture server on {server.url_base}")
+
+    results = {}
+    failures = []
+    for name, config in SCENARIOS.items():
+        server.config = config
+        print(f" > Scenario '{name}': {asdict(config)}")
+
+        scraper = ModuleScraperGMaps(headless=bool(args.headless), logger_level_stdo=30)
+        scraper.url_gmaps_keyword = server.url_gmaps_keyword
+        scraper.delay_scroll = max(1., 2 * config.latency_scroll)
+        results[name] = {
+            "scroll": bench_scroll(scraper, args.max_scrolls),
+            "extract": bench_extract(scraper, args.max_scrolls),
+        }
+        scraper.stop()
+
+        scraper = ModuleScraperGMaps(headless=bool(args.headless), workers=args.workers, logger_level_stdo=30)
+        scraper.url_gmaps_keyword = server.url_gmaps_keyword
+        scraper.set_search_parameters(max_scrolls=args.max_scrolls)
+        scraper.delay_scroll = max(1., 2 * config.latency_scroll)
+        scraper.delay_target_iteration = 0.
+        # The scraper is measured, not the request pacing or a warm spare Chrome
+        scraper.rate_limiter.rate = 0
+        scraper.driver_manager.count_spares = 0
+        try:
+            results[name]["task"] = bench_task(scraper, args.targets, args.timeout)
+            scraper.stop()
+            scraper.stop_Thread()
+        except (TimeoutError, RuntimeError) as error:
+            # A stuck or crashed sweep fails the benchmark instead of hanging it,
+            # its daemon thread is not joined as a stuck worker may never return
+            results[name]["task"] = {"error": str(error)}
+            failures.append(f"{name}/task: {error}")
+            scraper.stop()
+
+        print(json.dumps(results[name], indent=4))
+
+    server.stop()
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=4)
+        print(f" > Results saved to {args.output}")
+
+    for failure in failures:
+        print(f" > Failed {failure}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f" > Regression {regression}")
+        if regressions:
+            sys.exit(1)
+        print(" > No regressions against the baseline.")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,11 +9,26 @@ and sending personalized emails.
 """
 
 import argparse
+import json
+import logging
+import os
+from pathlib import Path
+import socket
 import time
 
-from paths import DIR_LOGGER_MAIN, DIR_LOGGER_SCRAPER
+from paths import DIR_JOB_STORE, DIR_LOGGER_MAIN, DIR_LOGGER_SCRAPER, DIR_RESULT_CACHE
 from Library.tools import create_logger, read_yaml, saveJsonFile
-from Modules.module_scraper_gmaps import ModuleScraperGMaps
+from Library.work_plan import config_validate, locations_parse, plan_build, plan_format
+# The scraper engines pull in selenium and trio, they are imported once a run actually scrapes
+from Modules.module_enricher import ModuleEnricher
+from Modules.module_job_queue import ModuleJobQueueClient, ModuleJobQueueServer
+from Modules.module_job_store import STATE_DONE, STATE_FAILED, STATE_IN_PROGRESS, STATE_PENDING, STATES, ModuleJobStore
+from Modules.module_place_index import ModulePlaceIndex
+from Modules.module_result_cache import ModuleResultCache
+from Modules.module_result_store import ModuleResultStore
+from Modules.module_result_sink import create_result_sink
+from Modules.module_stats import ModuleStatsServer
+from Modules.module_tile_planner import ModuleTilePlanner
 
 
 def arg_parser():
@@ -25,21 +40,117 @@ def arg_parser():
         default="",
         help="Path to the YAML configuration file."
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the previous run from the job store instead of starting over."
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=None,
+        help="Serve cached results younger than this many seconds, overrides cache_ttl."
+    )
+    parser.add_argument(
+        "--serve-queue",
+        type=str,
+        default="",
+        help="Serve the job store as a shared queue on HOST:PORT for scrapers on other hosts."
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Validate the configuration and print the work plan with an estimated runtime, without starting Chrome."
+    )
+
+    # "main.py query ..." looks places up in the result store instead of scraping
+    subparsers = parser.add_subparsers(dest="command")
+    parser_query = subparsers.add_parser("query", help="Query the places in the result store, one JSON object per line.")
+    parser_query.add_argument("--store", type=str, default="", help="Result store path, defaults to result_store of the configuration.")
+    parser_query.add_argument("--keyword", type=str, default="", help="Places found under this keyword.")
+    parser_query.add_argument("--near", type=str, default="", help="Places found by searches within --radius of \"LAT, LON\".")
+    parser_query.add_argument("--radius", type=float, default=5., help="Radius of --near in kilometers.")
+    parser_query.add_argument("--phone", type=str, default="", help="Places with this phone number.")
+    parser_query.add_argument("--website", type=str, default="", help="Places with this website.")
+    parser_query.add_argument("--has-website", action="store_true", default=None, help="Only places with a website.")
+    parser_query.add_argument("--limit", type=int, default=100, help="Maximum number of places, newest first.")
+    parser_query.add_argument("--count", action="store_true", help="Print the number of places per keyword instead.")
 
     return parser.parse_args()
 
 
+def plan(config: dict, args, logger: logging.Logger) -> int:
+    """
+    Logs the work plan of the configuration: targets per keyword, the ones done in the job store
+    (with --resume or a job queue) or fresh in the cache, and the estimated runtime.
+    Nothing is written and neither selenium nor Chrome is started.
+    """
+    targets_stored = []
+    targets_done = set()
+    job_queue = config.get("job_queue", "")
+    path_job_store = Path(job_queue or config.get("job_store", DIR_JOB_STORE))
+    job_store = None
+    if job_queue.startswith("http://"):
+        job_store = ModuleJobQueueClient(job_queue)
+    elif (job_queue or args.resume) and path_job_store.exists():
+        job_store = ModuleJobStore(path_job_store, is_read_only=True)
+    if job_store is not None:
+        try:
+            targets_stored = job_store.targets_get(states=(STATE_PENDING, STATE_IN_PROGRESS, STATE_FAILED))
+            targets_done = {tuple(target[:3]) for target in job_store.targets_get(states=(STATE_DONE,))}
+        except OSError as error:
+            logger.warning(f"Job queue is not reachable, planning without it -> {error}")
+        job_store.close()
+
+    result_cache = None
+    path_cache = Path(config.get("cache", DIR_RESULT_CACHE))
+    if config.get("cache_ttl", 0) > 0 and path_cache.exists():
+        result_cache = ModuleResultCache(path_cache, ttl=config["cache_ttl"], is_read_only=True)
+
+    work_plan = plan_build(config, targets_stored, targets_done, result_cache=result_cache, max_age=args.max_age)
+    if result_cache is not None:
+        result_cache.close()
+    for line in plan_format(work_plan):
+        logger.info(line)
+    return 0
+
+
+def query(config: dict, args) -> int:
+    """
+    Prints the places of the result store matching the query arguments as JSON lines.
+    """
+    path = Path(args.store or config.get("result_store") or "results.sqlite")
+    if not path.exists():
+        print(f"Result store not found: {path}")
+        return 1
+    result_store = ModuleResultStore(path)
+    try:
+        if args.count:
+            print(json.dumps(result_store.keywords_count(), ensure_ascii=False, indent=4))
+            return 0
+        near = None
+        if args.near:
+            latitude, longitude = args.near.split(",")
+            near = (float(latitude), float(longitude))
+        places = result_store.places_query(
+            keyword=args.keyword,
+            near=near,
+            radius_km=args.radius,
+            phone=args.phone,
+            website=args.website,
+            has_website=args.has_website,
+            limit=args.limit
+        )
+        for place in places:
+            print(json.dumps(place, ensure_ascii=False))
+    finally:
+        result_store.close()
+    return 0
+
+
 def main():
     """Main entry point for the application."""
 
-    # Create logger
-    logger = create_logger(
-        name="GMaps Scraper",
-        path=DIR_LOGGER_MAIN,
-        maxBytes=1 * 1024 * 1024,
-    )
-    logger.info("Starting GMaps Scraper...")
-
     # Parse command-line arguments
     args = arg_parser()
 
@@ -48,68 +159,310 @@ def main():
         args.config = "config.yaml"
     config = read_yaml(args.config)
 
+    # Queries only read the result store, they start without a logger
+    if args.command == "query":
+        return query(config, args)
+
+    # Create logger
+    # Records are written by a background thread, levels gate them before they are queued
+    log_level = logging.getLevelName(config.get("log_level", "DEBUG").upper())
+    log_level_file = logging.getLevelName(config.get("log_level_file", "DEBUG").upper())
+    log_json = config.get("log_json", False)
+    logger = create_logger(
+        name="GMaps Scraper",
+        path=DIR_LOGGER_MAIN,
+        level_stdout=log_level,
+        level_file=log_level_file,
+        maxBytes=1 * 1024 * 1024,
+        is_json=log_json
+    )
+    logger.info("Starting GMaps Scraper...")
     logger.info(f"Configuration loaded from {args.config}")
     logger.info(f"Parameters: {config}")
 
+    # A broken configuration is reported before any browser is started
+    errors = config_validate(config)
+    for error in errors:
+        logger.error(f"Configuration error -> {error}")
+    if errors:
+        return 1
+    if args.plan:
+        return plan(config, args, logger)
+
     # Initialize the scraper module
-    scraper = ModuleScraperGMaps(
-        headless=config["headless"],
-        logger_file_path=DIR_LOGGER_SCRAPER,
-    )
+    if config.get("engine", "selenium") == "cdp":
+        from Modules.module_scraper_gmaps_cdp import ModuleScraperGMapsCDP
+        scraper = ModuleScraperGMapsCDP(
+            headless=config["headless"],
+            tabs=config.get("tabs", 8),
+            path_chrome=config.get("path_chrome", ""),
+            block_profile=config.get("block_profile", "default"),
+            block_urls=config.get("block_urls"),
+            logger_file_path=DIR_LOGGER_SCRAPER,
+            logger_level_stdo=log_level,
+            logger_level_file=log_level_file,
+            logger_is_json=log_json,
+        )
+    else:
+        from Modules.module_scraper_gmaps import ModuleScraperGMaps
+        scraper = ModuleScraperGMaps(
+            headless=config["headless"],
+            workers=config.get("workers", 1),
+            block_profile=config.get("block_profile", "default"),
+            block_urls=config.get("block_urls"),
+            logger_file_path=DIR_LOGGER_SCRAPER,
+            logger_level_stdo=log_level,
+            logger_level_file=log_level_file,
+            logger_is_json=log_json,
+        )
     logger.info("Scraper initialized.")
+    # Set before the task starts, a spare driver is started as soon as the first worker asks for a driver
+    # and the workers read the page, scroll, pacing and retry settings from their first target on
+    scraper.driver_manager.count_spares = config.get("driver_spares", 1)
+    scraper.driver_manager.max_pages = config.get("driver_max_pages", 0)
+    scraper.driver_manager.max_rss_mb = config.get("driver_max_rss_mb", 0)
+    scraper.timeout_url_load = config.get("timeout_url_load", 10.0)
+    scraper.delay_target_iteration = config["delay_target_iteration"]
+    scraper.delay_scroll = config["delay_scroll"]
+    scraper.extraction_mode = config.get("extraction_mode", "js")
+    scraper.scroll_mode = config.get("scroll_mode", "adaptive")
+    scraper.max_results = config.get("max_results", 0)
+    scraper.rate_limiter.rate = config.get("rate_initial", 1.)
+    scraper.rate_limiter.rate_min = config.get("rate_min", 0.05)
+    scraper.rate_limiter.rate_max = config.get("rate_max", 4.)
+    scraper.max_block_retries = config.get("max_block_retries", 3)
+    scraper.max_target_retries = config.get("max_target_retries", 3)
 
     # Add targets to the scraper
     # Parse locations from string format: "lat, lon"
-    locations = [
-        tuple(map(str, loc.strip().split(",")))
-        for loc in config["locations"]
-    ]
+    locations = locations_parse(config)
     logger.info(f"Locations parsed ({len(locations)}): {locations}")
     logger.info(f"Keywords parsed ({len(config['keywords'])}): {config['keywords']}")
 
+    # Every target's state and results are kept in the job store
+    # A job_queue (a shared SQLite path or the URL of a served queue) is shared with other scrapers,
+    # targets are leased from it and it is never cleared by a worker
+    job_queue = config.get("job_queue", "")
+    if job_queue.startswith("http://"):
+        job_store = ModuleJobQueueClient(job_queue)
+    else:
+        job_store = ModuleJobStore(job_queue or config.get("job_store", DIR_JOB_STORE))
+        # Targets failing on every host are given up like in the buffer, see max_target_retries
+        job_store.max_attempts = config.get("max_target_retries", 3) + 1
+    if job_queue:
+        logger.info(f"Joining the job queue {job_store.path}: {job_store.targets_count()}")
+    elif args.resume:
+        count_reset = job_store.targets_reset_in_progress()
+        logger.info(f"Resuming from {job_store.path}: {job_store.targets_count()} ({count_reset} interrupted targets reset)")
+    else:
+        job_store.clear()
+    scraper.job_store = job_store
+
+    job_queue_server = None
+    if args.serve_queue:
+        host, port = args.serve_queue.rsplit(":", 1)
+        job_queue_server = ModuleJobQueueServer(job_store, host=host, port=int(port), logger=logger).start()
+
+    # Shared stores are leased from, so several scrapers never work on the same target
+    is_shared = bool(job_queue or job_queue_server)
+    if is_shared:
+        scraper.lease_owner = f"{socket.gethostname()}-{os.getpid()}"
+        scraper.lease_duration = config.get("lease_duration", 600.0)
+        logger.info(f"Leasing targets as {scraper.lease_owner} for {scraper.lease_duration} seconds")
+
+    # Targets scraped within the TTL are served from the cache
+    result_cache = None
+    if config.get("cache_ttl", 0) > 0:
+        result_cache = ModuleResultCache(
+            config.get("cache", DIR_RESULT_CACHE),
+            ttl=config["cache_ttl"],
+            max_bytes=int(config.get("cache_max_mb", 512) * 1024 * 1024)
+        )
+        scraper.result_cache = result_cache
+        scraper.cache_max_age = args.max_age
+        logger.info(f"Result cache: {result_cache.path} (TTL {config['cache_ttl']} seconds, max age override {args.max_age})")
+
+    # Every extracted place is upserted into the indexed result store, see "main.py query"
+    result_store = None
+    if config.get("result_store"):
+        result_store = ModuleResultStore(config["result_store"])
+        result_store.run_start(label=f"{socket.gethostname()}-{os.getpid()}")
+        scraper.result_store = result_store
+        logger.info(f"Result store: {result_store.path} (run {result_store.run_id})")
+
+    # Places seen under several keywords or locations are kept once
+    if config.get("deduplicate", True):
+        scraper.place_index = ModulePlaceIndex()
+        if args.resume or is_shared:
+            scraper.place_index.load(job_store.results_get())
+            logger.info(f"Place index loaded with {len(scraper.place_index)} places")
+
     # Create combinations of keywords and locations
     for keyword in config["keywords"]:
         for latitude, longitude in locations:
+            job_store.target_add(
+                keyword=keyword,
+                latitude=latitude,
+                longitude=longitude,
+            )
+
+    # Tiles covering the configured area, saturated tiles are split into finer tiles while scraping
+    planners: dict[str, ModuleTilePlanner] = {}
+    if config.get("tiling"):
+        tiles = []
+        for keyword in config["keywords"]:
+            planners[keyword] = ModuleTilePlanner(**config["tiling"])
+            tiles = planners[keyword].plan()
+            for tile in tiles:
+                latitude, longitude = tile.center
+                job_store.target_add(keyword, latitude, longitude, zoom=tile.zoom)
+        logger.info(f"Tiles planned per keyword: {len(tiles)}")
+
+        # Tiles split in the interrupted run or by the other scrapers of a shared queue
+        if args.resume or is_shared:
+            for keyword, latitude, longitude, zoom in job_store.targets_get(states=STATES):
+                if keyword in planners and zoom and (latitude, longitude) not in planners[keyword].tiles:
+                    planners[keyword].tile_register(latitude, longitude, zoom)
+
+        def tile_subdivide(keyword: str, latitude: str, longitude: str, places: list[dict]):
+            planner = planners.get(keyword)
+            if planner is None:
+                return
+            tiles = planner.subdivide(latitude, longitude, len(places))
+            for tile in tiles:
+                tile_latitude, tile_longitude = tile.center
+                job_store.target_add(keyword, tile_latitude, tile_longitude, zoom=tile.zoom)
+                if not is_shared:
+                    scraper.target_add(keyword, tile_latitude, tile_longitude, zoom=tile.zoom)
+            if tiles:
+                logger.info(f"Saturated tile {keyword} at {latitude}, {longitude} split into {len(tiles)} tiles")
+
+        scraper.target_done_callback_add(tile_subdivide)
+
+    # Completed targets are never fetched again
+    # Leased targets are added to the buffer by the workers themselves
+    if not is_shared:
+        for keyword, latitude, longitude, zoom in job_store.targets_get():
             scraper.target_add(
                 keyword=keyword,
-                latitude=latitude.strip(),
-                longitude=longitude.strip(),
+                latitude=latitude,
+                longitude=longitude,
+                zoom=zoom,
             )
+    logger.info(f"Targets in job store: {job_store.targets_count()}")
+
+    # Streaming sinks are written as each target finishes
+    for sink_config in config.get("sinks") or []:
+        scraper.sink_add(create_result_sink(**sink_config))
+        logger.info(f"Result sink added: {sink_config}")
+    scraper.is_bounded_memory = config.get("bounded_memory", False)
+
+    # Detail pages of the listed places are opened by a second stage on its own drivers,
+    # the listing workers wait once enrich_queue_size places are queued
+    if config.get("enrich", False):
+        scraper.enricher = ModuleEnricher(
+            factory=scraper.init_driver_enricher,
+            callback_done=scraper.target_complete,
+            logger=scraper.logger,
+            workers=config.get("enrich_workers", 1),
+            queue_size=config.get("enrich_queue_size", 200),
+            rate_limiter=scraper.rate_limiter,
+            stats=scraper.stats,
+            driver_spares=config.get("driver_spares", 1),
+            driver_max_pages=config.get("driver_max_pages", 0),
+            driver_max_rss_mb=config.get("driver_max_rss_mb", 0)
+        )
+        scraper.enricher.timeout_page_load = config.get("timeout_url_load", 10.0)
+        scraper.stats.gauge_function_set("places_enrich_queued", scraper.enricher.__len__)
+
+    # Keywords take turns in proportion to their weights (default 1)
+    scraper.scheduler.keyword_weights = config.get("keyword_weights") or {}
 
     scraper.set_search_parameters(
         max_scrolls=config["max_scrolls"],
         zoom=config["zoom"]
     )
 
+    # Stage timings, error counts and queue depth for Prometheus
+    stats_server = None
+    if config.get("stats_port", 0):
+        stats_server = ModuleStatsServer(
+            scraper.stats,
+            host=config.get("stats_host", "0.0.0.0"),
+            port=config["stats_port"],
+            logger=logger
+        ).start()
+
+    # Spans of the task are written as Chrome trace-event JSON for Perfetto, off unless a path is given
+    scraper.trace_path = config.get("trace", "")
+    scraper.trace_sampling_interval = config.get("trace_sampling_interval", 0.)
+
     scraper.start_Thread(
         start_task=True
     )
-    scraper.delay_url_load = config["delay_url_load"]
-    scraper.delay_target_iteration = config["delay_target_iteration"]
-    scraper.delay_scroll = config["delay_scroll"]
 
     logger.info("Scraper started.")
     time_start = time.time()
+    is_failed = False
     while True:
-        if scraper.target_get_count() == 0:
+        # Woken as soon as the last target of the buffer is finished, a crashed task ends the wait with an error
+        try:
+            scraper.target_wait_empty()
+        except RuntimeError as error:
+            logger.error(f"{error}, saving the results collected so far")
+            is_failed = True
+            break
+        if not is_shared:
+            logger.info("All targets processed.")
+            break
+
+        # Targets leased by other scrapers are waited for, their leases may expire and be re-issued here
+        try:
+            count_remaining = job_store.targets_remaining()
+        except OSError as error:
+            logger.warning(f"Job queue is not reachable, stopping -> {error}")
+            break
+        if count_remaining == 0:
             logger.info("All targets processed.")
             break
-        # Sleep for a bit to avoid busy waiting
+        # The shared queue can only be polled
         time.sleep(1)
     time_end = time.time()
 
-    results = scraper.results_get()
+    # The job store also holds the results of previous runs when resuming
+    # In bounded memory mode the sinks hold the results, so they are not loaded back
+    results = scraper.results_get() if scraper.is_bounded_memory else job_store.results_get()
     results_converted = scraper.results_convert(results)
 
     saveJsonFile(config["output"], results_converted)
+    if result_cache is not None:
+        logger.info(f"Cache: {result_cache.stats()}")
+    if scraper.place_index is not None:
+        logger.info(f"Unique places: {len(scraper.place_index)}, duplicates dropped: {scraper.place_index.count_duplicates}")
+        if config.get("output_sightings"):
+            saveJsonFile(config["output_sightings"], scraper.place_index.sightings_convert())
     logger.info(f"Results in {time_end - time_start:.2f} seconds: {results_converted}")
+    logger.info(f"Stats: {scraper.get_stats()}")
+    logger.info(f"Rate limiter: {scraper.rate_limiter.stats()}")
 
     scraper.stop()
     scraper.stop_Thread()
     logger.info("Stopping scraper...")
     scraper.wait_To_Stop_Task()
+    if job_queue_server is not None:
+        job_queue_server.stop()
+    if stats_server is not None:
+        stats_server.stop()
+    job_store.close()
+    if result_cache is not None:
+        result_cache.close()
+    if result_store is not None:
+        logger.info(f"Result store: {result_store.places_count()} places {result_store.keywords_count()}")
+        result_store.run_end()
+        result_store.close()
     logger.info("Scraper stopped.")
+    return 1 if is_failed else 0
 
 
 if __name__ == "__main__":
-    main()
+    raise SystemExit(main())
@@ -7,3 +7,7 @@ DIR_LOGGER_ROOT.mkdir(parents=True, exist_ok=True)
 DIR_LOGGER_MAIN = DIR_LOGGER_ROOT / 'business_scraper.log'
 
 DIR_LOGGER_SCRAPER = DIR_LOGGER_ROOT / 'scraper.log'
+
+DIR_JOB_STORE = DIR_LOGGER_ROOT.parent / 'jobs.sqlite'
+
+DIR_RESULT_CACHE = DIR_LOGGER_ROOT.parent / 'cache.sqlite'
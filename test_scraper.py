@@ -14,10 +14,10 @@ scraper.set_search_parameters(
 scraper.start_Thread(
     start_task=True
 )
-# scraper.delay_url_load = 1.
+# scraper.timeout_url_load = 10.
 # scraper.delay_target_iteration = 1.
 # scraper.delay_scroll = 1.
-scraper.delay_url_load = 1.
+scraper.timeout_url_load = 10.
 scraper.delay_target_iteration = 0.
 scraper.delay_scroll = 0.5
 
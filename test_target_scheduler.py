@@ -0,0 +1,162 @@
+"""
+Randomized test of ModuleTargetScheduler against a plain reference model.
+
+Runs random add, claim, release and remove operations with keyword weights on the scheduler and on
+a model kept in dicts, and checks after every step that both hold the same targets and that every
+claim takes the best target of its keyword. A second check claims from backlogged keywords and
+compares their shares with the weights. No browser is needed.
+
+    python test_target_scheduler.py --seeds 200
+"""
+
+import argparse
+import random
+
+from Modules.module_target_scheduler import ModuleTargetScheduler
+
+
+KEYWORDS = ("AVM", "business", "OSB", "cafe")
+
+
+def arg_parser():
+    parser = argparse.ArgumentParser(description="GMaps Scraper target scheduler test")
+    parser.add_argument("--seeds", type=int, default=200, help="Random operation sequences to run.")
+    parser.add_argument("--steps", type=int, default=400, help="Operations of every sequence.")
+    return parser.parse_args()
+
+
+class ReferenceScheduler():
+    """
+    Keeps the queued targets as {target: (priority, sequence)} and the claimed ones as {target: priority}.
+    """
+
+    def __init__(self):
+        self.free: dict[tuple, tuple[float, int]] = {}
+        self.in_progress: dict[tuple, float] = {}
+        self.sequence = 0
+
+    def push(self, target: tuple, priority: float):
+        self.free[target] = (priority, self.sequence)
+        self.sequence += 1
+
+    def add(self, target: tuple, priority: float) -> bool:
+        if target in self.free or target in self.in_progress:
+            return False
+        self.push(target, priority)
+        return True
+
+    def release(self, target: tuple, penalty: float):
+        if target in self.in_progress:
+            self.push(target, self.in_progress.pop(target) + penalty)
+
+    def remove(self, target: tuple) -> bool:
+        if self.free.pop(target, None) is not None:
+            return True
+        return self.in_progress.pop(target, None) is not None
+
+    def best(self, keyword: str | None = None) -> tuple | None:
+        """
+        Returns the free target with the lowest (priority, sequence), of the keyword if given.
+        """
+        targets = [target for target in self.free if keyword is None or target[0] == keyword]
+        return min(targets, key=self.free.__getitem__, default=None)
+
+    def snapshot(self) -> dict[str, list[tuple[str, str]]]:
+        targets: dict = {}
+        for keyword, latitude, longitude in list(self.in_progress) + list(self.free):
+            targets.setdefault(keyword, []).append((latitude, longitude))
+        return targets
+
+
+def check_same(scheduler: ModuleTargetScheduler, reference: ReferenceScheduler, targets: list[tuple]):
+    assert len(scheduler) == len(reference.free) + len(reference.in_progress)
+    assert scheduler.count_free() == len(reference.free)
+    assert scheduler.count_keywords() == len({target[0] for target in [*reference.free, *reference.in_progress]})
+    assert dict(scheduler.in_progress) == reference.in_progress
+    for target in targets:
+        assert (target in scheduler) == (target in reference.free or target in reference.in_progress), target
+    snapshot = {keyword: sorted(locations) for keyword, locations in scheduler.snapshot().items()}
+    assert snapshot == {keyword: sorted(locations) for keyword, locations in reference.snapshot().items()}
+
+
+def run_sequence(seed: int, steps: int):
+    """
+    Runs one random operation sequence, small pools of locations and priorities make
+    duplicates, ties and unknown targets common.
+    """
+    rng = random.Random(seed)
+    is_fair = seed % 4 != 0
+    weights = {keyword: rng.choice((0.5, 1., 2., 3.)) for keyword in KEYWORDS if rng.random() < 0.75}
+    scheduler = ModuleTargetScheduler(keyword_weights=weights, is_fair=is_fair)
+    reference = ReferenceScheduler()
+    targets = [(keyword, f"41.{index}", "29.0") for keyword in KEYWORDS for index in range(6)]
+
+    for step in range(steps):
+        operation = rng.choices(("add", "claim", "release", "remove"), weights=(4, 3, 2, 2))[0]
+        if operation == "add":
+            target = rng.choice(targets)
+            priority = float(rng.randrange(4))
+            assert scheduler.add(*target, priority=priority) == reference.add(target, priority), (seed, step, target)
+        elif operation == "claim":
+            target = scheduler.claim()
+            if target is None:
+                assert not reference.free, (seed, step)
+            else:
+                assert target in reference.free, (seed, step, target)
+                # Keywords take turns, but inside a keyword the lowest priority, then the oldest, comes first
+                assert target == reference.best(target[0]), (seed, step, target)
+                if not is_fair:
+                    assert reference.free[target] == reference.free[reference.best()], (seed, step, target)
+                reference.in_progress[target] = reference.free.pop(target)[0]
+        elif operation == "release":
+            claimed = list(reference.in_progress)
+            target = rng.choice(claimed) if claimed and rng.random() < 0.9 else rng.choice(targets)
+            penalty = float(rng.randrange(3))
+            scheduler.release(*target, penalty=penalty)
+            reference.release(target, penalty)
+        else:
+            target = rng.choice(targets)
+            assert scheduler.remove(*target) == reference.remove(target), (seed, step, target)
+        check_same(scheduler, reference, targets)
+
+    # Draining claims everything that is left
+    while (target := scheduler.claim()) is not None:
+        assert target == reference.best(target[0]), (seed, target)
+        reference.in_progress[target] = reference.free.pop(target)[0]
+    assert not reference.free
+    check_same(scheduler, reference, targets)
+
+
+def run_shares(seed: int):
+    """
+    Claims from keywords which stay backlogged and checks that every keyword got its weighted share.
+    """
+    rng = random.Random(seed)
+    weights = {keyword: rng.choice((0.5, 1., 2., 3.)) for keyword in KEYWORDS}
+    scheduler = ModuleTargetScheduler(keyword_weights=weights)
+    for keyword in KEYWORDS:
+        for index in range(200):
+            scheduler.add(keyword, f"41.{index}", "29.0", priority=float(rng.randrange(4)))
+
+    claims = dict.fromkeys(KEYWORDS, 0)
+    for _ in range(rng.randrange(20, 200)):
+        keyword, latitude, longitude = scheduler.claim()
+        claims[keyword] += 1
+        if rng.random() < 0.5:
+            scheduler.remove(keyword, latitude, longitude)
+
+    # Claims divided by weight advance by 1 / weight per claim, so they differ by at most the largest step
+    passes = [claims[keyword] / weights[keyword] for keyword in KEYWORDS]
+    assert max(passes) - min(passes) <= max(1. / weight for weight in weights.values()) + 1e-9, (seed, claims, weights)
+
+
+def main():
+    args = arg_parser()
+    for seed in range(args.seeds):
+        run_sequence(seed, args.steps)
+        run_shares(seed)
+    print(f" > {args.seeds} sequences of {args.steps} operations match the reference model.")
+
+
+if __name__ == "__main__":
+    main()